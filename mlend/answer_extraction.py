@@ -0,0 +1,170 @@
+# answer_extraction.py
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, Field, create_model
+
+from base_models import ChatMessage, ContractQuestion
+
+# chat_answers flag: how many chat messages have already been through
+# extraction. Only later messages are sent to the extractor, and generation
+# only needs raw history from this point on.
+EXTRACTED_TURNS_FLAG = "__extracted_turns"
+
+_SCHEMA_CACHE_MAX = 256
+_FIELD_NAME_RE = re.compile(r"[^0-9a-zA-Z_]+")
+
+
+@dataclass(frozen=True)
+class ExtractionSchema:
+    model: Type[BaseModel]
+    # Pydantic field name -> template question key.
+    keys: Dict[str, str]
+
+
+_LOCK = Lock()
+_SCHEMAS: "OrderedDict[Tuple[Any, ...], ExtractionSchema]" = OrderedDict()
+_STATS = {
+    "extractions": 0,
+    "failures": 0,
+    "answers_extracted": 0,
+    "schemas_built": 0,
+}
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _LOCK:
+        _STATS[name] += amount
+
+
+def get_answer_extraction_stats() -> Dict[str, Any]:
+    with _LOCK:
+        return {**_STATS, "schemas_cached": len(_SCHEMAS)}
+
+
+def _field_name(key: str, taken: Dict[str, str]) -> str:
+    name = _FIELD_NAME_RE.sub("_", key).strip("_").lower() or "answer"
+    if name[0].isdigit():
+        name = f"q_{name}"
+    base, suffix = name, 2
+    while name in taken:
+        name = f"{base}_{suffix}"
+        suffix += 1
+    return name
+
+
+def _model_name(contract_type_name: str) -> str:
+    words = re.findall(r"[0-9a-zA-Z]+", contract_type_name or "")
+    name = "".join(word[:1].upper() + word[1:] for word in words) or "Contract"
+    if name[0].isdigit():
+        name = f"Contract{name}"
+    return f"{name}ChatAnswers"
+
+
+def extraction_schema(
+    contract_type_name: str,
+    questions: List[ContractQuestion],
+) -> ExtractionSchema:
+    """
+    Pydantic model with one optional string field per template question,
+    built once per distinct question set.
+    """
+    signature = (
+        contract_type_name,
+        tuple((q.key, q.label, q.description) for q in questions),
+    )
+    with _LOCK:
+        schema = _SCHEMAS.get(signature)
+        if schema is not None:
+            _SCHEMAS.move_to_end(signature)
+            return schema
+
+    keys: Dict[str, str] = {}
+    fields: Dict[str, Any] = {}
+    for question in questions:
+        name = _field_name(question.key, keys)
+        keys[name] = question.key
+        description = question.label
+        if question.description:
+            description = f"{description}. {question.description}"
+        fields[name] = (Optional[str], Field(default=None, description=description))
+    schema = ExtractionSchema(
+        model=create_model(_model_name(contract_type_name), **fields),
+        keys=keys,
+    )
+
+    with _LOCK:
+        _SCHEMAS[signature] = schema
+        while len(_SCHEMAS) > _SCHEMA_CACHE_MAX:
+            _SCHEMAS.popitem(last=False)
+        _STATS["schemas_built"] += 1
+    return schema
+
+
+def extracted_turns(chat_answers: Dict[str, Any], message_count: int) -> int:
+    """
+    Messages already covered by extraction, clamped to the history length.
+    """
+    try:
+        covered = int(chat_answers.get(EXTRACTED_TURNS_FLAG) or 0)
+    except (TypeError, ValueError):
+        covered = 0
+    return min(max(covered, 0), message_count)
+
+
+def pending_messages(
+    chat_messages: List[ChatMessage],
+    chat_answers: Dict[str, Any],
+) -> Tuple[Optional[ChatMessage], List[ChatMessage]]:
+    """
+    `(context, new)`: the messages not yet extracted, plus the assistant
+    message just before them (what a short reply answers), if any.
+    """
+    start = extracted_turns(chat_answers, len(chat_messages))
+    new = chat_messages[start:]
+    context = None
+    if start > 0 and chat_messages[start - 1].role == "assistant":
+        context = chat_messages[start - 1]
+    return context, new
+
+
+def extraction_request(
+    questions: List[ContractQuestion],
+    current_answers: Dict[str, str],
+    context: Optional[ChatMessage],
+    new_messages: List[ChatMessage],
+) -> List[Dict[str, str]]:
+    lines = ["Questions (current value in brackets):"]
+    for question in questions:
+        current = current_answers.get(question.key)
+        lines.append(f"- {question.label} ({question.key}) [{current or 'none'}]")
+    if context is not None:
+        lines += ["", "Earlier assistant message:", context.content.strip()]
+    lines += ["", "New conversation turns:"]
+    for message in new_messages:
+        role = message.role if message.role in ("user", "assistant") else "user"
+        content = message.content.strip()
+        if content:
+            lines.append(f"{role}: {content}")
+    return [{"role": "user", "content": "\n".join(lines)}]
+
+
+def extracted_answers(schema: ExtractionSchema, result: BaseModel) -> Dict[str, str]:
+    """
+    Non-empty extracted values keyed by template question key.
+    """
+    answers: Dict[str, str] = {}
+    for name, key in schema.keys.items():
+        value = getattr(result, name, None)
+        if isinstance(value, str) and value.strip():
+            answers[key] = value.strip()
+    _count("extractions")
+    _count("answers_extracted", len(answers))
+    return answers
+
+
+def count_failure() -> None:
+    _count("failures")
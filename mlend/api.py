@@ -1,27 +1,117 @@
 # api.py
+import json
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
 from fastapi import APIRouter, HTTPException
-from starlette.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from base_models import (
     ContractChatRequest,
     ContractChatResponse,
     GenerateContractRequest,
     GenerateContractResponse,
+    RegenerateContractRequest,
+    RegenerateContractResponse,
+)
+from orchestrator import (
+    answer_contract_chat_async,
+    generate_contract_async,
+    regenerate_contract_async,
+    stream_contract_async,
+)
+from outline_cache import get_outline_cache_stats
+from precedent_db import get_pool_stats
+from precedent_index import get_precedent_index_stats
+from precedent_repo import get_precedent_cache_stats
+from answer_extraction import get_answer_extraction_stats
+from chat_history import get_chat_history_stats
+from cost_accounting import get_cost_summary
+from model_router import get_model_routing_stats
+from question_engine import get_question_engine_stats
+from resilience import get_resilience_stats
+from section_cache import get_section_cache_stats
+from progress_store import (
+    get_progress,
+    get_progress_stats,
+    idle_progress,
+    watch_progress,
 )
-from orchestrator import answer_contract_chat, generate_contract
-from progress_store import get_progress
 
 router = APIRouter()
 
+_PROGRESS_KEEPALIVE_SECONDS = 15.0
+
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _sse_stream(
+    events: AsyncIterator[Tuple[str, Dict[str, Any]]],
+) -> AsyncIterator[str]:
+    async for event, data in events:
+        yield _sse_event(event, data)
+
 
 @router.get("/health")
 async def health_check():
     return {"status": "ok", "message": "Lexy mlend is alive"}
 
 
+@router.get("/stats")
+def service_stats():
+    """
+    Runtime counters of every cache, pool, router and backend, keyed by area.
+    """
+    return {
+        "progress": get_progress_stats(),
+        "db_pool": get_pool_stats(),
+        "precedent_cache": get_precedent_cache_stats(),
+        "precedent_outlines": get_outline_cache_stats(),
+        "precedent_index": get_precedent_index_stats(),
+        "section_cache": get_section_cache_stats(),
+        "chat_history": get_chat_history_stats(),
+        "chat_fast_path": get_question_engine_stats(),
+        "chat_extraction": get_answer_extraction_stats(),
+        "model_routing": get_model_routing_stats(),
+        "llm_resilience": get_resilience_stats(),
+    }
+
+
+@router.get("/costs")
+def cost_summary(
+    draft_id: Optional[str] = None,
+    contract_type: Optional[str] = None,
+    day: Optional[str] = None,
+    model: Optional[str] = None,
+    task: Optional[str] = None,
+    group_by: Optional[str] = None,
+):
+    """
+    Priced LLM usage matching the given filters (`day` is YYYY-MM-DD, UTC),
+    optionally grouped by draft_id, contract_type, day, model or task.
+    """
+    try:
+        return get_cost_summary(
+            draft_id=draft_id,
+            contract_type=contract_type,
+            day=day,
+            model=model,
+            task=task,
+            group_by=group_by,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
 @router.post("/contract/chat", response_model=ContractChatResponse)
 async def contract_chat(req: ContractChatRequest):
     try:
-        return await run_in_threadpool(answer_contract_chat, req)
+        return await answer_contract_chat_async(req)
     except Exception as e:
         # You can use your logger here
         raise HTTPException(status_code=500, detail=str(e))
@@ -30,23 +120,67 @@ async def contract_chat(req: ContractChatRequest):
 @router.post("/contract/generate", response_model=GenerateContractResponse)
 async def contract_generate(req: GenerateContractRequest):
     try:
-        return await run_in_threadpool(generate_contract, req)
+        return await generate_contract_async(req)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/contract/regenerate", response_model=RegenerateContractResponse)
+async def contract_regenerate(req: RegenerateContractRequest):
+    """
+    Redraft only the listed sections (or those touched by the changed
+    answers) of a previous draft and return the re-stitched contract.
+    """
+    try:
+        return await regenerate_contract_async(req)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/contract/generate/stream")
+async def contract_generate_stream(req: GenerateContractRequest):
+    """
+    Server-Sent Events variant of /contract/generate.
+
+    Streams `start`, `delta`, `section`, `disclaimer`, `usage` and `done`
+    events as the contract is drafted (see `stream_contract_async`).
+    """
+    return StreamingResponse(
+        _sse_stream(stream_contract_async(req)),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+    )
+
+
 @router.get("/contract/progress/{draft_id}")
-async def contract_progress(draft_id: str):
+def contract_progress(draft_id: str):
     progress = get_progress(draft_id)
     if not progress:
-        return {
-            "draft_id": draft_id,
-            "status": "idle",
-            "percent": 0,
-            "current_step": None,
-            "completed_sections": 0,
-            "total_sections": 0,
-            "updated_at": None,
-            "error": None,
-        }
+        return idle_progress(draft_id)
     return progress
+
+
+@router.get("/contract/progress/{draft_id}/events")
+async def contract_progress_events(draft_id: str):
+    """
+    Server-Sent Events feed of progress transitions for one draft.
+
+    Sends the current state immediately, then one `progress` event per
+    init/update/complete/fail transition, closing after completion or
+    failure. Comment lines are sent as keepalives while idle.
+    """
+
+    async def _events() -> AsyncIterator[str]:
+        async for snapshot in watch_progress(
+            draft_id, keepalive=_PROGRESS_KEEPALIVE_SECONDS
+        ):
+            if snapshot is None:
+                yield ": keepalive\n\n"
+            else:
+                yield _sse_event("progress", snapshot)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+    )
@@ -52,3 +52,19 @@ class GenerateContractResponse(BaseModel):
     draft_id: str
     contract_text: str
     revision_notes: Optional[str] = None
+
+
+class RegenerateContractRequest(GenerateContractRequest):
+    # The previous draft: either the stitched contract text returned by
+    # /contract/generate, or its section texts in precedent order.
+    previous_contract_text: Optional[str] = None
+    previous_sections: Optional[List[str]] = None
+    # What to redraft: precedent section headings and/or the answer keys
+    # whose values changed since the previous draft.
+    section_headings: List[str] = Field(default_factory=list)
+    changed_answer_keys: List[str] = Field(default_factory=list)
+
+
+class RegenerateContractResponse(GenerateContractResponse):
+    # Headings of the sections that were redrafted.
+    regenerated_sections: List[str] = Field(default_factory=list)
@@ -0,0 +1,203 @@
+# chat_history.py
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from base_models import ChatMessage
+from constants import (
+    CHAT_HISTORY_KEEP_MESSAGES,
+    CHAT_HISTORY_TOKEN_CEILING,
+    CHAT_SUMMARY_FOLD_MIN_MESSAGES,
+    CHAT_SUMMARY_MAX_ENTRIES,
+)
+from logger import get_logger
+from token_budget import estimate_tokens, truncate_to_tokens
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class _Summary:
+    # Summarises messages[:covered]; `fingerprint` guards against the
+    # history being edited or replaced under the same draft.
+    covered: int
+    fingerprint: str
+    text: str
+
+
+@dataclass(frozen=True)
+class CompactedHistory:
+    summary: Optional[str]
+    messages: List[ChatMessage]
+    # Messages neither summarised nor sent, because of the token ceiling.
+    dropped: int
+    estimated_tokens: int
+    # `(start, end)` slice of the original history that should be folded
+    # into the summary next, or None if it's not worth a summary call yet.
+    fold: Optional[Tuple[int, int]]
+
+
+_LOCK = Lock()
+# draft_id -> rolling summary, least recently used first.
+_SUMMARIES: "OrderedDict[str, _Summary]" = OrderedDict()
+_IN_FLIGHT: set = set()
+_STATS = {
+    "compactions": 0,
+    "summary_hits": 0,
+    "summary_stale": 0,
+    "refreshes": 0,
+    "refresh_errors": 0,
+    "dropped_messages": 0,
+    "evictions": 0,
+}
+
+
+def _fingerprint(messages: List[ChatMessage]) -> str:
+    digest = hashlib.sha1()
+    for message in messages:
+        digest.update(message.role.encode("utf-8"))
+        digest.update(b"\x1e")
+        digest.update(message.content.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def _valid_summary(draft_id: str, messages: List[ChatMessage]) -> Optional[_Summary]:
+    with _LOCK:
+        entry = _SUMMARIES.get(draft_id)
+        if entry is not None:
+            _SUMMARIES.move_to_end(draft_id)
+    if entry is None:
+        return None
+    if entry.covered > len(messages) or entry.fingerprint != _fingerprint(
+        messages[: entry.covered]
+    ):
+        with _LOCK:
+            _STATS["summary_stale"] += 1
+            if _SUMMARIES.get(draft_id) is entry:
+                del _SUMMARIES[draft_id]
+        return None
+    with _LOCK:
+        _STATS["summary_hits"] += 1
+    return entry
+
+
+def _message_tokens(message: ChatMessage) -> int:
+    # Role marker and message framing.
+    return estimate_tokens(message.content) + 4
+
+
+def compact_history(
+    draft_id: str,
+    messages: List[ChatMessage],
+    *,
+    reserved_tokens: int = 0,
+) -> CompactedHistory:
+    """
+    Pick what of `messages` to send to the model.
+
+    The cached summary (if it still matches the start of the history)
+    replaces the messages it covers. Everything after it is sent verbatim,
+    newest first, while it fits in CHAT_HISTORY_TOKEN_CEILING minus
+    `reserved_tokens`; the latest message is always sent, truncated if it
+    has to be. Older messages that pile up outside the last
+    CHAT_HISTORY_KEEP_MESSAGES are reported in `fold` so the caller can
+    refresh the summary off the request path.
+    """
+    entry = _valid_summary(draft_id, messages) if draft_id else None
+    covered = entry.covered if entry else 0
+    summary = entry.text if entry else None
+
+    budget = CHAT_HISTORY_TOKEN_CEILING - reserved_tokens
+    if summary:
+        budget -= estimate_tokens(summary)
+
+    candidates = messages[covered:]
+    selected: List[ChatMessage] = []
+    used = 0
+    for message in reversed(candidates):
+        cost = _message_tokens(message)
+        if used + cost > budget:
+            if not selected:
+                content = truncate_to_tokens(message.content, max(1, budget - 4))
+                selected.append(ChatMessage(role=message.role, content=content))
+                used += _message_tokens(selected[-1])
+            break
+        selected.append(message)
+        used += cost
+    selected.reverse()
+    dropped = len(candidates) - len(selected)
+
+    tail_start = max(covered, len(messages) - CHAT_HISTORY_KEEP_MESSAGES)
+    fold = None
+    if tail_start - covered >= CHAT_SUMMARY_FOLD_MIN_MESSAGES or (
+        dropped and tail_start > covered
+    ):
+        fold = (covered, tail_start)
+
+    with _LOCK:
+        _STATS["compactions"] += 1
+        _STATS["dropped_messages"] += dropped
+
+    return CompactedHistory(
+        summary=summary,
+        messages=selected,
+        dropped=dropped,
+        estimated_tokens=used + (estimate_tokens(summary) if summary else 0),
+        fold=fold,
+    )
+
+
+def begin_refresh(draft_id: str) -> bool:
+    """
+    Claim the summary refresh for `draft_id`; False if one is running.
+    """
+    with _LOCK:
+        if draft_id in _IN_FLIGHT:
+            return False
+        _IN_FLIGHT.add(draft_id)
+        return True
+
+
+def finish_refresh(
+    draft_id: str,
+    messages: List[ChatMessage],
+    covered: int,
+    text: Optional[str],
+) -> None:
+    """
+    Store the summary of `messages[:covered]` (if `text` is set) and release
+    the refresh claim.
+    """
+    with _LOCK:
+        _IN_FLIGHT.discard(draft_id)
+        if not text:
+            _STATS["refresh_errors"] += 1
+            return
+        current = _SUMMARIES.get(draft_id)
+        if current is not None and current.covered > covered:
+            return
+        _SUMMARIES[draft_id] = _Summary(
+            covered=covered,
+            fingerprint=_fingerprint(messages[:covered]),
+            text=text.strip(),
+        )
+        _SUMMARIES.move_to_end(draft_id)
+        _STATS["refreshes"] += 1
+        while len(_SUMMARIES) > CHAT_SUMMARY_MAX_ENTRIES:
+            _SUMMARIES.popitem(last=False)
+            _STATS["evictions"] += 1
+
+
+def get_chat_history_stats() -> Dict[str, Any]:
+    with _LOCK:
+        return {
+            "summaries": len(_SUMMARIES),
+            "max_entries": CHAT_SUMMARY_MAX_ENTRIES,
+            "in_flight": len(_IN_FLIGHT),
+            "keep_messages": CHAT_HISTORY_KEEP_MESSAGES,
+            "token_ceiling": CHAT_HISTORY_TOKEN_CEILING,
+            **_STATS,
+        }
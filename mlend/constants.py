@@ -12,4 +12,217 @@ DEFAULT_ANTHROPIC_MODEL = os.getenv(
     "claude-sonnet-4-5"  # or "claude-3-haiku-20240307"
 )
 
-CLAUDE_SONNET_4_5_INPUT_COST_PER_MILLION = 3.0
+# Cheaper model for chat, summaries, answer extraction and boilerplate
+# sections (see model_router.py).
+FAST_ANTHROPIC_MODEL = os.getenv("ANTHROPIC_FAST_MODEL", "claude-haiku-4-5")
+
+# USD per million (input, output) tokens. Dated model ids match by prefix,
+# e.g. claude-3-haiku-20240307 -> claude-3-haiku. Extend or override with
+# MLEND_MODEL_PRICING="model=input:output,model=input:output".
+MODEL_PRICING = {
+    "claude-opus-4-1": (15.0, 75.0),
+    "claude-opus-4": (15.0, 75.0),
+    "claude-sonnet-4-5": (3.0, 15.0),
+    "claude-sonnet-4": (3.0, 15.0),
+    "claude-3-7-sonnet": (3.0, 15.0),
+    "claude-3-5-sonnet": (3.0, 15.0),
+    "claude-haiku-4-5": (1.0, 5.0),
+    "claude-3-5-haiku": (0.8, 4.0),
+    "claude-3-haiku": (0.25, 1.25),
+}
+MODEL_PRICING_OVERRIDES = os.getenv("MLEND_MODEL_PRICING", "")
+# Prompt-cache writes cost 1.25x the base input price; cache reads 0.1x.
+PROMPT_CACHE_WRITE_COST_MULTIPLIER = 1.25
+PROMPT_CACHE_READ_COST_MULTIPLIER = 0.1
+
+# Max number of section drafts in flight at once during contract generation.
+# 1 keeps the original one-section-at-a-time behaviour.
+SECTION_DRAFT_CONCURRENCY = max(1, int(os.getenv("MLEND_SECTION_CONCURRENCY", "4")))
+
+# Token budget (estimated) for the per-section part of a section prompt: the
+# answers a section depends on are always kept; its placeholders and the
+# chat turns most relevant to it fill whatever room is left.
+SECTION_CONTEXT_TOKEN_BUDGET = max(
+    0, int(os.getenv("MLEND_SECTION_CONTEXT_TOKEN_BUDGET", "800"))
+)
+
+# Anthropic prompt caching for the section context shared by every section
+# draft of a contract. Set to 0 to send each section prompt uncached.
+PROMPT_CACHE_ENABLED = os.getenv("MLEND_PROMPT_CACHE", "1").strip().lower() not in (
+    "0",
+    "false",
+    "no",
+    "off",
+)
+
+# In-memory generation progress: completed/failed entries are dropped after
+# the TTL, and the store is capped (least recently used evicted first).
+PROGRESS_TTL_SECONDS = float(os.getenv("MLEND_PROGRESS_TTL_SECONDS", "3600"))
+PROGRESS_MAX_ENTRIES = max(1, int(os.getenv("MLEND_PROGRESS_MAX_ENTRIES", "10000")))
+PROGRESS_SWEEP_INTERVAL_SECONDS = float(
+    os.getenv("MLEND_PROGRESS_SWEEP_INTERVAL_SECONDS", "60")
+)
+
+# Shared progress backend for multi-worker deployments: memory (per-process
+# only), sqlite (one file shared by all workers on a host) or postgres.
+PROGRESS_BACKEND = os.getenv("MLEND_PROGRESS_BACKEND", "memory")
+PROGRESS_SQLITE_PATH = os.getenv("MLEND_PROGRESS_SQLITE_PATH") or None
+PROGRESS_FLUSH_INTERVAL_SECONDS = float(
+    os.getenv("MLEND_PROGRESS_FLUSH_INTERVAL_SECONDS", "0.5")
+)
+
+# psycopg_pool settings shared by the sync and async pools in precedent_db.
+DB_POOL_MIN_SIZE = max(0, int(os.getenv("MLEND_DB_POOL_MIN_SIZE", "1")))
+DB_POOL_MAX_SIZE = max(1, int(os.getenv("MLEND_DB_POOL_MAX_SIZE", "10")))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("MLEND_DB_POOL_TIMEOUT_SECONDS", "10"))
+DB_POOL_MAX_IDLE_SECONDS = float(os.getenv("MLEND_DB_POOL_MAX_IDLE_SECONDS", "300"))
+
+# Parsed precedent outlines cached per contract type. Entries are checked
+# against the DB version tag every REVALIDATE seconds and dropped after TTL.
+PRECEDENT_CACHE_MAX_ENTRIES = max(
+    1, int(os.getenv("MLEND_PRECEDENT_CACHE_MAX_ENTRIES", "128"))
+)
+PRECEDENT_CACHE_TTL_SECONDS = float(
+    os.getenv("MLEND_PRECEDENT_CACHE_TTL_SECONDS", "3600")
+)
+PRECEDENT_CACHE_REVALIDATE_SECONDS = float(
+    os.getenv("MLEND_PRECEDENT_CACHE_REVALIDATE_SECONDS", "30")
+)
+# Postgres channel that precedent ingestion NOTIFYs after writing; empty
+# disables the listener.
+PRECEDENT_NOTIFY_CHANNEL = os.getenv(
+    "MLEND_PRECEDENT_NOTIFY_CHANNEL", "precedents_changed"
+)
+
+# Drafted sections cached by content (model, prompts, precedent section and
+# the context that feeds it): memory (per-process LRU), sqlite (on-disk,
+# shared by workers on a host) or off.
+SECTION_CACHE_BACKEND = os.getenv("MLEND_SECTION_CACHE", "memory")
+SECTION_CACHE_SQLITE_PATH = os.getenv("MLEND_SECTION_CACHE_SQLITE_PATH") or None
+SECTION_CACHE_MAX_ENTRIES = max(
+    1, int(os.getenv("MLEND_SECTION_CACHE_MAX_ENTRIES", "5000"))
+)
+SECTION_CACHE_TTL_SECONDS = float(
+    os.getenv("MLEND_SECTION_CACHE_TTL_SECONDS", str(7 * 24 * 3600))
+)
+
+# Parsed .docx precedent outlines cached on disk by file content hash and
+# parser version, shared by every process on the host: disk or off.
+OUTLINE_CACHE_BACKEND = os.getenv("MLEND_OUTLINE_CACHE", "disk")
+OUTLINE_CACHE_DIR = os.getenv("MLEND_OUTLINE_CACHE_DIR") or None
+
+# BM25 index over every precedent's sections (see precedent_index.py), built
+# offline with `python precedent_index.py`. When the file exists, each
+# section prompt gets up to PRECEDENT_SNIPPETS_PER_SECTION similar clauses
+# from other precedents, within PRECEDENT_SNIPPET_TOKEN_BUDGET estimated
+# tokens and PRECEDENT_SNIPPET_MAX_CHARS characters per clause.
+PRECEDENT_INDEX_PATH = os.getenv("MLEND_PRECEDENT_INDEX_PATH") or None
+PRECEDENT_SNIPPETS_PER_SECTION = max(
+    0, int(os.getenv("MLEND_PRECEDENT_SNIPPETS_PER_SECTION", "2"))
+)
+PRECEDENT_SNIPPET_TOKEN_BUDGET = max(
+    0, int(os.getenv("MLEND_PRECEDENT_SNIPPET_TOKEN_BUDGET", "400"))
+)
+PRECEDENT_SNIPPET_MAX_CHARS = max(
+    1, int(os.getenv("MLEND_PRECEDENT_SNIPPET_MAX_CHARS", "700"))
+)
+
+# Chat history compaction: the last KEEP messages are always sent verbatim,
+# older ones are folded into a rolling summary (kept per draft) once at least
+# FOLD_MIN of them have piled up, and the whole history sent to the model is
+# capped at an estimated TOKEN_CEILING.
+CHAT_HISTORY_KEEP_MESSAGES = max(
+    1, int(os.getenv("MLEND_CHAT_HISTORY_KEEP_MESSAGES", "8"))
+)
+CHAT_HISTORY_TOKEN_CEILING = max(
+    256, int(os.getenv("MLEND_CHAT_HISTORY_TOKEN_CEILING", "4000"))
+)
+CHAT_SUMMARY_FOLD_MIN_MESSAGES = max(
+    1, int(os.getenv("MLEND_CHAT_SUMMARY_FOLD_MIN_MESSAGES", "6"))
+)
+CHAT_SUMMARY_MAX_ENTRIES = max(
+    1, int(os.getenv("MLEND_CHAT_SUMMARY_MAX_ENTRIES", "2000"))
+)
+
+# Share of eligible chat turns (asking the next missing required question,
+# capturing a plain answer to it) handled locally without an LLM call:
+# 1 = all of them, 0 = always ask the LLM. Turns are picked by a stable hash
+# of the draft and turn, so a given turn always takes the same path. Starts
+# at a partial rollout until captured answers have been checked against the
+# LLM's.
+CHAT_FAST_PATH_RATIO = min(
+    1.0, max(0.0, float(os.getenv("MLEND_CHAT_FAST_PATH_RATIO", "0.25")))
+)
+# Longer replies are treated as free text and go to the LLM.
+CHAT_FAST_PATH_MAX_ANSWER_CHARS = int(
+    os.getenv("MLEND_CHAT_FAST_PATH_MAX_ANSWER_CHARS", "300")
+)
+
+# Structured extraction of answers given in chat into updated_chat_answers,
+# run alongside each LLM chat turn. Set to 0 to keep answers in raw history.
+CHAT_ANSWER_EXTRACTION_ENABLED = os.getenv(
+    "MLEND_CHAT_EXTRACTION", "1"
+).strip().lower() not in ("0", "false", "no", "off")
+
+# Per-call model routing. Set to 0 to send every call to ANTHROPIC_MODEL.
+MODEL_ROUTING_ENABLED = os.getenv("MLEND_MODEL_ROUTING", "1").strip().lower() not in (
+    "0",
+    "false",
+    "no",
+    "off",
+)
+# Tier per task: fast (ANTHROPIC_FAST_MODEL), strong (ANTHROPIC_MODEL) or, for
+# sections, auto (fast for short or boilerplate sections, strong otherwise).
+# Sections stay on the strong model unless `section=auto` is set.
+MODEL_ROUTES = os.getenv(
+    "MLEND_MODEL_ROUTES",
+    "chat=fast,chat_summary=fast,answer_extraction=fast,section=strong",
+)
+# `auto` section routing: precedent bodies up to this many characters whose
+# heading names a boilerplate clause go to the fast model...
+SIMPLE_SECTION_MAX_CHARS = int(os.getenv("MLEND_SIMPLE_SECTION_MAX_CHARS", "2000"))
+SIMPLE_SECTION_HEADINGS = os.getenv(
+    "MLEND_SIMPLE_SECTION_HEADINGS",
+    "notices,counterparts,severability,further assurances,execution,executed,"
+    "signing,signed,witness",
+)
+# ...as do bodies up to this many characters with no placeholders to fill.
+SHORT_SECTION_MAX_CHARS = int(os.getenv("MLEND_SHORT_SECTION_MAX_CHARS", "300"))
+
+# Cost ledger: per-call token usage and cost for chat and generation,
+# aggregated per draft, contract type, day, model and task. memory
+# (per-process, last MAX_ENTRIES calls), sqlite (on-disk, shared by workers on
+# a host, kept for RETENTION_DAYS) or off.
+COST_LEDGER_BACKEND = os.getenv("MLEND_COST_LEDGER", "memory")
+COST_LEDGER_SQLITE_PATH = os.getenv("MLEND_COST_LEDGER_SQLITE_PATH") or None
+COST_LEDGER_MAX_ENTRIES = max(
+    1, int(os.getenv("MLEND_COST_LEDGER_MAX_ENTRIES", "200000"))
+)
+COST_LEDGER_RETENTION_DAYS = max(
+    1, int(os.getenv("MLEND_COST_LEDGER_RETENTION_DAYS", "90"))
+)
+
+# Anthropic call resilience (see resilience.py). The SDK's own retries are
+# turned off so every retry goes through one backoff policy: exponential from
+# LLM_RETRY_BASE_SECONDS, capped at LLM_RETRY_MAX_SECONDS, with full jitter.
+LLM_TIMEOUT_SECONDS = float(os.getenv("MLEND_LLM_TIMEOUT_SECONDS", "120"))
+LLM_MAX_RETRIES = max(0, int(os.getenv("MLEND_LLM_MAX_RETRIES", "3")))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("MLEND_LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("MLEND_LLM_RETRY_MAX_SECONDS", "8"))
+
+# Hedged section drafts: once a call has run longer than the
+# LLM_HEDGE_PERCENTILE latency of recent single attempts (and at least
+# LLM_HEDGE_MIN_SECONDS), a duplicate is sent and the first to finish wins.
+# Needs LLM_HEDGE_MIN_SAMPLES latencies before it kicks in. Only the async,
+# non-streaming path (/contract/generate, /contract/regenerate) hedges: a
+# blocking sync call can't be abandoned, and a stream has already sent the
+# slow call's deltas to the client.
+LLM_HEDGE_ENABLED = os.getenv("MLEND_LLM_HEDGE", "0").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+LLM_HEDGE_PERCENTILE = float(os.getenv("MLEND_LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_MIN_SAMPLES = max(1, int(os.getenv("MLEND_LLM_HEDGE_MIN_SAMPLES", "20")))
+LLM_HEDGE_MIN_SECONDS = float(os.getenv("MLEND_LLM_HEDGE_MIN_SECONDS", "2"))
@@ -0,0 +1,367 @@
+# cost_accounting.py
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import asdict, dataclass
+from threading import Lock
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from constants import (
+    COST_LEDGER_BACKEND,
+    COST_LEDGER_MAX_ENTRIES,
+    COST_LEDGER_RETENTION_DAYS,
+    COST_LEDGER_SQLITE_PATH,
+)
+from logger import get_logger
+from model_router import usage_cost_usd
+from sqlite_store import SqliteStore
+
+logger = get_logger(__name__)
+
+GROUP_BY_FIELDS = ("draft_id", "contract_type", "day", "model", "task")
+_TOTAL_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+    "cost_usd",
+)
+
+
+@dataclass(frozen=True)
+class CostEntry:
+    """
+    One priced LLM call.
+    """
+
+    at: float
+    day: str
+    draft_id: str
+    contract_type: str
+    task: str
+    model: str
+    input_tokens: int
+    output_tokens: int
+    cache_creation_input_tokens: int
+    cache_read_input_tokens: int
+    cost_usd: float
+
+
+def _day(at: float) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(at))
+
+
+def _empty_totals() -> Dict[str, Any]:
+    totals: Dict[str, Any] = {"calls": 0}
+    totals.update({field: 0 for field in _TOTAL_FIELDS})
+    totals["cost_usd"] = 0.0
+    return totals
+
+
+def _rounded(totals: Dict[str, Any]) -> Dict[str, Any]:
+    return {**totals, "cost_usd": round(totals["cost_usd"], 6)}
+
+
+class CostLedgerBackend(ABC):
+    """
+    Storage for priced calls.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def record(self, entry: CostEntry) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def summarize(
+        self,
+        filters: Dict[str, str],
+        group_by: Optional[str],
+    ) -> Dict[str, Any]:
+        """
+        `{"totals": {...}, "groups": [{"key": ..., **totals}, ...]}` over the
+        entries matching every filter.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+def _summarize_entries(
+    entries: Iterable[CostEntry],
+    filters: Dict[str, str],
+    group_by: Optional[str],
+) -> Dict[str, Any]:
+    totals = _empty_totals()
+    groups: Dict[str, Dict[str, Any]] = {}
+    for entry in entries:
+        if any(getattr(entry, field) != value for field, value in filters.items()):
+            continue
+        buckets = [totals]
+        if group_by:
+            buckets.append(
+                groups.setdefault(getattr(entry, group_by), _empty_totals())
+            )
+        for bucket in buckets:
+            bucket["calls"] += 1
+            for field in _TOTAL_FIELDS:
+                bucket[field] += getattr(entry, field)
+    return {
+        "totals": _rounded(totals),
+        "groups": [
+            {"key": key, **_rounded(value)} for key, value in sorted(groups.items())
+        ],
+    }
+
+
+class MemoryCostLedger(CostLedgerBackend):
+    """
+    The last `max_entries` calls of this process.
+    """
+
+    name = "memory"
+
+    def __init__(self, *, max_entries: int):
+        self._lock = Lock()
+        self._entries: Deque[CostEntry] = deque(maxlen=max(1, max_entries))
+
+    def record(self, entry: CostEntry) -> None:
+        with self._lock:
+            self._entries.append(entry)
+
+    def summarize(
+        self,
+        filters: Dict[str, str],
+        group_by: Optional[str],
+    ) -> Dict[str, Any]:
+        with self._lock:
+            entries = list(self._entries)
+        return _summarize_entries(entries, filters, group_by)
+
+
+def _default_sqlite_path() -> str:
+    return os.path.join("cache", "lexy-mlend-costs.sqlite3")
+
+
+class SqliteCostLedger(CostLedgerBackend):
+    """
+    On-disk ledger shared by every worker on the host. Rows older than
+    `retention_days` are pruned as new ones are written.
+    """
+
+    name = "sqlite"
+    _PRUNE_EVERY = 1000
+
+    def __init__(self, *, retention_days: int, path: Optional[str] = None):
+        self.retention_seconds = retention_days * 24 * 3600
+        self._writes = 0
+        self._store = SqliteStore(
+            path or _default_sqlite_path(),
+            """
+            CREATE TABLE IF NOT EXISTS mlend_cost_ledger (
+                at REAL NOT NULL,
+                day TEXT NOT NULL,
+                draft_id TEXT NOT NULL,
+                contract_type TEXT NOT NULL,
+                task TEXT NOT NULL,
+                model TEXT NOT NULL,
+                input_tokens INTEGER NOT NULL,
+                output_tokens INTEGER NOT NULL,
+                cache_creation_input_tokens INTEGER NOT NULL,
+                cache_read_input_tokens INTEGER NOT NULL,
+                cost_usd REAL NOT NULL
+            )
+            """,
+            *(
+                f"CREATE INDEX IF NOT EXISTS mlend_cost_ledger_{column} "
+                f"ON mlend_cost_ledger ({column})"
+                for column in ("at", "day", "draft_id")
+            ),
+        )
+        self.path = self._store.path
+
+    def record(self, entry: CostEntry) -> None:
+        row = asdict(entry)
+        columns = ", ".join(row)
+        marks = ", ".join("?" for _ in row)
+        with self._store.connection() as conn:
+            conn.execute(
+                f"INSERT INTO mlend_cost_ledger ({columns}) VALUES ({marks})",
+                tuple(row.values()),
+            )
+            self._writes += 1
+            if self._writes % self._PRUNE_EVERY == 0:
+                conn.execute(
+                    "DELETE FROM mlend_cost_ledger WHERE at < ?",
+                    (time.time() - self.retention_seconds,),
+                )
+
+    def summarize(
+        self,
+        filters: Dict[str, str],
+        group_by: Optional[str],
+    ) -> Dict[str, Any]:
+        # Field names come from GROUP_BY_FIELDS (validated by the caller);
+        # values are always bound parameters.
+        where = " AND ".join(f"{field} = ?" for field in filters) or "1 = 1"
+        params = tuple(filters.values())
+        sums = ", ".join(f"SUM({field})" for field in _TOTAL_FIELDS)
+        with self._store.connection() as conn:
+            total_row = conn.execute(
+                f"SELECT COUNT(*), {sums} FROM mlend_cost_ledger WHERE {where}",
+                params,
+            ).fetchone()
+            group_rows: List[Any] = []
+            if group_by:
+                group_rows = conn.execute(
+                    f"SELECT {group_by}, COUNT(*), {sums} FROM mlend_cost_ledger "
+                    f"WHERE {where} GROUP BY {group_by} ORDER BY {group_by}",
+                    params,
+                ).fetchall()
+
+        def _totals(values: Iterable[Any]) -> Dict[str, Any]:
+            calls, *sums_ = values
+            totals = _empty_totals()
+            totals["calls"] = calls or 0
+            for field, value in zip(_TOTAL_FIELDS, sums_):
+                totals[field] = value or totals[field]
+            return _rounded(totals)
+
+        return {
+            "totals": _totals(total_row),
+            "groups": [{"key": row[0], **_totals(row[1:])} for row in group_rows],
+        }
+
+    def close(self) -> None:
+        self._store.close()
+
+
+def create_cost_ledger(
+    kind: str,
+    *,
+    max_entries: int,
+    retention_days: int,
+    sqlite_path: Optional[str] = None,
+) -> Optional[CostLedgerBackend]:
+    """
+    Build the cost ledger named by `kind`; `off` disables recording.
+    """
+    kind = (kind or "memory").strip().lower()
+    if kind == "off":
+        return None
+    if kind == "memory":
+        return MemoryCostLedger(max_entries=max_entries)
+    if kind == "sqlite":
+        return SqliteCostLedger(retention_days=retention_days, path=sqlite_path)
+    raise ValueError(f"Unknown cost ledger '{kind}'. Use memory, sqlite or off.")
+
+
+_BACKEND: Optional[CostLedgerBackend] = MemoryCostLedger(
+    max_entries=COST_LEDGER_MAX_ENTRIES
+)
+
+
+def configure_cost_ledger(backend: Optional[CostLedgerBackend]) -> None:
+    """
+    Install (or, with `None`, disable) the cost ledger.
+    """
+    global _BACKEND
+    close_cost_ledger()
+    _BACKEND = backend
+    if backend is not None:
+        logger.info("cost_ledger: using %s backend", backend.name)
+
+
+def configure_cost_ledger_from_env() -> None:
+    configure_cost_ledger(
+        create_cost_ledger(
+            COST_LEDGER_BACKEND,
+            max_entries=COST_LEDGER_MAX_ENTRIES,
+            retention_days=COST_LEDGER_RETENTION_DAYS,
+            sqlite_path=COST_LEDGER_SQLITE_PATH,
+        )
+    )
+
+
+def close_cost_ledger() -> None:
+    global _BACKEND
+    if _BACKEND is not None:
+        _BACKEND.close()
+    _BACKEND = None
+
+
+def record_usage(
+    usage: Optional[Dict[str, Any]],
+    *,
+    draft_id: str,
+    contract_type: str,
+    task: str,
+) -> None:
+    """
+    Price one call's usage (see `model_router.usage_cost_usd`) and add it to
+    the ledger. Never raises: accounting must not fail a request.
+    """
+    backend = _BACKEND
+    if backend is None or not usage:
+        return
+    try:
+        at = time.time()
+        backend.record(
+            CostEntry(
+                at=at,
+                day=_day(at),
+                draft_id=draft_id or "",
+                contract_type=contract_type or "",
+                task=task,
+                model=usage.get("model") or "",
+                input_tokens=usage.get("input_tokens") or 0,
+                output_tokens=usage.get("output_tokens") or 0,
+                cache_creation_input_tokens=usage.get("cache_creation_input_tokens")
+                or 0,
+                cache_read_input_tokens=usage.get("cache_read_input_tokens") or 0,
+                cost_usd=usage_cost_usd(usage),
+            )
+        )
+    except Exception:
+        logger.exception("cost_ledger: %s write failed", backend.name)
+
+
+def get_cost_summary(
+    *,
+    draft_id: Optional[str] = None,
+    contract_type: Optional[str] = None,
+    day: Optional[str] = None,
+    model: Optional[str] = None,
+    task: Optional[str] = None,
+    group_by: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Totals for the calls matching every given filter, optionally broken down
+    by one of GROUP_BY_FIELDS. Raises ValueError for an unknown `group_by`.
+    """
+    if group_by and group_by not in GROUP_BY_FIELDS:
+        raise ValueError(
+            f"Unknown group_by '{group_by}'. Use one of: {', '.join(GROUP_BY_FIELDS)}."
+        )
+    filters = {
+        field: value
+        for field, value in (
+            ("draft_id", draft_id),
+            ("contract_type", contract_type),
+            ("day", day),
+            ("model", model),
+            ("task", task),
+        )
+        if value is not None
+    }
+    backend = _BACKEND
+    if backend is None:
+        summary = {"totals": _rounded(_empty_totals()), "groups": []}
+        name = "off"
+    else:
+        summary = backend.summarize(filters, group_by)
+        name = backend.name
+    return {"backend": name, "filters": filters, "group_by": group_by, **summary}
@@ -0,0 +1,384 @@
+# ingest_precedents.py
+"""
+Bulk precedent ingestion.
+
+Walks a directory of .docx precedents, parses the new or changed ones in a
+process pool (`precedent_loader.load_precedent_outline`) and upserts them
+into `precedent_documents` in batches, one transaction per batch. Each
+batch NOTIFYs PRECEDENT_NOTIFY_CHANNEL so running services drop cached
+outlines of the contract types it touched.
+
+    python ingest_precedents.py [DIR] [--workers N] [--batch-size N]
+                                [--force] [--dry-run]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from constants import PRECEDENT_NOTIFY_CHANNEL
+from logger import get_logger
+from outline_cache import file_digest
+from precedent_loader import PARSER_VERSION, load_precedent_outline
+
+logger = get_logger(__name__)
+
+DEFAULT_CORPUS_DIR = (
+    Path(__file__).resolve().parent.parent / "Data" / "Employement" / "Contracts"
+)
+DEFAULT_CATEGORY = "employment"
+DEFAULT_JURISDICTION = "AU"
+
+_TOKEN_SPLIT_RE = re.compile(r"[^a-z0-9]+")
+
+# Content hash of every ingested file, so unchanged files are skipped
+# without being parsed. Rows whose document has since been deleted are
+# ignored.
+_STATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS mlend_precedent_ingest (
+        source_path text PRIMARY KEY,
+        content_sha256 text NOT NULL,
+        parser_version text NOT NULL,
+        precedent_id uuid NOT NULL,
+        ingested_at timestamptz NOT NULL DEFAULT now()
+    )
+"""
+
+_INGESTED_SQL = """
+    SELECT s.source_path, s.content_sha256, s.parser_version
+    FROM mlend_precedent_ingest s
+    JOIN precedent_documents p ON p.id = s.precedent_id
+    WHERE s.source_path = ANY(%s)
+"""
+
+_CONTRACT_TYPES_SQL = """
+    SELECT id, name, slug, category::text AS category, jurisdiction_default
+    FROM contract_types
+"""
+
+_INSERT_DOCUMENT_SQL = """
+    INSERT INTO precedent_documents (
+        id, source_path, title, category, jurisdiction, front_matter,
+        sections, placeholders, keywords, "contractTypeId"
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+_UPDATE_DOCUMENT_SQL = """
+    UPDATE precedent_documents SET
+        title = %s,
+        category = %s,
+        jurisdiction = %s,
+        front_matter = %s,
+        sections = %s,
+        placeholders = %s,
+        keywords = %s,
+        "contractTypeId" = %s
+    WHERE id = %s
+"""
+
+_UPSERT_STATE_SQL = """
+    INSERT INTO mlend_precedent_ingest
+        (source_path, content_sha256, parser_version, precedent_id)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (source_path) DO UPDATE SET
+        content_sha256 = EXCLUDED.content_sha256,
+        parser_version = EXCLUDED.parser_version,
+        precedent_id = EXCLUDED.precedent_id,
+        ingested_at = now()
+"""
+
+
+@dataclass(frozen=True)
+class ParsedPrecedent:
+    source_path: str
+    digest: str
+    outline: Dict[str, Any]
+
+
+def _tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_SPLIT_RE.split(text.lower()) if len(token) > 2]
+
+
+def _resolve_contract_type(
+    contract_types: List[Dict[str, Any]],
+    doc_tokens: Set[str],
+) -> Optional[Dict[str, Any]]:
+    """
+    The contract type sharing the most name/slug words with the document,
+    if it shares at least two (the backend's ingest script's rule).
+    """
+    best: Optional[Tuple[int, Dict[str, Any]]] = None
+    for contract_type in contract_types:
+        tokens = set(
+            _tokenize(contract_type.get("name") or "")
+            + _tokenize(contract_type.get("slug") or "")
+        )
+        if not tokens:
+            continue
+        score = len(doc_tokens & tokens)
+        if best is None or score > best[0]:
+            best = (score, contract_type)
+    if best is None or best[0] < 2:
+        return None
+    return best[1]
+
+
+def find_precedent_files(directory: Path) -> List[Path]:
+    # "~$" files are Word lock files, not documents.
+    return sorted(
+        path.resolve()
+        for path in directory.rglob("*.docx")
+        if path.is_file() and not path.name.startswith("~$")
+    )
+
+
+def _parse(source_path: str, digest: str) -> ParsedPrecedent:
+    # Runs in a worker process.
+    return ParsedPrecedent(source_path, digest, load_precedent_outline(source_path))
+
+
+def _document_fields(
+    parsed: ParsedPrecedent,
+    contract_types: List[Dict[str, Any]],
+) -> Tuple[Any, ...]:
+    """
+    `precedent_documents` values in `_UPDATE_DOCUMENT_SQL` order (without
+    the id).
+    """
+    from psycopg.types.json import Jsonb
+
+    outline = parsed.outline
+    stem = Path(parsed.source_path).stem
+    doc_tokens = set(_tokenize(stem)) | set(_tokenize(outline.get("title") or ""))
+    contract_type = _resolve_contract_type(contract_types, doc_tokens) or {}
+    return (
+        outline.get("title") or stem,
+        contract_type.get("category") or DEFAULT_CATEGORY,
+        contract_type.get("jurisdiction_default") or DEFAULT_JURISDICTION,
+        Jsonb(outline.get("front_matter") or []),
+        Jsonb(outline.get("sections") or []),
+        Jsonb(outline.get("placeholders") or []),
+        sorted(doc_tokens),
+        contract_type.get("id"),
+    )
+
+
+def _write_batch(
+    batch: List[ParsedPrecedent],
+    contract_types: List[Dict[str, Any]],
+) -> None:
+    """
+    Upsert one batch in a single transaction, and NOTIFY once per contract
+    type it touched (delivered on commit). A document moved to another
+    contract type touches both.
+    """
+    from precedent_db import db_connection
+
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                'SELECT id, source_path, "contractTypeId" FROM precedent_documents '
+                "WHERE source_path = ANY(%s)",
+                ([parsed.source_path for parsed in batch],),
+            )
+            existing: Dict[str, List[Any]] = {}
+            previous_types: Dict[str, Set[str]] = {}
+            for row in cur.fetchall():
+                existing.setdefault(row["source_path"], []).append(row["id"])
+                if row.get("contractTypeId"):
+                    previous_types.setdefault(row["source_path"], set()).add(
+                        str(row["contractTypeId"])
+                    )
+
+            updates: List[Tuple[Any, ...]] = []
+            inserts: List[Tuple[Any, ...]] = []
+            states: List[Tuple[Any, ...]] = []
+            touched: Set[str] = set()
+            for parsed in batch:
+                fields = _document_fields(parsed, contract_types)
+                ids = existing.get(parsed.source_path)
+                if ids:
+                    updates.extend((*fields, doc_id) for doc_id in ids)
+                    # Their previous types may no longer own these rows.
+                    touched.update(previous_types.get(parsed.source_path, ()))
+                    doc_id = ids[0]
+                else:
+                    doc_id = uuid.uuid4()
+                    inserts.append((doc_id, parsed.source_path, *fields))
+                states.append(
+                    (parsed.source_path, parsed.digest, PARSER_VERSION, doc_id)
+                )
+                if fields[-1]:
+                    touched.add(str(fields[-1]))
+
+            if updates:
+                cur.executemany(_UPDATE_DOCUMENT_SQL, updates)
+            if inserts:
+                cur.executemany(_INSERT_DOCUMENT_SQL, inserts)
+            cur.executemany(_UPSERT_STATE_SQL, states)
+            if PRECEDENT_NOTIFY_CHANNEL and touched:
+                cur.executemany(
+                    "SELECT pg_notify(%s, %s)",
+                    [
+                        (
+                            PRECEDENT_NOTIFY_CHANNEL,
+                            json.dumps({"contract_type_id": contract_type_id}),
+                        )
+                        for contract_type_id in sorted(touched)
+                    ],
+                )
+
+
+def _changed_files(
+    files: List[Path],
+    force: bool,
+    dry_run: bool,
+) -> Tuple[List[Tuple[str, str]], int]:
+    """
+    `(source_path, digest)` for the files to parse, and how many were
+    skipped as already ingested with the same content and parser.
+    """
+    digests = [(str(path), file_digest(path)) for path in files]
+    if dry_run:
+        return digests, 0
+
+    from precedent_db import db_connection
+
+    with db_connection() as conn:
+        # Created even when forced: `_write_batch` always upserts state.
+        conn.execute(_STATE_TABLE_SQL)
+        if force:
+            return digests, 0
+        rows = conn.execute(
+            _INGESTED_SQL, ([source_path for source_path, _ in digests],)
+        ).fetchall()
+    ingested = {
+        row["source_path"]: (row["content_sha256"], row["parser_version"])
+        for row in rows
+    }
+    changed = [
+        (source_path, digest)
+        for source_path, digest in digests
+        if ingested.get(source_path) != (digest, PARSER_VERSION)
+    ]
+    return changed, len(digests) - len(changed)
+
+
+def _load_contract_types(dry_run: bool) -> List[Dict[str, Any]]:
+    if dry_run:
+        return []
+    from precedent_db import db_connection
+
+    with db_connection() as conn:
+        return [dict(row) for row in conn.execute(_CONTRACT_TYPES_SQL).fetchall()]
+
+
+def ingest_precedents(
+    directory: Path,
+    *,
+    workers: int,
+    batch_size: int,
+    force: bool = False,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Ingest every new or changed .docx under `directory`. With `dry_run` the
+    files are parsed but nothing is read from or written to the database.
+    Returns counts and throughput.
+    """
+    started = time.perf_counter()
+    files = find_precedent_files(directory)
+    pending, skipped = _changed_files(files, force, dry_run)
+    contract_types = _load_contract_types(dry_run) if pending else []
+
+    written = 0
+    failed: List[str] = []
+    batch: List[ParsedPrecedent] = []
+    parse_started = time.perf_counter()
+    # Workers are spawned rather than forked: the parent may already hold
+    # pooled database connections and their background threads.
+    with ProcessPoolExecutor(
+        max_workers=max(1, min(workers, len(pending))),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        futures = {
+            executor.submit(_parse, source_path, digest): source_path
+            for source_path, digest in pending
+        }
+        for future in as_completed(futures):
+            try:
+                batch.append(future.result())
+            except Exception:
+                failed.append(futures[future])
+                logger.exception(
+                    "ingest_precedents: could not parse %s", futures[future]
+                )
+                continue
+            if len(batch) >= batch_size:
+                if not dry_run:
+                    _write_batch(batch, contract_types)
+                written += len(batch)
+                batch = []
+        if batch:
+            if not dry_run:
+                _write_batch(batch, contract_types)
+            written += len(batch)
+
+    ingest_seconds = time.perf_counter() - parse_started
+    return {
+        "files": len(files),
+        "skipped_unchanged": skipped,
+        "ingested": written,
+        "failed": failed,
+        "dry_run": dry_run,
+        "seconds": round(time.perf_counter() - started, 3),
+        "docs_per_second": round(written / ingest_seconds, 1)
+        if written and ingest_seconds
+        else 0.0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk-ingest .docx precedents.")
+    parser.add_argument("directory", nargs="?", type=Path, default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument(
+        "--force", action="store_true", help="re-ingest files even if unchanged"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="parse only; no database access"
+    )
+    args = parser.parse_args()
+
+    if not args.directory.is_dir():
+        print(f"Precedent directory not found: {args.directory}", file=sys.stderr)
+        return 1
+    summary = ingest_precedents(
+        args.directory,
+        workers=args.workers,
+        batch_size=max(1, args.batch_size),
+        force=args.force,
+        dry_run=args.dry_run,
+    )
+    print(
+        f"{summary['ingested']} ingested, {summary['skipped_unchanged']} unchanged, "
+        f"{len(summary['failed'])} failed of {summary['files']} files "
+        f"in {summary['seconds']:.2f}s ({summary['docs_per_second']} docs/sec)"
+    )
+    for source_path in summary["failed"]:
+        print(f"failed: {source_path}", file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,72 @@
 # main.py
 import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from api import router as api_router
-from precedent_repo import configure_precedent_lookup
-from precedent_db import get_precedent_outline_from_db
+from constants import PRECEDENT_NOTIFY_CHANNEL
+from precedent_repo import configure_precedent_lookup, handle_precedent_notification
+from precedent_index import close_precedent_index, configure_precedent_index_from_env
+from precedent_db import (
+    close_async_pool,
+    close_pool,
+    get_precedent_outline_from_db,
+    get_precedent_outline_from_db_async,
+    get_precedent_version_from_db,
+    get_precedent_version_from_db_async,
+    has_database_url,
+    start_precedent_listener,
+)
+from section_cache import close_section_cache, configure_section_cache_from_env
+from cost_accounting import close_cost_ledger, configure_cost_ledger_from_env
+from progress_store import (
+    close_progress_backend,
+    configure_progress_backend_from_env,
+    start_sweeper,
+    stop_sweeper,
+)
 
 logging.basicConfig(level=logging.INFO)
 
-app = FastAPI(title="Lexy mlend", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    configure_progress_backend_from_env()
+    configure_section_cache_from_env()
+    configure_cost_ledger_from_env()
+    configure_precedent_index_from_env()
+    start_sweeper()
+    stop_listener = None
+    if PRECEDENT_NOTIFY_CHANNEL and has_database_url():
+        stop_listener = start_precedent_listener(
+            PRECEDENT_NOTIFY_CHANNEL,
+            handle_precedent_notification,
+        )
+    try:
+        yield
+    finally:
+        if stop_listener is not None:
+            stop_listener()
+        stop_sweeper()
+        close_progress_backend()
+        close_section_cache()
+        close_cost_ledger()
+        close_precedent_index()
+        await close_async_pool()
+        close_pool()
+
+
+app = FastAPI(title="Lexy mlend", version="0.1.0", lifespan=lifespan)
 
 # DB-backed precedent lookup
-configure_precedent_lookup(get_precedent_outline_from_db)
+configure_precedent_lookup(
+    get_precedent_outline_from_db,
+    get_precedent_outline_from_db_async,
+    version_fn=get_precedent_version_from_db,
+    async_version_fn=get_precedent_version_from_db_async,
+)
 
 # CORS
 app.add_middleware(
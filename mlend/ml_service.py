@@ -1,16 +1,42 @@
 # ml_service.py
+import asyncio
 import logging
-from typing import List, Dict, Any, Type, TypeVar, Optional
+from typing import List, Dict, Any, Type, TypeVar, Optional, Callable, Union
 
 import anthropic
 import instructor
 from pydantic import BaseModel
 
-from constants import ANTHROPIC_API_KEY, DEFAULT_ANTHROPIC_MODEL
+from constants import ANTHROPIC_API_KEY, DEFAULT_ANTHROPIC_MODEL, LLM_TIMEOUT_SECONDS
+from resilience import (
+    hedged,
+    retry_call,
+    retry_call_async,
+    retry_delay,
+    timed_attempts,
+)
 
 logger = logging.getLogger(__name__)
 T = TypeVar("T", bound=BaseModel)
 
+# `system` may be a plain string or a list of Anthropic text blocks, which is
+# how `cache_control` breakpoints are attached to it.
+SystemPrompt = Optional[Union[str, List[Dict[str, Any]]]]
+
+
+def text_block(text: str, *, cache: bool = False) -> Dict[str, Any]:
+    """
+    Build an Anthropic text content block.
+
+    With `cache=True` the block ends a prompt-cache prefix: everything up to
+    and including it (tools, system, earlier blocks) is cached for ~5 minutes
+    and re-read at a fraction of the input price by identical later calls.
+    """
+    block: Dict[str, Any] = {"type": "text", "text": text}
+    if cache:
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
 
 class MLService:
     """
@@ -18,39 +44,83 @@ class MLService:
 
     - Plain text outputs: use `call_llm_text` (raw Anthropic client).
     - Structured outputs: use `call_llm_structured` (Instructor-wrapped client).
+
+    Every call has an `*_async` twin backed by `anthropic.AsyncAnthropic`, so
+    FastAPI routes can await LLM calls on the event loop instead of parking a
+    threadpool worker on each request.
     """
 
     def __init__(self, model_name: str = DEFAULT_ANTHROPIC_MODEL):
         if not ANTHROPIC_API_KEY:
             raise ValueError("ANTHROPIC_API_KEY is not set.")
 
-        # Raw Anthropic client for normal text responses
-        self.raw_client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+        # Raw Anthropic clients for normal text responses. SDK retries are
+        # off: transient failures are retried with jittered backoff by
+        # `resilience.retry_call*` around every call below.
+        self.raw_client = anthropic.Anthropic(
+            api_key=ANTHROPIC_API_KEY,
+            max_retries=0,
+            timeout=LLM_TIMEOUT_SECONDS,
+        )
+        self.async_raw_client = anthropic.AsyncAnthropic(
+            api_key=ANTHROPIC_API_KEY,
+            max_retries=0,
+            timeout=LLM_TIMEOUT_SECONDS,
+        )
 
-        # Instructor-wrapped client ONLY for structured responses
+        # Instructor-wrapped clients ONLY for structured responses
         self.instructor_client = instructor.from_anthropic(self.raw_client)
+        self.async_instructor_client = instructor.from_anthropic(
+            self.async_raw_client
+        )
 
         self.model = model_name
 
-    def _build_messages(self, messages: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    def _build_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Pass-through helper.
 
         We expect callers to pass Anthropic-style messages:
           [{"role": "user"|"assistant", "content": "..."}]
+        where `content` may also be a list of blocks (see `text_block`).
 
         NOTE: system messages must NOT be passed here; they belong
         in the top-level `system` parameter of the API call.
         """
         return messages
 
+    @staticmethod
+    def _extract_text(resp: Any) -> str:
+        # Anthropic: resp.content is a list of content blocks; we keep text blocks
+        text_chunks = [
+            b.text for b in resp.content if getattr(b, "type", None) == "text"
+        ]
+        return "".join(text_chunks).strip()
+
+    @staticmethod
+    def _extract_usage(resp: Any, model: str) -> Dict[str, Any]:
+        usage = getattr(resp, "usage", None)
+        return {
+            "model": model,
+            "input_tokens": getattr(usage, "input_tokens", None),
+            "output_tokens": getattr(usage, "output_tokens", None),
+            # Prompt caching: tokens written to / read from the cache are
+            # billed separately and are not included in `input_tokens`.
+            "cache_creation_input_tokens": getattr(
+                usage, "cache_creation_input_tokens", None
+            ),
+            "cache_read_input_tokens": getattr(
+                usage, "cache_read_input_tokens", None
+            ),
+        }
+
     def call_llm_text(
         self,
-        messages: List[Dict[str, str]],
+        messages: List[Dict[str, Any]],
         model: Optional[str] = None,
         max_tokens: int = 2000,
         temperature: float = 0.4,
-        system: Optional[str] = None,
+        system: SystemPrompt = None,
     ) -> str:
         """
         Plain text generation using the raw Anthropic client.
@@ -66,7 +136,9 @@ class MLService:
             },
         )
 
-        resp = self.raw_client.messages.create(
+        resp = retry_call(
+            "call_llm_text",
+            self.raw_client.messages.create,
             model=model or self.model,
             max_tokens=max_tokens,
             temperature=temperature,
@@ -74,23 +146,53 @@ class MLService:
             **({"system": system} if system else {}),
         )
 
-        print("response: ",resp)
-
-        # Anthropic: resp.content is a list of content blocks; we keep text blocks
-        text_chunks = [
-            b.text for b in resp.content if getattr(b, "type", None) == "text"
-        ]
-        text = "".join(text_chunks).strip()
+        text = self._extract_text(resp)
         logger.debug("call_llm_text: got %d chars", len(text))
         return text
 
+    async def call_llm_text_async(
+        self,
+        messages: List[Dict[str, Any]],
+        model: Optional[str] = None,
+        max_tokens: int = 2000,
+        temperature: float = 0.4,
+        system: SystemPrompt = None,
+    ) -> str:
+        """
+        Async twin of `call_llm_text`.
+        """
+        m = self._build_messages(messages)
+
+        logger.debug(
+            "call_llm_text_async: %s",
+            {
+                "model": model or self.model,
+                "num_messages": len(m),
+                "has_system": bool(system),
+            },
+        )
+
+        resp = await retry_call_async(
+            "call_llm_text_async",
+            self.async_raw_client.messages.create,
+            model=model or self.model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            messages=m,
+            **({"system": system} if system else {}),
+        )
+
+        text = self._extract_text(resp)
+        logger.debug("call_llm_text_async: got %d chars", len(text))
+        return text
+
     def call_llm_text_with_usage(
         self,
-        messages: List[Dict[str, str]],
+        messages: List[Dict[str, Any]],
         model: Optional[str] = None,
         max_tokens: int = 2000,
         temperature: float = 0.4,
-        system: Optional[str] = None,
+        system: SystemPrompt = None,
     ) -> tuple[str, Dict[str, Any]]:
         m = self._build_messages(messages)
         chosen_model = model or self.model
@@ -104,7 +206,9 @@ class MLService:
             },
         )
 
-        resp = self.raw_client.messages.create(
+        resp = retry_call(
+            "call_llm_text_with_usage",
+            self.raw_client.messages.create,
             model=chosen_model,
             max_tokens=max_tokens,
             temperature=temperature,
@@ -112,30 +216,120 @@ class MLService:
             **({"system": system} if system else {}),
         )
 
-        text_chunks = [
-            b.text for b in resp.content if getattr(b, "type", None) == "text"
-        ]
-        text = "".join(text_chunks).strip()
+        return self._extract_text(resp), self._extract_usage(resp, chosen_model)
 
-        usage = getattr(resp, "usage", None)
-        input_tokens = getattr(usage, "input_tokens", None)
-        output_tokens = getattr(usage, "output_tokens", None)
+    async def call_llm_text_with_usage_async(
+        self,
+        messages: List[Dict[str, Any]],
+        model: Optional[str] = None,
+        max_tokens: int = 2000,
+        temperature: float = 0.4,
+        system: SystemPrompt = None,
+        hedge_key: Optional[str] = None,
+    ) -> tuple[str, Dict[str, Any]]:
+        """
+        Async twin of `call_llm_text_with_usage`.
 
-        return text, {
-            "model": chosen_model,
-            "input_tokens": input_tokens,
-            "output_tokens": output_tokens,
-        }
+        With `hedge_key` (and MLEND_LLM_HEDGE on), a call slower than the
+        recent p95 single-attempt latency for that key is duplicated and the
+        first reply wins; see `resilience.hedged`.
+        """
+        m = self._build_messages(messages)
+        chosen_model = model or self.model
+
+        logger.debug(
+            "call_llm_text_with_usage_async: %s",
+            {
+                "model": chosen_model,
+                "num_messages": len(m),
+                "has_system": bool(system),
+            },
+        )
+
+        resp = await hedged(
+            hedge_key,
+            lambda: retry_call_async(
+                "call_llm_text_with_usage_async",
+                timed_attempts(hedge_key, self.async_raw_client.messages.create),
+                model=chosen_model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=m,
+                **({"system": system} if system else {}),
+            ),
+        )
+
+        return self._extract_text(resp), self._extract_usage(resp, chosen_model)
+
+    async def call_llm_text_streaming_async(
+        self,
+        messages: List[Dict[str, Any]],
+        *,
+        on_delta: Callable[[str], None],
+        model: Optional[str] = None,
+        max_tokens: int = 2000,
+        temperature: float = 0.4,
+        system: SystemPrompt = None,
+    ) -> tuple[str, Dict[str, Any]]:
+        """
+        Streamed text generation via the Anthropic streaming API.
+
+        `on_delta` is called with each text delta as it arrives; the return
+        value matches `call_llm_text_with_usage` once the stream finishes.
+        Transient failures are retried only until the first delta has been
+        delivered; after that a retry would repeat text already sent.
+        """
+        m = self._build_messages(messages)
+        chosen_model = model or self.model
+
+        logger.debug(
+            "call_llm_text_streaming_async: %s",
+            {
+                "model": chosen_model,
+                "num_messages": len(m),
+                "has_system": bool(system),
+            },
+        )
+
+        attempt = 0
+        while True:
+            emitted = False
+            try:
+                async with self.async_raw_client.messages.stream(
+                    model=chosen_model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    messages=m,
+                    **({"system": system} if system else {}),
+                ) as stream:
+                    async for delta in stream.text_stream:
+                        if delta:
+                            emitted = True
+                            on_delta(delta)
+                    resp = await stream.get_final_message()
+                break
+            except Exception as exc:
+                delay = (
+                    None
+                    if emitted
+                    else retry_delay("call_llm_text_streaming_async", attempt, exc)
+                )
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        return self._extract_text(resp), self._extract_usage(resp, chosen_model)
 
     def call_llm_structured(
         self,
         *,
         response_model: Type[T],
-        messages: List[Dict[str, str]],
+        messages: List[Dict[str, Any]],
         model: Optional[str] = None,
         max_tokens: int = 4000,
         temperature: float = 0.4,
-        system: Optional[str] = None,
+        system: SystemPrompt = None,
     ) -> T:
         """
         Structured output via Instructor (Pydantic response_model).
@@ -152,7 +346,9 @@ class MLService:
             },
         )
 
-        result: T = self.instructor_client.messages.create(
+        result: T = retry_call(
+            "call_llm_structured",
+            self.instructor_client.messages.create,
             model=model or self.model,
             max_tokens=max_tokens,
             temperature=temperature,
@@ -161,3 +357,118 @@ class MLService:
             response_model=response_model,
         )
         return result
+
+    async def call_llm_structured_async(
+        self,
+        *,
+        response_model: Type[T],
+        messages: List[Dict[str, Any]],
+        model: Optional[str] = None,
+        max_tokens: int = 4000,
+        temperature: float = 0.4,
+        system: SystemPrompt = None,
+    ) -> T:
+        """
+        Async twin of `call_llm_structured`.
+        """
+        m = self._build_messages(messages)
+
+        logger.debug(
+            "call_llm_structured_async: %s",
+            {
+                "model": model or self.model,
+                "num_messages": len(m),
+                "response_model": response_model.__name__,
+                "has_system": bool(system),
+            },
+        )
+
+        result: T = await retry_call_async(
+            "call_llm_structured_async",
+            self.async_instructor_client.messages.create,
+            model=model or self.model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            messages=m,
+            **({"system": system} if system else {}),
+            response_model=response_model,
+        )
+        return result
+
+    def call_llm_structured_with_usage(
+        self,
+        *,
+        response_model: Type[T],
+        messages: List[Dict[str, Any]],
+        model: Optional[str] = None,
+        max_tokens: int = 4000,
+        temperature: float = 0.4,
+        system: SystemPrompt = None,
+    ) -> tuple[T, Dict[str, Any]]:
+        """
+        Like `call_llm_structured`, plus token usage from the raw completion.
+        """
+        m = self._build_messages(messages)
+        chosen_model = model or self.model
+
+        logger.debug(
+            "call_llm_structured_with_usage: %s",
+            {
+                "model": chosen_model,
+                "num_messages": len(m),
+                "response_model": response_model.__name__,
+                "has_system": bool(system),
+            },
+        )
+
+        create = self.instructor_client.messages.create_with_completion
+        result, completion = retry_call(
+            "call_llm_structured_with_usage",
+            create,
+            model=chosen_model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            messages=m,
+            **({"system": system} if system else {}),
+            response_model=response_model,
+        )
+        return result, self._extract_usage(completion, chosen_model)
+
+    async def call_llm_structured_with_usage_async(
+        self,
+        *,
+        response_model: Type[T],
+        messages: List[Dict[str, Any]],
+        model: Optional[str] = None,
+        max_tokens: int = 4000,
+        temperature: float = 0.4,
+        system: SystemPrompt = None,
+    ) -> tuple[T, Dict[str, Any]]:
+        """
+        Async twin of `call_llm_structured_with_usage`.
+        """
+        m = self._build_messages(messages)
+        chosen_model = model or self.model
+
+        logger.debug(
+            "call_llm_structured_with_usage_async: %s",
+            {
+                "model": chosen_model,
+                "num_messages": len(m),
+                "response_model": response_model.__name__,
+                "has_system": bool(system),
+            },
+        )
+
+        create = self.async_instructor_client.messages.create_with_completion
+        result, completion = await retry_call_async(
+            "call_llm_structured_with_usage_async",
+            create,
+            model=chosen_model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            messages=m,
+            **({"system": system} if system else {}),
+            response_model=response_model,
+        )
+        return result, self._extract_usage(completion, chosen_model)
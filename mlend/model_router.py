@@ -0,0 +1,265 @@
+# model_router.py
+import re
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+from constants import (
+    DEFAULT_ANTHROPIC_MODEL,
+    FAST_ANTHROPIC_MODEL,
+    MODEL_PRICING,
+    MODEL_PRICING_OVERRIDES,
+    MODEL_ROUTES,
+    MODEL_ROUTING_ENABLED,
+    PROMPT_CACHE_READ_COST_MULTIPLIER,
+    PROMPT_CACHE_WRITE_COST_MULTIPLIER,
+    SHORT_SECTION_MAX_CHARS,
+    SIMPLE_SECTION_HEADINGS,
+    SIMPLE_SECTION_MAX_CHARS,
+)
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+TASK_CHAT = "chat"
+TASK_CHAT_SUMMARY = "chat_summary"
+TASK_ANSWER_EXTRACTION = "answer_extraction"
+TASK_SECTION = "section"
+
+TIER_FAST = "fast"
+TIER_STRONG = "strong"
+_TIER_AUTO = "auto"
+
+_HEADING_NOISE_RE = re.compile(r"[^a-z ]+")
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    task: str
+    model: str
+    tier: str
+    reason: str
+
+
+def _parse_routes(spec: str) -> Dict[str, str]:
+    routes: Dict[str, str] = {}
+    for item in spec.split(","):
+        task, _, tier = item.partition("=")
+        task, tier = task.strip().lower(), tier.strip().lower()
+        if not task:
+            continue
+        if tier not in (TIER_FAST, TIER_STRONG, _TIER_AUTO):
+            logger.warning("_parse_routes: ignoring %r (unknown tier)", item)
+            continue
+        routes[task] = tier
+    return routes
+
+
+def _parse_pricing(spec: str) -> Dict[str, Tuple[float, float]]:
+    pricing: Dict[str, Tuple[float, float]] = {}
+    for item in spec.split(","):
+        model, _, prices = item.partition("=")
+        input_price, _, output_price = prices.partition(":")
+        try:
+            pricing[model.strip()] = (float(input_price), float(output_price))
+        except ValueError:
+            if item.strip():
+                logger.warning("_parse_pricing: ignoring %r", item)
+    return pricing
+
+
+def _normalize_heading(heading: str) -> str:
+    return " ".join(_HEADING_NOISE_RE.sub(" ", heading.lower()).split())
+
+
+def _is_boilerplate(heading: str) -> bool:
+    # Whole-word match: "general" matches "General" and "General Terms",
+    # not "Generally".
+    padded = f" {_normalize_heading(heading)} "
+    return any(f" {simple} " in padded for simple in _SIMPLE_HEADINGS)
+
+
+_ROUTES = _parse_routes(MODEL_ROUTES)
+_PRICING: Dict[str, Tuple[float, float]] = {
+    **MODEL_PRICING,
+    **_parse_pricing(MODEL_PRICING_OVERRIDES),
+}
+_SIMPLE_HEADINGS = tuple(
+    heading
+    for heading in (_normalize_heading(h) for h in SIMPLE_SECTION_HEADINGS.split(","))
+    if heading
+)
+
+_LOCK = Lock()
+# (task, model) -> counters
+_STATS: Dict[Tuple[str, str], Dict[str, float]] = {}
+_UNPRICED: set = set()
+
+
+def _model_for(tier: str) -> str:
+    return FAST_ANTHROPIC_MODEL if tier == TIER_FAST else DEFAULT_ANTHROPIC_MODEL
+
+
+def _route(task: str, tier: str, reason: str) -> ModelRoute:
+    return ModelRoute(task=task, model=_model_for(tier), tier=tier, reason=reason)
+
+
+def route_task(task: str) -> ModelRoute:
+    """
+    Model for a call whose tier depends only on its task (chat, summaries,
+    extraction). `auto` means strong outside section drafting.
+    """
+    if not MODEL_ROUTING_ENABLED:
+        return _route(task, TIER_STRONG, "routing disabled")
+    tier = _ROUTES.get(task, TIER_STRONG)
+    if tier == _TIER_AUTO:
+        tier = TIER_STRONG
+    route = _route(task, tier, f"{task} route")
+    logger.info(
+        "route_task: task=%s tier=%s model=%s reason=%s",
+        task,
+        route.tier,
+        route.model,
+        route.reason,
+    )
+    return route
+
+
+def route_section(
+    heading: str,
+    body: str,
+    *,
+    dependency_count: int,
+    placeholder_count: int,
+) -> ModelRoute:
+    """
+    Model for drafting one section. Under `auto`, boilerplate clauses
+    (heading words include one of MLEND_SIMPLE_SECTION_HEADINGS, body within
+    SIMPLE_SECTION_MAX_CHARS) and short bodies with no placeholders go to
+    the fast model; everything else to the strong one.
+    """
+    if not MODEL_ROUTING_ENABLED:
+        return _route(TASK_SECTION, TIER_STRONG, "routing disabled")
+    tier = _ROUTES.get(TASK_SECTION, TIER_STRONG)
+    size = len(body.strip())
+    if tier != _TIER_AUTO:
+        route = _route(TASK_SECTION, tier, "section route")
+    elif not size:
+        route = _route(TASK_SECTION, TIER_STRONG, "no precedent body")
+    elif size <= SIMPLE_SECTION_MAX_CHARS and _is_boilerplate(heading):
+        route = _route(TASK_SECTION, TIER_FAST, "boilerplate heading")
+    elif size <= SHORT_SECTION_MAX_CHARS and not placeholder_count:
+        route = _route(TASK_SECTION, TIER_FAST, "short, no placeholders")
+    else:
+        route = _route(
+            TASK_SECTION,
+            TIER_STRONG,
+            f"{size} chars, {placeholder_count} placeholders",
+        )
+    logger.info(
+        "route_section: heading=%r tier=%s model=%s reason=%s "
+        "answers=%d",
+        heading,
+        route.tier,
+        route.model,
+        route.reason,
+        dependency_count,
+    )
+    return route
+
+
+def model_price(model: Optional[str]) -> Tuple[float, float]:
+    """
+    USD per million (input, output) tokens; the longest matching prefix
+    wins. Unknown models are priced as the default model.
+    """
+    model = model or DEFAULT_ANTHROPIC_MODEL
+    if model in _PRICING:
+        return _PRICING[model]
+    matches = [name for name in _PRICING if model.startswith(name)]
+    if matches:
+        return _PRICING[max(matches, key=len)]
+    with _LOCK:
+        first = model not in _UNPRICED
+        _UNPRICED.add(model)
+    if first:
+        logger.warning(
+            "model_price: no price for %s; using %s", model, DEFAULT_ANTHROPIC_MODEL
+        )
+    if model == DEFAULT_ANTHROPIC_MODEL:
+        return (0.0, 0.0)
+    return model_price(DEFAULT_ANTHROPIC_MODEL)
+
+
+def estimate_cost_usd(
+    model: Optional[str],
+    *,
+    input_tokens: int = 0,
+    output_tokens: int = 0,
+    cache_creation_input_tokens: int = 0,
+    cache_read_input_tokens: int = 0,
+) -> float:
+    input_price, output_price = model_price(model)
+    billed_input_tokens = (
+        input_tokens
+        + cache_creation_input_tokens * PROMPT_CACHE_WRITE_COST_MULTIPLIER
+        + cache_read_input_tokens * PROMPT_CACHE_READ_COST_MULTIPLIER
+    )
+    return (
+        billed_input_tokens * input_price + output_tokens * output_price
+    ) / 1_000_000
+
+
+def usage_cost_usd(usage: Dict[str, Any]) -> float:
+    """
+    Cost of one call from the usage dict returned by `MLService`.
+    """
+    return estimate_cost_usd(
+        usage.get("model"),
+        input_tokens=usage.get("input_tokens") or 0,
+        output_tokens=usage.get("output_tokens") or 0,
+        cache_creation_input_tokens=usage.get("cache_creation_input_tokens") or 0,
+        cache_read_input_tokens=usage.get("cache_read_input_tokens") or 0,
+    )
+
+
+def record_call(
+    route: ModelRoute,
+    seconds: float,
+    usage: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Latency (and cost, when usage is known) of one routed call.
+    """
+    cost = usage_cost_usd(usage) if usage else 0.0
+    with _LOCK:
+        stats = _STATS.setdefault(
+            (route.task, route.model),
+            {"calls": 0, "seconds": 0.0, "cost_usd": 0.0},
+        )
+        stats["calls"] += 1
+        stats["seconds"] += seconds
+        stats["cost_usd"] += cost
+
+
+def get_model_routing_stats() -> Dict[str, Any]:
+    with _LOCK:
+        rows = [
+            {
+                "task": task,
+                "model": model,
+                "calls": int(stats["calls"]),
+                "avg_seconds": round(stats["seconds"] / stats["calls"], 4),
+                "cost_usd": round(stats["cost_usd"], 6),
+            }
+            for (task, model), stats in sorted(_STATS.items())
+        ]
+    return {
+        "enabled": MODEL_ROUTING_ENABLED,
+        "routes": dict(_ROUTES),
+        "models": {
+            TIER_FAST: FAST_ANTHROPIC_MODEL,
+            TIER_STRONG: DEFAULT_ANTHROPIC_MODEL,
+        },
+        "calls": rows,
+    }
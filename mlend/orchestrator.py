@@ -1,47 +1,129 @@
 # orchestrator.py
+import asyncio
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional, Iterable, Tuple
+from typing import List, Dict, Any, Optional, Iterable, Tuple, AsyncIterator, Set
 
 from base_models import (
     ContractChatRequest,
     ContractChatResponse,
     GenerateContractRequest,
     GenerateContractResponse,
+    RegenerateContractRequest,
+    RegenerateContractResponse,
     ChatMessage,
     ContractQuestion,
 )
-from ml_service import MLService
-from constants import CLAUDE_SONNET_4_5_INPUT_COST_PER_MILLION
+from ml_service import MLService, text_block
+from constants import (
+    CHAT_ANSWER_EXTRACTION_ENABLED,
+    PRECEDENT_SNIPPET_MAX_CHARS,
+    PRECEDENT_SNIPPET_TOKEN_BUDGET,
+    SECTION_CONTEXT_TOKEN_BUDGET,
+    PROMPT_CACHE_ENABLED,
+    SECTION_DRAFT_CONCURRENCY,
+)
 from prompts import (
+    CHAT_ANSWER_EXTRACTION_SYSTEM_PROMPT,
+    CHAT_HISTORY_SUMMARY_SYSTEM_PROMPT,
     CONTRACT_CHAT_SYSTEM_PROMPT,
     CONTRACT_SECTION_SYSTEM_PROMPT,
     CONTRACT_DISCLAIMER_TEXT,
 )
 from logger import get_logger
+from answer_extraction import (
+    EXTRACTED_TURNS_FLAG,
+    ExtractionSchema,
+    count_failure as count_extraction_failure,
+    extracted_answers,
+    extracted_turns,
+    extraction_request,
+    extraction_schema,
+    pending_messages,
+)
+from cost_accounting import record_usage
+from model_router import (
+    TASK_ANSWER_EXTRACTION,
+    TASK_CHAT,
+    TASK_CHAT_SUMMARY,
+    ModelRoute,
+    record_call,
+    route_section,
+    route_task,
+    usage_cost_usd,
+)
+from chat_history import (
+    CompactedHistory,
+    begin_refresh,
+    compact_history,
+    finish_refresh,
+)
+from question_engine import (
+    PENDING_QUESTION_FLAG,
+    capture_answer,
+    count_turn,
+    fast_path_selected,
+    is_acknowledgement,
+    latest_user_text,
+    next_question as next_template_question,
+    phrase_question,
+)
 from progress_store import (
     init_progress,
     update_progress,
     complete_progress,
     fail_progress,
+    get_drafted_section,
+)
+from section_cache import get_cached_section, put_cached_section, section_cache_key
+from token_budget import estimate_tokens, take_within_budget
+from precedent_repo import (
+    PrecedentOutline,
+    PrecedentSection,
+    SectionDependencies,
+    get_precedent_outline,
+    get_precedent_outline_async,
+    index_section_dependencies,
+    significant_words,
 )
-from precedent_repo import get_precedent_outline
+from precedent_index import similar_sections
 
 logger = get_logger(__name__)
 ml_service = MLService()
 
+# Rolling chat summaries are refreshed off the request path.
+_SUMMARY_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-summary")
+_BACKGROUND_TASKS: Set[asyncio.Task] = set()
+# Answer extraction runs next to the chat reply on the sync path.
+_EXTRACTION_EXECUTOR = ThreadPoolExecutor(
+    max_workers=4, thread_name_prefix="chat-extract"
+)
 
-@dataclass(frozen=True)
-class PrecedentSection:
-    heading: str
-    body: str
 
+class SectionDraftError(RuntimeError):
+    """
+    Some sections could not be drafted. The rest (`drafted_sections`, by
+    section cache key) are kept with the draft's failed progress snapshot,
+    so retrying the request only redrafts `failed_headings`.
+    """
 
-@dataclass(frozen=True)
-class PrecedentOutline:
-    title: Optional[str]
-    front_matter: List[str]
-    sections: List[PrecedentSection]
-    placeholders: List[str]
+    def __init__(
+        self,
+        failed_headings: List[str],
+        total: int,
+        cause: BaseException,
+        drafted_sections: Optional[Dict[str, str]] = None,
+    ):
+        self.failed_headings = failed_headings
+        self.total = total
+        self.drafted_sections = drafted_sections or {}
+        super().__init__(
+            f"Could not draft {len(failed_headings)} of {total} sections "
+            f"({'; '.join(failed_headings)}): {cause}. Finished sections are "
+            "kept with this draft, so a retry only redrafts these."
+        )
 
 
 @dataclass(frozen=True)
@@ -49,9 +131,46 @@ class UsageTotals:
     input_tokens: int
     output_tokens: int
     model: Optional[str]
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    section_cache_hits: int = 0
+    cost_usd: float = 0.0
+
+
+@dataclass(frozen=True)
+class SectionContext:
+    # Context shared by every section prompt (and prompt-cached).
+    shared: str
+    dependencies: SectionDependencies
+    # Per-section context: the answers, placeholders and chat turns picked
+    # for each section within SECTION_CONTEXT_TOKEN_BUDGET.
+    slices: Dict[PrecedentSection, str]
+    # Estimated input tokens of one section prompt carrying the full,
+    # unslimmed context, and of each slimmed section prompt.
+    full_prompt_tokens: int
+    slim_prompt_tokens: Dict[PrecedentSection, int]
+    # Attribution for the cost ledger.
+    draft_id: str = ""
+    contract_type: str = ""
+
+    def slice_for(self, section: PrecedentSection) -> str:
+        return self.slices.get(section, "")
+
+    def token_estimates(self, sections: Iterable[PrecedentSection]) -> Tuple[int, int]:
+        """
+        Estimated input tokens for drafting `sections`, before and after
+        slimming.
+        """
+        before = after = 0
+        for section in sections:
+            before += self.full_prompt_tokens + _section_part_tokens(section)
+            after += self.slim_prompt_tokens.get(section, 0)
+        return before, after
 
 
 _READY_SUMMARY_FLAG = "__ready_summary_sent"
+_SECTION_MAX_TOKENS = 1500
+_SECTION_TEMPERATURE = 0.4
 _WELCOME_MESSAGE = "I'm here to help tailor this agreement to your specific needs."
 _STANDARD_CLAUSE_KEYWORDS = (
     "boilerplate",
@@ -310,47 +429,46 @@ def _format_contract_label(contract_type_id: Optional[str], contract_type_name:
     return "unknown contract type"
 
 
-def _parse_precedent_outline(raw_outline: Dict[str, Any]) -> PrecedentOutline:
-    title = raw_outline.get("title")
-    front_matter = list(raw_outline.get("front_matter") or [])
-    placeholders = list(raw_outline.get("placeholders") or [])
-    sections_raw = raw_outline.get("sections") or []
-
-    sections: List[PrecedentSection] = []
-    for section in sections_raw:
-        heading = str(section.get("heading") or "").strip()
-        body = str(section.get("body") or "").strip()
-        if heading or body:
-            sections.append(PrecedentSection(heading=heading, body=body))
-
-    return PrecedentOutline(
-        title=title,
-        front_matter=front_matter,
-        sections=sections,
-        placeholders=placeholders,
+def _require_precedent_outline(
+    contract_type_id: Optional[str],
+    contract_type_name: Optional[str],
+    db_outline: Optional[Dict[str, Any]],
+) -> PrecedentOutline:
+    outline = get_precedent_outline(
+        contract_type_id,
+        contract_type_name,
+        db_outline=db_outline,
     )
+    return _check_precedent_outline(contract_type_id, contract_type_name, outline)
 
 
-def _require_precedent_outline(
+async def _require_precedent_outline_async(
     contract_type_id: Optional[str],
     contract_type_name: Optional[str],
     db_outline: Optional[Dict[str, Any]],
 ) -> PrecedentOutline:
-    outline = get_precedent_outline(
+    outline = await get_precedent_outline_async(
         contract_type_id,
         contract_type_name,
         db_outline=db_outline,
     )
+    return _check_precedent_outline(contract_type_id, contract_type_name, outline)
+
+
+def _check_precedent_outline(
+    contract_type_id: Optional[str],
+    contract_type_name: Optional[str],
+    outline: Optional[PrecedentOutline],
+) -> PrecedentOutline:
     if not outline:
         label = _format_contract_label(contract_type_id, contract_type_name)
         raise ValueError(f"No precedent outline found for {label}.")
 
-    parsed = _parse_precedent_outline(outline)
-    if not parsed.sections:
+    if not outline.sections:
         label = _format_contract_label(contract_type_id, contract_type_name)
         raise ValueError(f"No precedent sections found for {label}.")
 
-    return parsed
+    return outline
 
 
 def _build_section_context_blob(
@@ -359,11 +477,13 @@ def _build_section_context_blob(
     category: Optional[str],
     jurisdiction: Optional[str],
     template_meta: List[Dict[str, str]],
-    combined_answers: Dict[str, Any],
+    shared_answers: Dict[str, Any],
     chat_history: str,
+    chat_history_label: str = "Recent chat history (most recent turns):",
     precedent_title: Optional[str],
     precedent_front_matter: List[str],
     precedent_placeholders: List[str],
+    precedent_snippets: Optional[List[str]] = None,
 ) -> str:
     front_matter_block = _render_lines(
         (f"- {line}" for line in precedent_front_matter),
@@ -378,10 +498,10 @@ def _build_section_context_blob(
         "Template questions:",
         str(template_meta),
         "",
-        "Structured answers (form + chat, with form taking precedence):",
-        str(combined_answers),
+        "Structured answers for the whole contract (form + chat, with form taking precedence):",
+        str(shared_answers),
         "",
-        "Recent chat history (most recent turns):",
+        chat_history_label,
         chat_history or "- None",
         "",
         "Precedent title:",
@@ -393,21 +513,41 @@ def _build_section_context_blob(
         "Precedent placeholders found:",
         str(precedent_placeholders or []),
     ]
+    if precedent_snippets:
+        lines += [
+            "",
+            "Reference precedent snippets supplied with the request:",
+            *(f"- {snippet}" for snippet in precedent_snippets),
+        ]
 
     return "\n".join(lines).strip()
 
 
-def _build_section_prompt(
-    section_context: str,
+def _build_section_prompt_parts(
+    section_context: SectionContext,
     section: PrecedentSection,
-) -> str:
-    heading = section.heading or "Untitled section"
-    body = section.body or "None"
-
-    lines = [
+) -> Tuple[str, str]:
+    """
+    Split a section prompt into the prefix shared by every section of the
+    contract and the small per-section suffix.
+    """
+    shared_lines = [
         "Here is the structured context and the specific section to draft:",
-        section_context.strip(),
+        section_context.shared.strip(),
+    ]
+    section_lines = [
+        section_context.slice_for(section),
         "",
+        *_section_to_draft_lines(section),
+    ]
+
+    return "\n".join(shared_lines).strip(), "\n".join(section_lines).strip()
+
+
+def _section_to_draft_lines(section: PrecedentSection) -> List[str]:
+    heading = section.heading or "Untitled section"
+    body = section.body or "None"
+    return [
         "Section to draft:",
         f"- Heading: {heading}",
         f"- Precedent body: {body}",
@@ -415,61 +555,551 @@ def _build_section_prompt(
         "Draft only this section in plain text, following the system instructions.",
     ]
 
-    return "\n".join(lines).strip()
+
+def _section_part_tokens(section: PrecedentSection) -> int:
+    return estimate_tokens("\n".join(_section_to_draft_lines(section)))
+
+
+def _chat_turns(chat_messages: List[ChatMessage], max_turns: int) -> List[str]:
+    history = _format_chat_history(chat_messages, max_turns=max_turns)
+    return [line for line in history.split("\n") if line]
+
+
+def _assemble_section_slice(
+    section: PrecedentSection,
+    answers: Dict[str, Any],
+    turns: List[Tuple[int, str]],
+    budget: int,
+    similar_clauses: Optional[List[str]] = None,
+) -> str:
+    """
+    Per-section context within `budget` estimated tokens.
+
+    The answers the section depends on are always kept. The section's own
+    placeholders come next, then `(position, text)` chat turns in the given
+    priority order. `similar_clauses`, best first, have their own budget
+    (PRECEDENT_SNIPPET_TOKEN_BUDGET).
+    """
+    blocks: List[str] = []
+    remaining = budget
+    if answers:
+        answers_block = "\n".join(
+            ["Structured answers relevant to this section:", str(answers)]
+        )
+        blocks.append(answers_block)
+        remaining -= estimate_tokens(answers_block)
+
+    placeholders = list(section.placeholders or [])
+    if placeholders and remaining > 0:
+        placeholder_block = "\n".join(
+            [
+                "Placeholders in this section's precedent (reuse verbatim):",
+                str(placeholders),
+            ]
+        )
+        cost = estimate_tokens(placeholder_block)
+        if cost <= remaining:
+            blocks.append(placeholder_block)
+            remaining -= cost
+
+    kept = take_within_budget(turns, max(0, remaining))
+    if kept:
+        blocks.append(
+            "\n".join(
+                ["Chat turns relevant to this section:"] + [text for _, text in kept]
+            )
+        )
+
+    clauses = take_within_budget(
+        enumerate(similar_clauses or []), PRECEDENT_SNIPPET_TOKEN_BUDGET
+    )
+    if clauses:
+        blocks.append(
+            "\n".join(
+                [
+                    "Similar clauses from other precedents (reference only; "
+                    "follow this section's precedent):"
+                ]
+                + [text for _, text in clauses]
+            )
+        )
+
+    return "\n\n".join(blocks)
+
+
+def _clip(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + " ..."
+
+
+def _similar_clauses(
+    section: PrecedentSection,
+    precedent_title: Optional[str],
+) -> List[str]:
+    """
+    Clauses like `section` from the other precedents in the retrieval index
+    (see precedent_index.py), best first.
+    """
+    return [
+        f"- [{clause.precedent_title or 'Untitled'}: {clause.heading or 'Untitled'}] "
+        + _clip(clause.body, PRECEDENT_SNIPPET_MAX_CHARS)
+        for clause in similar_sections(
+            section.heading,
+            section.body,
+            exclude_title=precedent_title,
+        )
+    ]
+
+
+def _build_section_messages(
+    section_context: SectionContext,
+    section: PrecedentSection,
+) -> List[Dict[str, Any]]:
+    """
+    With prompt caching on, the shared context is sent as its own cached
+    block: system prompt + context are billed in full once per contract and
+    read from the cache by every other section.
+    """
+    shared, section_part = _build_section_prompt_parts(section_context, section)
+    if not PROMPT_CACHE_ENABLED:
+        return [{"role": "user", "content": f"{shared}\n\n{section_part}"}]
+    return [
+        {
+            "role": "user",
+            "content": [text_block(shared, cache=True), text_block(section_part)],
+        }
+    ]
+
+
+def _warm_prompt_cache_first(max_concurrency: int, total_sections: int) -> bool:
+    # Concurrent calls started before the first one reaches the API would
+    # all miss the cache (and each pay for writing it), so the first section
+    # goes alone and the rest fan out once its prefix is cached.
+    return PROMPT_CACHE_ENABLED and max_concurrency > 1 and total_sections > 1
 
 
 def _progress_label(heading: str, index: int, total: int) -> str:
     return f"Drafting Section {index} ({index} of {total})"
 
 
-def _draft_sections(
+def _record_llm_call(
+    route: ModelRoute,
+    started: float,
+    usage: Optional[Dict[str, Any]],
     *,
     draft_id: str,
-    sections: List[PrecedentSection],
-    section_context: str,
-) -> Tuple[List[str], UsageTotals]:
-    generated_sections: List[str] = []
-    total_input_tokens = 0
-    total_output_tokens = 0
-    usage_model: Optional[str] = None
+    contract_type: str,
+) -> None:
+    """
+    Latency per route plus the priced call in the cost ledger.
+    """
+    record_call(route, time.perf_counter() - started, usage)
+    record_usage(
+        usage, draft_id=draft_id, contract_type=contract_type, task=route.task
+    )
 
-    total_sections = len(sections)
-    for idx, section in enumerate(sections, start=1):
-        update_progress(
-            draft_id,
-            idx - 1,
-            total_sections,
-            _progress_label(section.heading, idx, total_sections),
-        )
 
-        prompt = _build_section_prompt(section_context, section)
-        section_text, usage = ml_service.call_llm_text_with_usage(
-            messages=[{"role": "user", "content": prompt}],
-            system=CONTRACT_SECTION_SYSTEM_PROMPT,
-            max_tokens=1500,
-            temperature=0.4,
-        )
+async def _record_llm_call_async(
+    route: ModelRoute,
+    started: float,
+    usage: Optional[Dict[str, Any]],
+    *,
+    draft_id: str,
+    contract_type: str,
+) -> None:
+    """
+    `_record_llm_call` for the async paths: the ledger may be SQLite-backed,
+    so its write runs in a worker thread.
+    """
+    record_call(route, time.perf_counter() - started, usage)
+    await asyncio.to_thread(
+        record_usage,
+        usage,
+        draft_id=draft_id,
+        contract_type=contract_type,
+        task=route.task,
+    )
+
+
+def _section_route(
+    section_context: SectionContext,
+    section: PrecedentSection,
+) -> ModelRoute:
+    return route_section(
+        section.heading,
+        section.body,
+        dependency_count=len(section_context.dependencies.keys_for(section)),
+        placeholder_count=len(section.placeholders or ()),
+    )
+
+
+def _section_cache_key(
+    section_context: SectionContext,
+    section: PrecedentSection,
+    model: str,
+) -> str:
+    # Only the shared context and this section's slice feed the draft, so
+    # answers and chat turns routed to other sections don't invalidate it.
+    return section_cache_key(
+        model=model,
+        system_prompt=CONTRACT_SECTION_SYSTEM_PROMPT,
+        heading=section.heading,
+        body=section.body,
+        context=f"{section_context.shared}\n{section_context.slice_for(section)}",
+        max_tokens=_SECTION_MAX_TOKENS,
+        temperature=_SECTION_TEMPERATURE,
+    )
+
+
+def _cached_section_usage(model: str) -> Dict[str, Any]:
+    return {
+        "model": model,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "section_cache_hit": True,
+    }
+
+
+def _reusable_section(
+    section_context: SectionContext,
+    cache_key: str,
+) -> Optional[str]:
+    # The section cache may be off, per process, or on another worker; a
+    # draft's own failed run keeps what it finished with its progress.
+    cached = get_cached_section(cache_key)
+    if cached is None:
+        cached = get_drafted_section(section_context.draft_id, cache_key)
+    return cached
 
+
+def _draft_section(
+    section_context: SectionContext,
+    section: PrecedentSection,
+    reuse_cached: bool = True,
+) -> Tuple[str, Dict[str, Any]]:
+    route = _section_route(section_context, section)
+    cache_key = _section_cache_key(section_context, section, route.model)
+    cached = _reusable_section(section_context, cache_key) if reuse_cached else None
+    if cached is not None:
+        return cached, _cached_section_usage(route.model)
+
+    started = time.perf_counter()
+    section_text, usage = ml_service.call_llm_text_with_usage(
+        messages=_build_section_messages(section_context, section),
+        model=route.model,
+        system=CONTRACT_SECTION_SYSTEM_PROMPT,
+        max_tokens=_SECTION_MAX_TOKENS,
+        temperature=_SECTION_TEMPERATURE,
+    )
+    _record_llm_call(
+        route,
+        started,
+        usage,
+        draft_id=section_context.draft_id,
+        contract_type=section_context.contract_type,
+    )
+    section_text = _ensure_section_heading(section_text, section.heading)
+    put_cached_section(cache_key, section_text)
+    return section_text, usage
+
+
+def _sum_usage(usages: Iterable[Dict[str, Any]]) -> UsageTotals:
+    total_input_tokens = 0
+    total_output_tokens = 0
+    total_cache_creation_tokens = 0
+    total_cache_read_tokens = 0
+    section_cache_hits = 0
+    cost_usd = 0.0
+    models: Set[str] = set()
+    for usage in usages:
         total_input_tokens += usage.get("input_tokens") or 0
         total_output_tokens += usage.get("output_tokens") or 0
-        usage_model = usage.get("model") or usage_model
+        total_cache_creation_tokens += usage.get("cache_creation_input_tokens") or 0
+        total_cache_read_tokens += usage.get("cache_read_input_tokens") or 0
+        section_cache_hits += 1 if usage.get("section_cache_hit") else 0
+        # Each call is priced at its own model's rates.
+        cost_usd += usage_cost_usd(usage)
+        if usage.get("model"):
+            models.add(usage["model"])
+    return UsageTotals(
+        input_tokens=total_input_tokens,
+        output_tokens=total_output_tokens,
+        model=", ".join(sorted(models)) or None,
+        cache_creation_input_tokens=total_cache_creation_tokens,
+        cache_read_input_tokens=total_cache_read_tokens,
+        section_cache_hits=section_cache_hits,
+        cost_usd=cost_usd,
+    )
+
+
+def _log_section_failure(
+    draft_id: str,
+    section: PrecedentSection,
+    exc: BaseException,
+) -> None:
+    logger.error(
+        "generate_contract: section failed draft_id=%s heading=%r: %s",
+        draft_id,
+        section.heading,
+        exc,
+    )
+
+
+def _raise_section_failures(
+    section_context: SectionContext,
+    sections: List[PrecedentSection],
+    drafted: List[Optional[str]],
+    failures: Dict[int, BaseException],
+) -> None:
+    if not failures:
+        return
+    first = failures[min(failures)]
+    raise SectionDraftError(
+        [sections[idx].heading for idx in sorted(failures)],
+        len(sections),
+        first,
+        {
+            _section_cache_key(
+                section_context,
+                section,
+                _section_route(section_context, section).model,
+            ): text
+            for section, text in zip(sections, drafted)
+            if text
+        },
+    ) from first
+
+
+def _fail_generation(draft_id: str, exc: BaseException) -> None:
+    fail_progress(
+        draft_id,
+        str(exc),
+        exc.drafted_sections if isinstance(exc, SectionDraftError) else None,
+    )
 
-        section_text = _ensure_section_heading(section_text, section.heading)
-        if section_text:
-            generated_sections.append(section_text)
 
+def _draft_sections(
+    *,
+    draft_id: str,
+    sections: List[PrecedentSection],
+    section_context: SectionContext,
+    max_concurrency: int = SECTION_DRAFT_CONCURRENCY,
+    reuse_cached: bool = True,
+) -> Tuple[List[str], UsageTotals]:
+    """
+    Draft every precedent section, up to `max_concurrency` LLM calls at once.
+
+    Sections may finish out of order; results are slotted back into precedent
+    order (one per section, empty drafts included) and progress reports the
+    number of sections finished so far.
+    `reuse_cached=False` skips section-cache reads (fresh drafts are still
+    written back).
+
+    A failed section doesn't stop the others: every section is attempted,
+    then `SectionDraftError` names the ones that failed.
+    """
+    total_sections = len(sections)
+    drafted: List[Optional[str]] = [None] * total_sections
+    usages: List[Dict[str, Any]] = []
+    failures: Dict[int, BaseException] = {}
+
+    if max_concurrency <= 1 or total_sections <= 1:
+        for idx, section in enumerate(sections, start=1):
+            update_progress(
+                draft_id,
+                idx - 1,
+                total_sections,
+                _progress_label(section.heading, idx, total_sections),
+            )
+            try:
+                drafted[idx - 1], usage = _draft_section(
+                    section_context, section, reuse_cached
+                )
+            except Exception as exc:
+                failures[idx - 1] = exc
+                _log_section_failure(draft_id, section, exc)
+                continue
+            usages.append(usage)
+            update_progress(
+                draft_id,
+                idx,
+                total_sections,
+                _progress_label(section.heading, idx, total_sections),
+            )
+    else:
         update_progress(
             draft_id,
-            idx,
+            0,
             total_sections,
-            _progress_label(section.heading, idx, total_sections),
+            _progress_label(sections[0].heading, 1, total_sections),
         )
+        pending = list(range(total_sections))
+        completed = 0
+        if _warm_prompt_cache_first(max_concurrency, total_sections):
+            pending = pending[1:]
+            try:
+                drafted[0], usage = _draft_section(
+                    section_context, sections[0], reuse_cached
+                )
+            except Exception as exc:
+                failures[0] = exc
+                _log_section_failure(draft_id, sections[0], exc)
+            else:
+                usages.append(usage)
+                completed = 1
+                update_progress(
+                    draft_id,
+                    completed,
+                    total_sections,
+                    _progress_label(sections[0].heading, completed, total_sections),
+                )
+        workers = min(max_concurrency, len(pending))
+        with ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix=f"draft-{draft_id}",
+        ) as pool:
+            futures = {
+                pool.submit(
+                    _draft_section, section_context, sections[idx], reuse_cached
+                ): idx
+                for idx in pending
+            }
+            try:
+                for future in as_completed(futures):
+                    idx = futures[future]
+                    try:
+                        drafted[idx], usage = future.result()
+                    except Exception as exc:
+                        failures[idx] = exc
+                        _log_section_failure(draft_id, sections[idx], exc)
+                        continue
+                    usages.append(usage)
+                    completed += 1
+                    update_progress(
+                        draft_id,
+                        completed,
+                        total_sections,
+                        _progress_label(
+                            sections[idx].heading,
+                            completed,
+                            total_sections,
+                        ),
+                    )
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    _raise_section_failures(section_context, sections, drafted, failures)
+    return [text or "" for text in drafted], _sum_usage(usages)
+
+
+async def _draft_section_async(
+    section_context: SectionContext,
+    section: PrecedentSection,
+    reuse_cached: bool = True,
+) -> Tuple[str, Dict[str, Any]]:
+    route = _section_route(section_context, section)
+    cache_key = _section_cache_key(section_context, section, route.model)
+    cached = None
+    if reuse_cached:
+        # The section cache may be SQLite-backed; keep its I/O off the loop.
+        cached = await asyncio.to_thread(_reusable_section, section_context, cache_key)
+    if cached is not None:
+        return cached, _cached_section_usage(route.model)
+
+    started = time.perf_counter()
+    section_text, usage = await ml_service.call_llm_text_with_usage_async(
+        messages=_build_section_messages(section_context, section),
+        model=route.model,
+        system=CONTRACT_SECTION_SYSTEM_PROMPT,
+        max_tokens=_SECTION_MAX_TOKENS,
+        temperature=_SECTION_TEMPERATURE,
+        hedge_key=f"section:{route.model}",
+    )
+    await _record_llm_call_async(
+        route,
+        started,
+        usage,
+        draft_id=section_context.draft_id,
+        contract_type=section_context.contract_type,
+    )
+    section_text = _ensure_section_heading(section_text, section.heading)
+    await asyncio.to_thread(put_cached_section, cache_key, section_text)
+    return section_text, usage
 
-    return generated_sections, UsageTotals(
-        input_tokens=total_input_tokens,
-        output_tokens=total_output_tokens,
-        model=usage_model,
+
+async def _draft_sections_async(
+    *,
+    draft_id: str,
+    sections: List[PrecedentSection],
+    section_context: SectionContext,
+    max_concurrency: int = SECTION_DRAFT_CONCURRENCY,
+    reuse_cached: bool = True,
+) -> Tuple[List[str], UsageTotals]:
+    """
+    Async twin of `_draft_sections`, bounded by a semaphore instead of a pool.
+    """
+    total_sections = len(sections)
+    drafted: List[Optional[str]] = [None] * total_sections
+    usages: List[Dict[str, Any]] = []
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    warmed: Optional[asyncio.Event] = None
+    if _warm_prompt_cache_first(max_concurrency, total_sections):
+        warmed = asyncio.Event()
+
+    async def _run(idx: int) -> Tuple[int, Any, Any]:
+        # Failures are returned, not raised, so one section can't cut the
+        # others short.
+        if warmed is not None and idx:
+            await warmed.wait()
+        try:
+            async with semaphore:
+                text, usage = await _draft_section_async(
+                    section_context, sections[idx], reuse_cached
+                )
+                return idx, text, usage
+        except Exception as exc:
+            return idx, None, exc
+        finally:
+            if warmed is not None and not idx:
+                warmed.set()
+
+    update_progress(
+        draft_id,
+        0,
+        total_sections,
+        _progress_label(sections[0].heading, 1, total_sections),
     )
+    tasks = [asyncio.create_task(_run(idx)) for idx in range(total_sections)]
+    completed = 0
+    failures: Dict[int, BaseException] = {}
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            idx, text, usage = await next_done
+            if isinstance(usage, BaseException):
+                failures[idx] = usage
+                _log_section_failure(draft_id, sections[idx], usage)
+                continue
+            drafted[idx] = text
+            usages.append(usage)
+            completed += 1
+            update_progress(
+                draft_id,
+                completed,
+                total_sections,
+                _progress_label(sections[idx].heading, completed, total_sections),
+            )
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    _raise_section_failures(section_context, sections, drafted, failures)
+    return [text or "" for text in drafted], _sum_usage(usages)
 
 
 def _stitch_contract(
@@ -490,28 +1120,122 @@ def _stitch_contract(
     return f"{body}\n\n{CONTRACT_DISCLAIMER_TEXT}"
 
 
-def _log_generation_cost(usage: UsageTotals, section_count: int) -> None:
-    cost_usd = (
-        usage.input_tokens / 1_000_000
-    ) * CLAUDE_SONNET_4_5_INPUT_COST_PER_MILLION
+def _log_generation_cost(
+    usage: UsageTotals,
+    section_count: int,
+    context_tokens: Optional[Tuple[int, int]] = None,
+) -> None:
+    """
+    `context_tokens` is the (before, after) estimate of input tokens saved by
+    per-section context slimming, from `SectionContext.token_estimates`.
+    """
+    if context_tokens is not None:
+        before, after = context_tokens
+        logger.info(
+            "generate_contract: context_tokens_est before=%d after=%d saved=%d (%.0f%%)",
+            before,
+            after,
+            before - after,
+            100.0 * (before - after) / before if before else 0.0,
+        )
     logger.info(
-        "generate_contract: model=%s sections=%d input_tokens=%s output_tokens=%s cost_usd=%.6f",
+        "generate_contract: model=%s sections=%d input_tokens=%s output_tokens=%s "
+        "cache_write_tokens=%s cache_read_tokens=%s section_cache_hits=%d "
+        "cost_usd=%.6f",
         usage.model or ml_service.model,
         section_count,
         usage.input_tokens,
         usage.output_tokens,
-        cost_usd,
+        usage.cache_creation_input_tokens,
+        usage.cache_read_input_tokens,
+        usage.section_cache_hits,
+        usage.cost_usd,
     )
 
 
-def answer_contract_chat(req: ContractChatRequest) -> ContractChatResponse:
+def _mark_handled_locally(
+    req: ContractChatRequest,
+    updated_chat_answers: Dict[str, Any],
+) -> None:
     """
-    Given contract context + chat history, produce the next assistant message.
+    The latest user message was fully handled without the LLM (an opening
+    turn or a captured answer), so it needs no extraction. Move the marker
+    past it unless older messages are still waiting.
+    """
+    count = len(req.messages)
+    if extracted_turns(req.context.chat_answers, count) >= count - 2:
+        updated_chat_answers[EXTRACTED_TURNS_FLAG] = count
 
-    Implementation detail:
-    - CONTRACT_CHAT_SYSTEM_PROMPT goes into Anthropic's top-level `system`.
-    - All dynamic context (contract type, answers, clarifying questions, etc.)
-      is sent as a *leading user message* so that `messages` is never empty.
+
+def _fast_path_reply(
+    req: ContractChatRequest,
+    combined_answers: Dict[str, Any],
+    *,
+    pending_key: Optional[str],
+    user_text: Optional[str],
+    captured: Optional[str],
+    updated_chat_answers: Dict[str, Any],
+) -> Optional[str]:
+    """
+    Answer a chat turn deterministically when the next step is simply the
+    next missing required question.
+
+    Eligible turns: the opening turn (empty, or a bare "hi" / "let's
+    start") and a plain answer to the question asked locally last turn.
+    Anything else (questions, uncertainty, free text) returns None and goes
+    to the LLM. Marks the asked question as pending in
+    `updated_chat_answers`.
+    """
+    opening = _should_prepend_welcome(req.messages) and (
+        not req.messages or (user_text is not None and is_acknowledgement(user_text))
+    )
+    if captured is None and not opening:
+        return None
+    if not fast_path_selected(req.draft_id, len(req.messages)):
+        return None
+
+    questions = req.context.template_questions
+    answered_keys = {
+        question.key
+        for question in questions
+        if _normalize_answer_value(combined_answers.get(question.key))
+    }
+    question = next_template_question(questions, answered_keys)
+    if question is None:
+        return None
+
+    updated_chat_answers[PENDING_QUESTION_FLAG] = question.key
+    _mark_handled_locally(req, updated_chat_answers)
+    reply = phrase_question(question)
+    if captured is not None:
+        label = next(
+            (q.label for q in questions if q.key == pending_key),
+            pending_key,
+        )
+        reply = f"Got it, {label}: {captured}.\n\n{reply}"
+    logger.info(
+        "contract_chat: draft_id=%s fast path asked=%s captured=%s",
+        req.draft_id,
+        question.key,
+        pending_key if captured is not None else None,
+    )
+    return reply
+
+
+def _plan_chat_turn(
+    req: ContractChatRequest,
+) -> Tuple[
+    Optional[ContractChatResponse],
+    List[Dict[str, str]],
+    Dict[str, Any],
+    Optional[CompactedHistory],
+]:
+    """
+    Work out everything for a chat turn that does not need the LLM.
+
+    Returns `(response, anthropic_messages, updated_chat_answers, history)`.
+    When `response` is set the turn is fully answered locally and no LLM
+    call should be made. `history` is the compacted chat history sent.
     """
     clarifying = [
         item
@@ -534,6 +1258,33 @@ def answer_contract_chat(req: ContractChatRequest) -> ContractChatResponse:
     updated_chat_answers: Dict[str, Any] = dict(req.context.chat_answers)
     updated_chat_answers.update(default_answers)
 
+    # The previous turn asked a template question locally; a plain reply is
+    # taken as its answer without involving the LLM.
+    pending_key = chat_answers.get(PENDING_QUESTION_FLAG)
+    user_text = latest_user_text(req.messages)
+    captured: Optional[str] = None
+    if pending_key:
+        updated_chat_answers[PENDING_QUESTION_FLAG] = None
+        captured = capture_answer(
+            user_text,
+            next(
+                (
+                    question
+                    for question in req.context.template_questions
+                    if question.key == pending_key
+                ),
+                None,
+            ),
+        )
+        if captured is not None:
+            updated_chat_answers[pending_key] = captured
+            combined_answers[pending_key] = captured
+            _mark_handled_locally(req, updated_chat_answers)
+            answered_lines, missing_required = _compute_answer_state(
+                req.context.template_questions,
+                combined_answers,
+            )
+
     if not missing_required:
         summary_sent = bool(req.context.chat_answers.get(_READY_SUMMARY_FLAG))
         summary = None
@@ -546,11 +1297,26 @@ def answer_contract_chat(req: ContractChatRequest) -> ContractChatResponse:
             if summary
             else _ready_to_generate_message()
         )
-        return ContractChatResponse(
+        response = ContractChatResponse(
             draft_id=req.draft_id,
             assistant_message=assistant_message,
             updated_chat_answers=updated_chat_answers,
         )
+        return response, [], updated_chat_answers, None
+
+    local_reply = _fast_path_reply(
+        req,
+        combined_answers,
+        pending_key=pending_key,
+        user_text=user_text,
+        captured=captured,
+        updated_chat_answers=updated_chat_answers,
+    )
+    if local_reply is not None:
+        count_turn(local=True)
+        response = _finish_chat_turn(req, local_reply, updated_chat_answers)
+        return response, [], updated_chat_answers, None
+    count_turn(local=False)
 
     context_blob = _build_chat_context_blob(
         contract_type_name=req.context.contract_type_name,
@@ -562,22 +1328,312 @@ def answer_contract_chat(req: ContractChatRequest) -> ContractChatResponse:
         missing_required=missing_required,
     )
 
-    leading_user_message = (
-        context_blob
-        + "\n\nNow, based on the missing or unclear details, ask me the next most important clarifying question."
+    next_question = (
+        "Now, based on the missing or unclear details, ask me the next most important clarifying question."
+    )
+    history = compact_history(
+        req.draft_id,
+        req.messages,
+        reserved_tokens=estimate_tokens(CONTRACT_CHAT_SYSTEM_PROMPT)
+        + estimate_tokens(context_blob)
+        + estimate_tokens(next_question),
     )
+    summary_block = (
+        "\n\nSummary of the earlier conversation (those turns are not repeated below):\n"
+        + history.summary
+        if history.summary
+        else ""
+    )
+    leading_user_message = context_blob + summary_block + "\n\n" + next_question
 
     anthropic_messages = _to_anthropic_messages(
-        chat_messages=req.messages,
+        chat_messages=history.messages,
         leading_user_content=leading_user_message,
     )
+    if history.summary or history.dropped:
+        logger.info(
+            "contract_chat: draft_id=%s history messages=%d sent=%d dropped=%d "
+            "summarised=%s est_tokens=%d",
+            req.draft_id,
+            len(req.messages),
+            len(history.messages),
+            history.dropped,
+            bool(history.summary),
+            history.estimated_tokens,
+        )
+    return None, anthropic_messages, updated_chat_answers, history
+
+
+def _summary_request(
+    previous_summary: Optional[str],
+    chat_messages: List[ChatMessage],
+) -> List[Dict[str, str]]:
+    lines = [
+        "Previous summary:",
+        previous_summary or "- None",
+        "",
+        "New conversation turns to merge in:",
+        _format_chat_history(chat_messages, max_turns=len(chat_messages)) or "- None",
+        "",
+        "Write the updated summary.",
+    ]
+    return [{"role": "user", "content": "\n".join(lines)}]
+
+
+def _refresh_chat_summary(
+    req: ContractChatRequest,
+    chat_messages: List[ChatMessage],
+    history: CompactedHistory,
+) -> None:
+    draft_id = req.draft_id
+    start, end = history.fold
+    route = route_task(TASK_CHAT_SUMMARY)
+    text: Optional[str] = None
+    try:
+        started = time.perf_counter()
+        text, usage = ml_service.call_llm_text_with_usage(
+            messages=_summary_request(history.summary, chat_messages[start:end]),
+            model=route.model,
+            system=CHAT_HISTORY_SUMMARY_SYSTEM_PROMPT,
+            max_tokens=500,
+            temperature=0.0,
+        )
+        _record_llm_call(
+            route,
+            started,
+            usage,
+            draft_id=draft_id,
+            contract_type=req.context.contract_type_name,
+        )
+    except Exception:
+        logger.exception("contract_chat: summary refresh failed draft_id=%s", draft_id)
+    finally:
+        finish_refresh(draft_id, chat_messages, end, text)
+
+
+async def _refresh_chat_summary_async(
+    req: ContractChatRequest,
+    chat_messages: List[ChatMessage],
+    history: CompactedHistory,
+) -> None:
+    draft_id = req.draft_id
+    start, end = history.fold
+    route = route_task(TASK_CHAT_SUMMARY)
+    text: Optional[str] = None
+    try:
+        started = time.perf_counter()
+        text, usage = await ml_service.call_llm_text_with_usage_async(
+            messages=_summary_request(history.summary, chat_messages[start:end]),
+            model=route.model,
+            system=CHAT_HISTORY_SUMMARY_SYSTEM_PROMPT,
+            max_tokens=500,
+            temperature=0.0,
+        )
+        await _record_llm_call_async(
+            route,
+            started,
+            usage,
+            draft_id=draft_id,
+            contract_type=req.context.contract_type_name,
+        )
+    except Exception:
+        logger.exception("contract_chat: summary refresh failed draft_id=%s", draft_id)
+    finally:
+        finish_refresh(draft_id, chat_messages, end, text)
+
+
+def _schedule_summary_refresh(
+    req: ContractChatRequest,
+    history: Optional[CompactedHistory],
+) -> None:
+    if history is None or history.fold is None or not begin_refresh(req.draft_id):
+        return
+    _SUMMARY_EXECUTOR.submit(
+        _refresh_chat_summary, req, list(req.messages), history
+    )
+
+
+def _schedule_summary_refresh_async(
+    req: ContractChatRequest,
+    history: Optional[CompactedHistory],
+) -> None:
+    if history is None or history.fold is None or not begin_refresh(req.draft_id):
+        return
+    task = asyncio.create_task(
+        _refresh_chat_summary_async(req, list(req.messages), history)
+    )
+    # Keep a reference so the task isn't garbage-collected mid-flight.
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+
+def _plan_answer_extraction(
+    req: ContractChatRequest,
+) -> Optional[Tuple[ExtractionSchema, List[Dict[str, str]]]]:
+    """
+    Schema and request for extracting answers from the chat messages not
+    yet extracted, or None when there is nothing new from the user.
+    """
+    questions = req.context.template_questions
+    if not CHAT_ANSWER_EXTRACTION_ENABLED or not questions:
+        return None
+    context, new_messages = pending_messages(req.messages, req.context.chat_answers)
+    if not any(m.role == "user" and m.content.strip() for m in new_messages):
+        return None
+    combined_answers = _merge_answers(
+        req.context.form_answers,
+        req.context.chat_answers,
+    )
+    current_answers: Dict[str, str] = {}
+    for question in questions:
+        value = _normalize_answer_value(combined_answers.get(question.key))
+        if value:
+            current_answers[question.key] = value
+    schema = extraction_schema(req.context.contract_type_name, questions)
+    return schema, extraction_request(
+        questions, current_answers, context, new_messages
+    )
+
+
+def _extraction_updates(
+    req: ContractChatRequest,
+    schema: ExtractionSchema,
+    result: Any,
+) -> Dict[str, Any]:
+    answers = extracted_answers(schema, result)
+    logger.info(
+        "contract_chat: draft_id=%s extracted answers=%s from messages %d..%d",
+        req.draft_id,
+        sorted(answers),
+        extracted_turns(req.context.chat_answers, len(req.messages)),
+        len(req.messages),
+    )
+    return {**answers, EXTRACTED_TURNS_FLAG: len(req.messages)}
+
+
+def _extract_chat_answers(
+    req: ContractChatRequest,
+    plan: Optional[Tuple[ExtractionSchema, List[Dict[str, str]]]],
+) -> Dict[str, Any]:
+    """
+    Structured answers from the new chat messages, merged into
+    `updated_chat_answers`. Failures leave the messages for the next turn.
+    """
+    if plan is None:
+        return {}
+    schema, messages = plan
+    route = route_task(TASK_ANSWER_EXTRACTION)
+    try:
+        started = time.perf_counter()
+        result, usage = ml_service.call_llm_structured_with_usage(
+            response_model=schema.model,
+            messages=messages,
+            model=route.model,
+            system=CHAT_ANSWER_EXTRACTION_SYSTEM_PROMPT,
+            max_tokens=600,
+            temperature=0.0,
+        )
+        _record_llm_call(
+            route,
+            started,
+            usage,
+            draft_id=req.draft_id,
+            contract_type=req.context.contract_type_name,
+        )
+    except Exception:
+        count_extraction_failure()
+        logger.exception(
+            "contract_chat: answer extraction failed draft_id=%s", req.draft_id
+        )
+        return {}
+    return _extraction_updates(req, schema, result)
+
+
+async def _extract_chat_answers_async(
+    req: ContractChatRequest,
+    plan: Optional[Tuple[ExtractionSchema, List[Dict[str, str]]]],
+) -> Dict[str, Any]:
+    if plan is None:
+        return {}
+    schema, messages = plan
+    route = route_task(TASK_ANSWER_EXTRACTION)
+    try:
+        started = time.perf_counter()
+        result, usage = await ml_service.call_llm_structured_with_usage_async(
+            response_model=schema.model,
+            messages=messages,
+            model=route.model,
+            system=CHAT_ANSWER_EXTRACTION_SYSTEM_PROMPT,
+            max_tokens=600,
+            temperature=0.0,
+        )
+        await _record_llm_call_async(
+            route,
+            started,
+            usage,
+            draft_id=req.draft_id,
+            contract_type=req.context.contract_type_name,
+        )
+    except Exception:
+        count_extraction_failure()
+        logger.exception(
+            "contract_chat: answer extraction failed draft_id=%s", req.draft_id
+        )
+        return {}
+    return _extraction_updates(req, schema, result)
+
+
+def _chat_reply(
+    req: ContractChatRequest,
+    anthropic_messages: List[Dict[str, Any]],
+) -> str:
+    route = route_task(TASK_CHAT)
+    started = time.perf_counter()
+    reply, usage = ml_service.call_llm_text_with_usage(
+        messages=anthropic_messages,
+        model=route.model,
+        system=CONTRACT_CHAT_SYSTEM_PROMPT,
+        max_tokens=800,
+        temperature=0.5,
+    )
+    _record_llm_call(
+        route,
+        started,
+        usage,
+        draft_id=req.draft_id,
+        contract_type=req.context.contract_type_name,
+    )
+    return reply
+
 
-    reply = ml_service.call_llm_text(
+async def _chat_reply_async(
+    req: ContractChatRequest,
+    anthropic_messages: List[Dict[str, Any]],
+) -> str:
+    route = route_task(TASK_CHAT)
+    started = time.perf_counter()
+    reply, usage = await ml_service.call_llm_text_with_usage_async(
         messages=anthropic_messages,
+        model=route.model,
         system=CONTRACT_CHAT_SYSTEM_PROMPT,
         max_tokens=800,
         temperature=0.5,
     )
+    await _record_llm_call_async(
+        route,
+        started,
+        usage,
+        draft_id=req.draft_id,
+        contract_type=req.context.contract_type_name,
+    )
+    return reply
+
+
+def _finish_chat_turn(
+    req: ContractChatRequest,
+    reply: str,
+    updated_chat_answers: Dict[str, Any],
+) -> ContractChatResponse:
     if _should_prepend_welcome(req.messages):
         reply = _prepend_welcome_if_missing(reply)
 
@@ -588,72 +1644,742 @@ def answer_contract_chat(req: ContractChatRequest) -> ContractChatResponse:
     )
 
 
+def answer_contract_chat(req: ContractChatRequest) -> ContractChatResponse:
+    """
+    Given contract context + chat history, produce the next assistant message.
+
+    Implementation detail:
+    - CONTRACT_CHAT_SYSTEM_PROMPT goes into Anthropic's top-level `system`.
+    - All dynamic context (contract type, answers, clarifying questions, etc.)
+      is sent as a *leading user message* so that `messages` is never empty.
+    - Long histories are compacted (see `chat_history.compact_history`):
+      recent turns verbatim, older ones as a rolling summary refreshed in the
+      background, all under a token ceiling.
+    - Answers given in the new messages are extracted into structured
+      `updated_chat_answers` alongside the reply (see `answer_extraction`).
+    """
+    response, anthropic_messages, updated_chat_answers, history = _plan_chat_turn(req)
+    if response is not None:
+        return response
+
+    _schedule_summary_refresh(req, history)
+    extraction = _EXTRACTION_EXECUTOR.submit(
+        _extract_chat_answers, req, _plan_answer_extraction(req)
+    )
+    reply = _chat_reply(req, anthropic_messages)
+    updated_chat_answers.update(extraction.result())
+    return _finish_chat_turn(req, reply, updated_chat_answers)
+
+
+async def answer_contract_chat_async(req: ContractChatRequest) -> ContractChatResponse:
+    """
+    Async twin of `answer_contract_chat`; awaits the LLM on the event loop.
+    """
+    response, anthropic_messages, updated_chat_answers, history = _plan_chat_turn(req)
+    if response is not None:
+        return response
+
+    _schedule_summary_refresh_async(req, history)
+    reply, extracted = await asyncio.gather(
+        _chat_reply_async(req, anthropic_messages),
+        _extract_chat_answers_async(req, _plan_answer_extraction(req)),
+    )
+    updated_chat_answers.update(extracted)
+    return _finish_chat_turn(req, reply, updated_chat_answers)
+
+
+def _index_answers(
+    questions: List[ContractQuestion],
+    combined_answers: Dict[str, Any],
+    sections: List[PrecedentSection],
+) -> SectionDependencies:
+    # Every template question is indexed, answered or not, so a cleared
+    # answer can still be traced to its sections on regeneration.
+    answer_labels: Dict[str, Optional[str]] = {q.key: q.label for q in questions}
+    for key in combined_answers:
+        answer_labels.setdefault(key, None)
+    return index_section_dependencies(sections, answer_labels)
+
+
+def _prepare_generation(
+    req: GenerateContractRequest,
+    precedent_outline: PrecedentOutline,
+) -> SectionContext:
+    """
+    Build the section context for a generation request: a shared blob plus,
+    per section, only the answers, placeholders and chat turns relevant to
+    it (see `_assemble_section_slice`).
+    """
+    combined_answers = _merge_answers(
+        req.context.form_answers,
+        req.context.chat_answers,
+    )
+    combined_answers, _ = _apply_standard_defaults(
+        req.context.template_questions,
+        combined_answers,
+    )
+    template_meta = _build_template_meta(req.context.template_questions)
+    chat_history = _format_chat_history(req.messages, max_turns=12)
+    # Messages already extracted into chat_answers are represented by those
+    # answers; only the rest is passed on as raw chat.
+    raw_messages = req.messages[
+        extracted_turns(req.context.chat_answers, len(req.messages)):
+    ]
+    turns = _chat_turns(raw_messages, max_turns=12)
+    dependencies = _index_answers(
+        req.context.template_questions,
+        combined_answers,
+        precedent_outline.sections,
+    )
+    shared_answers = {
+        key: combined_answers[key]
+        for key in dependencies.unplaced
+        if key in combined_answers
+    }
+    sections = precedent_outline.sections
+
+    # A chat turn goes to the slices of the sections that depend on an answer
+    # it mentions (every word of the key or question label), and of those it
+    # shares at least two distinctive words with (words used by at most an
+    # eighth of the sections). Turns matching no section stay shared.
+    section_counts: Dict[str, int] = {}
+    for section in sections:
+        for word in section.terms:
+            section_counts[word] = section_counts.get(word, 0) + 1
+    max_count = max(1, len(sections) // 8)
+    key_phrases = {
+        question.key: [
+            words
+            for words in (
+                significant_words(question.key),
+                significant_words(question.label),
+            )
+            if words
+        ]
+        for question in req.context.template_questions
+    }
+    turn_words = [significant_words(turn) for turn in turns]
+    turn_keys = [
+        {
+            key
+            for key, phrases in key_phrases.items()
+            if any(phrase <= words for phrase in phrases)
+        }
+        for words in turn_words
+    ]
+    section_turns: Dict[PrecedentSection, List[Tuple[int, str]]] = {}
+    for section in sections:
+        section_keys = set(dependencies.keys_for(section))
+        scored = []
+        for position, turn in enumerate(turns):
+            key_hits = len(turn_keys[position] & section_keys)
+            distinctive = sum(
+                1
+                for word in turn_words[position] & section.terms
+                if section_counts[word] <= max_count
+            )
+            if key_hits or distinctive >= 2:
+                scored.append((key_hits, distinctive, position, turn))
+        scored.sort(key=lambda item: (-item[0], -item[1], -item[2]))
+        section_turns[section] = [(position, turn) for _, _, position, turn in scored]
+    routed = {position for items in section_turns.values() for position, _ in items}
+    general_turns = [
+        turn for position, turn in enumerate(turns) if position not in routed
+    ]
+
+    slices = {
+        section: _assemble_section_slice(
+            section,
+            {
+                key: combined_answers[key]
+                for key in dependencies.keys_for(section)
+                if key in combined_answers
+            },
+            section_turns[section],
+            SECTION_CONTEXT_TOKEN_BUDGET,
+            _similar_clauses(section, precedent_outline.title),
+        )
+        for section in sections
+    }
+
+    blob_kwargs: Dict[str, Any] = dict(
+        contract_type_name=req.context.contract_type_name,
+        category=req.context.category,
+        jurisdiction=req.context.jurisdiction,
+        precedent_title=precedent_outline.title,
+        precedent_front_matter=precedent_outline.front_matter,
+        precedent_snippets=[
+            snippet.strip()
+            for snippet in req.precedent_snippets or []
+            if snippet and snippet.strip()
+        ],
+    )
+    shared = _build_section_context_blob(
+        **blob_kwargs,
+        # Answered questions already appear with their answers.
+        template_meta=[
+            meta
+            for meta in template_meta
+            if not _normalize_answer_value(combined_answers.get(meta["key"]))
+        ],
+        shared_answers=shared_answers,
+        chat_history="\n".join(general_turns),
+        chat_history_label="Recent chat turns not tied to a single section:",
+        precedent_placeholders=[],
+    )
+    # What every section prompt carried before slimming: all answers, the
+    # whole recent chat and every placeholder.
+    full_prompt_tokens = estimate_tokens(
+        _build_section_context_blob(
+            **blob_kwargs,
+            template_meta=template_meta,
+            shared_answers=combined_answers,
+            chat_history=chat_history,
+            precedent_placeholders=precedent_outline.placeholders,
+        )
+    )
+    shared_tokens = estimate_tokens(shared)
+    slim_prompt_tokens = {
+        section: shared_tokens
+        + estimate_tokens(slices[section])
+        + _section_part_tokens(section)
+        for section in sections
+    }
+
+    logger.info(
+        "generate_contract: start contract_type=%s sections=%d "
+        "shared_answers=%d section_scoped_answers=%d routed_chat_turns=%d/%d "
+        "extracted_messages=%d",
+        req.context.contract_type_name,
+        len(sections),
+        len(shared_answers),
+        len(combined_answers) - len(shared_answers),
+        len(routed),
+        len(turns),
+        len(req.messages) - len(raw_messages),
+    )
+
+    return SectionContext(
+        shared=shared,
+        dependencies=dependencies,
+        slices=slices,
+        full_prompt_tokens=full_prompt_tokens,
+        slim_prompt_tokens=slim_prompt_tokens,
+        draft_id=req.draft_id,
+        contract_type=req.context.contract_type_name,
+    )
+
+
+def _contract_title(
+    req: GenerateContractRequest,
+    precedent_outline: PrecedentOutline,
+) -> str:
+    return (
+        precedent_outline.title
+        or req.context.contract_type_name
+        or "Contract"
+    ).strip().upper()
+
+
+def _finish_generation(
+    req: GenerateContractRequest,
+    precedent_outline: PrecedentOutline,
+    generated_sections: List[str],
+    usage: UsageTotals,
+    context_tokens: Optional[Tuple[int, int]] = None,
+) -> GenerateContractResponse:
+    generated_sections = [text for text in generated_sections if text]
+    contract_text = _stitch_contract(
+        contract_title=_contract_title(req, precedent_outline),
+        front_matter=precedent_outline.front_matter,
+        sections=generated_sections,
+    )
+
+    _log_generation_cost(usage, len(generated_sections), context_tokens)
+    complete_progress(req.draft_id, "Contract ready")
+
+    return GenerateContractResponse(
+        draft_id=req.draft_id,
+        contract_text=contract_text,
+        revision_notes=None,
+    )
+
+
 def generate_contract(req: GenerateContractRequest) -> GenerateContractResponse:
     """
     Generate the full contract text using context, answers, and chat history.
     """
     try:
-        combined_answers = _merge_answers(
-            req.context.form_answers,
-            req.context.chat_answers,
+        precedent_outline = _require_precedent_outline(
+            req.context.contract_type_id,
+            req.context.contract_type_name,
+            req.precedent_outline,
+        )
+        section_context = _prepare_generation(req, precedent_outline)
+
+        init_progress(req.draft_id, len(precedent_outline.sections), "Starting generation")
+        generated_sections, usage = _draft_sections(
+            draft_id=req.draft_id,
+            sections=precedent_outline.sections,
+            section_context=section_context,
         )
-        combined_answers, _ = _apply_standard_defaults(
-            req.context.template_questions,
-            combined_answers,
+
+        return _finish_generation(
+            req,
+            precedent_outline,
+            generated_sections,
+            usage,
+            section_context.token_estimates(precedent_outline.sections),
         )
-        template_meta = _build_template_meta(req.context.template_questions)
-        chat_history = _format_chat_history(req.messages, max_turns=12)
+    except Exception as exc:
+        _fail_generation(req.draft_id, exc)
+        raise
 
-        precedent_outline = _require_precedent_outline(
+
+async def generate_contract_async(
+    req: GenerateContractRequest,
+) -> GenerateContractResponse:
+    """
+    Async twin of `generate_contract`; section drafts are awaited on the
+    event loop instead of occupying threadpool workers.
+    """
+    try:
+        precedent_outline = await _require_precedent_outline_async(
             req.context.contract_type_id,
             req.context.contract_type_name,
             req.precedent_outline,
         )
+        section_context = _prepare_generation(req, precedent_outline)
 
-        logger.info(
-            "generate_contract: start contract_type=%s sections=%d",
-            req.context.contract_type_name,
+        await asyncio.to_thread(
+            init_progress,
+            req.draft_id,
             len(precedent_outline.sections),
+            "Starting generation",
+        )
+        generated_sections, usage = await _draft_sections_async(
+            draft_id=req.draft_id,
+            sections=precedent_outline.sections,
+            section_context=section_context,
         )
 
-        section_context = _build_section_context_blob(
-            contract_type_name=req.context.contract_type_name,
-            category=req.context.category,
-            jurisdiction=req.context.jurisdiction,
-            template_meta=template_meta,
-            combined_answers=combined_answers,
-            chat_history=chat_history,
-            precedent_title=precedent_outline.title,
-            precedent_front_matter=precedent_outline.front_matter,
-            precedent_placeholders=precedent_outline.placeholders,
+        return _finish_generation(
+            req,
+            precedent_outline,
+            generated_sections,
+            usage,
+            section_context.token_estimates(precedent_outline.sections),
         )
+    except Exception as exc:
+        _fail_generation(req.draft_id, exc)
+        raise
 
-        init_progress(req.draft_id, len(precedent_outline.sections), "Starting generation")
-        generated_sections, usage = _draft_sections(
+
+def _normalize_heading(heading: str) -> str:
+    return " ".join(heading.split()).lower()
+
+
+def _split_previous_contract(
+    contract_text: str,
+    sections: List[PrecedentSection],
+) -> List[str]:
+    """
+    Cut a stitched contract back into its sections, in precedent order.
+
+    Every drafted section starts with its precedent heading (see
+    `_ensure_section_heading`), so each section runs from its heading to the
+    next one; the disclaimer after the last section is dropped.
+    """
+    text = contract_text.strip()
+    disclaimer = CONTRACT_DISCLAIMER_TEXT.strip()
+    if disclaimer and text.endswith(disclaimer):
+        text = text[: -len(disclaimer)]
+
+    starts: List[int] = []
+    cursor = 0
+    for section in sections:
+        heading = section.heading.strip()
+        match = None
+        if heading:
+            match = re.compile(
+                r"^[ \t]*" + re.escape(heading),
+                re.IGNORECASE | re.MULTILINE,
+            ).search(text, cursor)
+        if match is None:
+            raise ValueError(
+                f"Could not find section '{heading or 'Untitled section'}' in "
+                "previous_contract_text; pass previous_sections instead."
+            )
+        starts.append(match.start())
+        cursor = match.end()
+
+    ends = starts[1:] + [len(text)]
+    return [text[start:end].strip() for start, end in zip(starts, ends)]
+
+
+def _previous_sections(
+    req: RegenerateContractRequest,
+    sections: List[PrecedentSection],
+) -> List[str]:
+    if req.previous_sections is not None:
+        if len(req.previous_sections) != len(sections):
+            raise ValueError(
+                f"previous_sections has {len(req.previous_sections)} entries; "
+                f"the precedent has {len(sections)} sections."
+            )
+        return [text.strip() for text in req.previous_sections]
+    if req.previous_contract_text:
+        return _split_previous_contract(req.previous_contract_text, sections)
+    raise ValueError("Provide previous_contract_text or previous_sections.")
+
+
+def _regeneration_targets(
+    req: RegenerateContractRequest,
+    sections: List[PrecedentSection],
+    dependencies: SectionDependencies,
+) -> List[int]:
+    if not req.section_headings and not req.changed_answer_keys:
+        raise ValueError("Provide section_headings or changed_answer_keys.")
+
+    targets: Set[int] = set()
+    if req.section_headings:
+        by_heading = {
+            _normalize_heading(section.heading): idx
+            for idx, section in enumerate(sections)
+        }
+        unknown = [
+            heading
+            for heading in req.section_headings
+            if _normalize_heading(heading) not in by_heading
+        ]
+        if unknown:
+            raise ValueError(f"Unknown section headings: {unknown}")
+        targets.update(
+            by_heading[_normalize_heading(heading)]
+            for heading in req.section_headings
+        )
+    if req.changed_answer_keys:
+        affected = dependencies.sections_for(req.changed_answer_keys)
+        if affected is None:
+            logger.info(
+                "regenerate_contract: answer keys %s not traceable to sections; "
+                "redrafting all",
+                req.changed_answer_keys,
+            )
+            targets.update(range(len(sections)))
+        else:
+            affected_set = set(affected)
+            targets.update(
+                idx for idx, section in enumerate(sections) if section in affected_set
+            )
+    return sorted(targets)
+
+
+def _prepare_regeneration(
+    req: RegenerateContractRequest,
+    precedent_outline: PrecedentOutline,
+) -> Tuple[SectionContext, List[str], List[int]]:
+    sections = precedent_outline.sections
+    previous = _previous_sections(req, sections)
+    section_context = _prepare_generation(req, precedent_outline)
+    targets = _regeneration_targets(req, sections, section_context.dependencies)
+    logger.info(
+        "regenerate_contract: redrafting %d of %d sections",
+        len(targets),
+        len(sections),
+    )
+    return section_context, previous, targets
+
+
+def _finish_regeneration(
+    req: RegenerateContractRequest,
+    precedent_outline: PrecedentOutline,
+    section_context: SectionContext,
+    previous: List[str],
+    targets: List[int],
+    redrafted: List[str],
+    usage: UsageTotals,
+) -> RegenerateContractResponse:
+    # `redrafted` has one entry per target, empty drafts included.
+    merged = list(previous)
+    for idx, text in zip(targets, redrafted):
+        merged[idx] = text
+    response = _finish_generation(
+        req,
+        precedent_outline,
+        merged,
+        usage,
+        section_context.token_estimates(
+            precedent_outline.sections[idx] for idx in targets
+        ),
+    )
+    return RegenerateContractResponse(
+        **response.model_dump(),
+        regenerated_sections=[
+            precedent_outline.sections[idx].heading for idx in targets
+        ],
+    )
+
+
+def regenerate_contract(req: RegenerateContractRequest) -> RegenerateContractResponse:
+    """
+    Redraft only the requested (or answer-affected) sections of a previous
+    draft and re-stitch it with the untouched ones.
+    """
+    try:
+        precedent_outline = _require_precedent_outline(
+            req.context.contract_type_id,
+            req.context.contract_type_name,
+            req.precedent_outline,
+        )
+        section_context, previous, targets = _prepare_regeneration(
+            req, precedent_outline
+        )
+
+        init_progress(req.draft_id, len(targets), "Starting regeneration")
+        redrafted, usage = _draft_sections(
             draft_id=req.draft_id,
-            sections=precedent_outline.sections,
+            sections=[precedent_outline.sections[idx] for idx in targets],
+            section_context=section_context,
+            # An explicit heading asks for a new draft, not the cached one.
+            reuse_cached=not req.section_headings,
+        )
+
+        return _finish_regeneration(
+            req,
+            precedent_outline,
+            section_context,
+            previous,
+            targets,
+            redrafted,
+            usage,
+        )
+    except Exception as exc:
+        _fail_generation(req.draft_id, exc)
+        raise
+
+
+async def regenerate_contract_async(
+    req: RegenerateContractRequest,
+) -> RegenerateContractResponse:
+    """
+    Async twin of `regenerate_contract`.
+    """
+    try:
+        precedent_outline = await _require_precedent_outline_async(
+            req.context.contract_type_id,
+            req.context.contract_type_name,
+            req.precedent_outline,
+        )
+        section_context, previous, targets = _prepare_regeneration(
+            req, precedent_outline
+        )
+
+        await asyncio.to_thread(
+            init_progress,
+            req.draft_id,
+            len(targets),
+            "Starting regeneration",
+        )
+        redrafted, usage = await _draft_sections_async(
+            draft_id=req.draft_id,
+            sections=[precedent_outline.sections[idx] for idx in targets],
             section_context=section_context,
+            reuse_cached=not req.section_headings,
+        )
+
+        return _finish_regeneration(
+            req,
+            precedent_outline,
+            section_context,
+            previous,
+            targets,
+            redrafted,
+            usage,
+        )
+    except Exception as exc:
+        _fail_generation(req.draft_id, exc)
+        raise
+
+
+async def stream_contract_async(
+    req: GenerateContractRequest,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Generate the contract as a stream of `(event, payload)` pairs.
+
+    Events, in order:
+    - `start`: title, front matter and section count.
+    - `delta`: token deltas for the section currently being emitted.
+    - `section`: the finished text of one section.
+    - `section_error`: a section that failed; discard its deltas. The stream
+      goes on with the next section and ends with `error` (see
+      `SectionDraftError`).
+    - `disclaimer`, `usage`, then `done` with the stitched contract text.
+    - `error` replaces the remainder of the stream if generation fails.
+
+    Sections are drafted concurrently (bounded like `_draft_sections_async`)
+    but emitted strictly in precedent order: deltas for later sections are
+    buffered until every earlier section has been sent.
+    """
+    tasks: List[asyncio.Task] = []
+    try:
+        precedent_outline = await _require_precedent_outline_async(
+            req.context.contract_type_id,
+            req.context.contract_type_name,
+            req.precedent_outline,
+        )
+        section_context = _prepare_generation(req, precedent_outline)
+        sections = precedent_outline.sections
+        total_sections = len(sections)
+        contract_title = _contract_title(req, precedent_outline)
+
+        await asyncio.to_thread(
+            init_progress,
+            req.draft_id,
+            total_sections,
+            "Starting generation",
         )
+        yield "start", {
+            "draft_id": req.draft_id,
+            "title": contract_title,
+            "front_matter": list(precedent_outline.front_matter),
+            "total_sections": total_sections,
+        }
 
-        contract_title = (
-            precedent_outline.title
-            or req.context.contract_type_name
-            or "Contract"
-        ).strip().upper()
+        queues: List[asyncio.Queue] = [asyncio.Queue() for _ in sections]
+        semaphore = asyncio.Semaphore(max(1, SECTION_DRAFT_CONCURRENCY))
+        warmed: Optional[asyncio.Event] = None
+        if _warm_prompt_cache_first(SECTION_DRAFT_CONCURRENCY, total_sections):
+            warmed = asyncio.Event()
+
+        async def _run(idx: int) -> None:
+            queue = queues[idx]
+
+            def _on_delta(delta: str) -> None:
+                # The cache entry is usable once the first response starts
+                # streaming, so later sections need not wait for it to end.
+                if warmed is not None and not idx:
+                    warmed.set()
+                queue.put_nowait(("delta", delta))
+
+            try:
+                route = _section_route(section_context, sections[idx])
+                cache_key = _section_cache_key(
+                    section_context, sections[idx], route.model
+                )
+                cached = await asyncio.to_thread(
+                    _reusable_section, section_context, cache_key
+                )
+                if cached is not None:
+                    queue.put_nowait(("delta", cached))
+                    queue.put_nowait(
+                        ("done", (cached, _cached_section_usage(route.model)))
+                    )
+                    return
+                if warmed is not None and idx:
+                    await warmed.wait()
+                async with semaphore:
+                    started = time.perf_counter()
+                    text, usage = await ml_service.call_llm_text_streaming_async(
+                        messages=_build_section_messages(
+                            section_context, sections[idx]
+                        ),
+                        on_delta=_on_delta,
+                        model=route.model,
+                        system=CONTRACT_SECTION_SYSTEM_PROMPT,
+                        max_tokens=_SECTION_MAX_TOKENS,
+                        temperature=_SECTION_TEMPERATURE,
+                    )
+                    await _record_llm_call_async(
+                        route,
+                        started,
+                        usage,
+                        draft_id=section_context.draft_id,
+                        contract_type=section_context.contract_type,
+                    )
+                await asyncio.to_thread(
+                    put_cached_section,
+                    cache_key,
+                    _ensure_section_heading(text, sections[idx].heading),
+                )
+                queue.put_nowait(("done", (text, usage)))
+            except Exception as exc:
+                queue.put_nowait(("error", exc))
+            finally:
+                if warmed is not None and not idx:
+                    warmed.set()
+
+        tasks = [asyncio.create_task(_run(idx)) for idx in range(total_sections)]
+
+        drafted: List[Optional[str]] = [None] * total_sections
+        usages: List[Dict[str, Any]] = []
+        failures: Dict[int, BaseException] = {}
+        for idx, section in enumerate(sections):
+            update_progress(
+                req.draft_id,
+                idx,
+                total_sections,
+                _progress_label(section.heading, idx + 1, total_sections),
+            )
+            while True:
+                kind, value = await queues[idx].get()
+                if kind == "delta":
+                    yield "delta", {"index": idx, "text": value}
+                    continue
+                break
+
+            if kind == "error":
+                failures[idx] = value
+                _log_section_failure(req.draft_id, section, value)
+                yield "section_error", {
+                    "index": idx,
+                    "heading": section.heading,
+                    "message": str(value),
+                }
+                continue
+            text, usage = value
+            usages.append(usage)
+            section_text = _ensure_section_heading(text, section.heading)
+            drafted[idx] = section_text
+            yield "section", {
+                "index": idx,
+                "heading": section.heading,
+                "text": section_text,
+            }
+
+        _raise_section_failures(section_context, sections, drafted, failures)
+        generated_sections = [text for text in drafted if text]
+        usage_totals = _sum_usage(usages)
         contract_text = _stitch_contract(
             contract_title=contract_title,
             front_matter=precedent_outline.front_matter,
             sections=generated_sections,
         )
-
-        _log_generation_cost(usage, len(generated_sections))
+        _log_generation_cost(
+            usage_totals,
+            len(generated_sections),
+            section_context.token_estimates(sections),
+        )
         complete_progress(req.draft_id, "Contract ready")
 
-        return GenerateContractResponse(
-            draft_id=req.draft_id,
-            contract_text=contract_text,
-            revision_notes=None,
-        )
+        yield "disclaimer", {"text": CONTRACT_DISCLAIMER_TEXT}
+        yield "usage", {
+            "model": usage_totals.model or ml_service.model,
+            "input_tokens": usage_totals.input_tokens,
+            "output_tokens": usage_totals.output_tokens,
+            "cache_creation_input_tokens": usage_totals.cache_creation_input_tokens,
+            "cache_read_input_tokens": usage_totals.cache_read_input_tokens,
+            "section_cache_hits": usage_totals.section_cache_hits,
+            "cost_usd": round(usage_totals.cost_usd, 6),
+        }
+        yield "done", {"draft_id": req.draft_id, "contract_text": contract_text}
     except Exception as exc:
-        fail_progress(req.draft_id, str(exc))
-        raise
+        logger.exception("stream_contract: generation failed draft_id=%s", req.draft_id)
+        _fail_generation(req.draft_id, exc)
+        yield "error", {"draft_id": req.draft_id, "message": str(exc)}
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
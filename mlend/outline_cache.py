@@ -0,0 +1,177 @@
+# outline_cache.py
+import hashlib
+import marshal
+import mmap
+import os
+import tempfile
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from constants import OUTLINE_CACHE_BACKEND, OUTLINE_CACHE_DIR
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Outline files start with this header; bump the digit when the stored
+# layout changes. The marshal version guards against Python upgrades.
+_HEADER = b"MLO1" + bytes([marshal.version])
+_HASH_CHUNK = 1 << 20
+
+# (size, mtime_ns, ctime_ns, inode): if none of these changed, neither did
+# the file's content.
+_StatKey = Tuple[int, int, int, int]
+
+_LOCK = Lock()
+_STATS = {
+    "hits": 0,
+    "misses": 0,
+    "errors": 0,
+    "digests_from_stat": 0,
+    "digests_hashed": 0,
+}
+# resolved path -> (stat key, content digest)
+_DIGESTS: Dict[str, Tuple[_StatKey, str]] = {}
+
+
+def _count(name: str) -> None:
+    with _LOCK:
+        _STATS[name] += 1
+
+
+def _enabled() -> bool:
+    return OUTLINE_CACHE_BACKEND.strip().lower() != "off"
+
+
+def _cache_dir() -> Path:
+    return Path(OUTLINE_CACHE_DIR or os.path.join("cache", "outlines"))
+
+
+def _stat_key(path: Path) -> _StatKey:
+    st = path.stat()
+    return (st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino)
+
+
+def _write_atomic(target: Path, data: bytes) -> None:
+    # Concurrent writers produce the same bytes; os.replace makes the last
+    # one win without readers ever seeing a partial file.
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _index_path(resolved: str) -> Path:
+    name = hashlib.sha1(resolved.encode("utf-8")).hexdigest()
+    return _cache_dir() / "paths" / name
+
+
+def file_digest(path: Path) -> str:
+    """
+    SHA-256 of the file's content. Hashing is skipped while the file's
+    size, mtime, ctime and inode match the last time it was hashed, by this
+    process or (through a small per-path index on disk) any other.
+    """
+    resolved = str(path.resolve())
+    stat_key = _stat_key(path)
+    with _LOCK:
+        known = _DIGESTS.get(resolved)
+    if known is None:
+        try:
+            stored_key, stored_digest = marshal.loads(
+                _index_path(resolved).read_bytes()
+            )
+            known = (tuple(stored_key), stored_digest)
+        except (OSError, EOFError, ValueError, TypeError):
+            known = None
+    if known is not None and known[0] == stat_key:
+        _count("digests_from_stat")
+        digest = known[1]
+    else:
+        _count("digests_hashed")
+        digest = _hash_file(path)
+        try:
+            _write_atomic(_index_path(resolved), marshal.dumps((stat_key, digest)))
+        except OSError:
+            _count("errors")
+            logger.exception("outline_cache: index write failed for %s", path)
+    with _LOCK:
+        _DIGESTS[resolved] = (stat_key, digest)
+    return digest
+
+
+def _outline_path(digest: str, parser_version: str) -> Path:
+    return _cache_dir() / digest[:2] / f"{digest}-p{parser_version}.bin"
+
+
+def _read_outline(target: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with target.open("rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm:
+            if mm[: len(_HEADER)] != _HEADER:
+                return None
+            with memoryview(mm) as view, view[len(_HEADER) :] as body:
+                return marshal.loads(body)
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError, TypeError):
+        # Unreadable or truncated: treat as a miss and rewrite it.
+        _count("errors")
+        logger.exception("outline_cache: could not read %s", target)
+        return None
+
+
+def load_outline(
+    path: Path,
+    parser_version: str,
+    build: Callable[[Path], Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    The outline `build(path)` would return, from the disk cache when a file
+    with the same content was parsed by the same `parser_version`.
+    """
+    if not _enabled():
+        return build(path)
+    target = _outline_path(file_digest(path), parser_version)
+    outline = _read_outline(target)
+    if outline is not None:
+        _count("hits")
+        return outline
+    _count("misses")
+    outline = build(path)
+    try:
+        _write_atomic(target, _HEADER + marshal.dumps(outline))
+    except (OSError, ValueError):
+        # A broken cache must never fail a load.
+        _count("errors")
+        logger.exception("outline_cache: write failed for %s", path)
+    return outline
+
+
+def get_outline_cache_stats() -> Dict[str, Any]:
+    with _LOCK:
+        counters = dict(_STATS)
+    lookups = counters["hits"] + counters["misses"]
+    return {
+        "backend": "disk" if _enabled() else "off",
+        "path": str(_cache_dir()),
+        **counters,
+        "hit_ratio": round(counters["hits"] / lookups, 4) if lookups else None,
+    }
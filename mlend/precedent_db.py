@@ -1,9 +1,29 @@
 # precedent_db.py
 import os
-from typing import Optional, Dict, Any, List
+from contextlib import asynccontextmanager, contextmanager
+from threading import Event, Lock, Thread
+from typing import Optional, Dict, Any, AsyncIterator, Callable, Iterator, List, Set
 
 import psycopg
+from psycopg import sql
 from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from constants import (
+    DB_POOL_MAX_IDLE_SECONDS,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_MIN_SIZE,
+    DB_POOL_TIMEOUT_SECONDS,
+)
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Process-wide pools, opened lazily on first use. The async pool is bound
+# to the event loop that first used it (the FastAPI loop).
+_POOL: Optional[ConnectionPool] = None
+_ASYNC_POOL: Optional[AsyncConnectionPool] = None
+_POOL_LOCK = Lock()
 
 
 def _get_db_url() -> str:
@@ -14,35 +34,187 @@ def _get_db_url() -> str:
     )
 
 
-def _connect():
+def has_database_url() -> bool:
+    return bool(_get_db_url())
+
+
+def _require_db_url() -> str:
     db_url = _get_db_url()
     if not db_url:
         raise ValueError(
             "Database URL not set. Provide MLEND_DATABASE_URL or DATABASE_URL."
         )
-    return psycopg.connect(db_url, row_factory=dict_row)
+    return db_url
+
+
+def _pool_options() -> Dict[str, Any]:
+    return {
+        "kwargs": {"row_factory": dict_row},
+        "min_size": DB_POOL_MIN_SIZE,
+        "max_size": max(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE),
+        "timeout": DB_POOL_TIMEOUT_SECONDS,
+        "max_idle": DB_POOL_MAX_IDLE_SECONDS,
+    }
 
 
-def _fetch_one(query: str, params: tuple) -> Optional[Dict[str, Any]]:
-    with _connect() as conn:
+def _get_pool() -> ConnectionPool:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                pool = ConnectionPool(
+                    _require_db_url(),
+                    name="mlend",
+                    check=ConnectionPool.check_connection,
+                    open=False,
+                    **_pool_options(),
+                )
+                pool.open()
+                _POOL = pool
+                logger.info(
+                    "precedent_db: opened pool min=%d max=%d",
+                    pool.min_size,
+                    pool.max_size,
+                )
+    return _POOL
+
+
+async def _get_async_pool() -> AsyncConnectionPool:
+    global _ASYNC_POOL
+    if _ASYNC_POOL is None:
+        pool = AsyncConnectionPool(
+            _require_db_url(),
+            name="mlend-async",
+            check=AsyncConnectionPool.check_connection,
+            open=False,
+            **_pool_options(),
+        )
+        await pool.open()
+        if _ASYNC_POOL is None:
+            _ASYNC_POOL = pool
+            logger.info(
+                "precedent_db: opened async pool min=%d max=%d",
+                pool.min_size,
+                pool.max_size,
+            )
+        else:
+            # Another task won the race while we were opening.
+            await pool.close()
+    return _ASYNC_POOL
+
+
+@contextmanager
+def db_connection() -> Iterator[psycopg.Connection]:
+    """
+    Borrow a pooled connection (dict rows) using the mlend database settings.
+
+    The transaction is committed on clean exit and rolled back on error.
+    """
+    with _get_pool().connection() as conn:
+        yield conn
+
+
+@asynccontextmanager
+async def async_db_connection() -> AsyncIterator[psycopg.AsyncConnection]:
+    """
+    Async twin of `db_connection`, backed by the async pool.
+    """
+    pool = await _get_async_pool()
+    async with pool.connection() as conn:
+        yield conn
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Pool sizes and wait metrics (psycopg_pool `get_stats`), per pool.
+    """
+    stats: Dict[str, Any] = {}
+    for label, pool in (("sync", _POOL), ("async", _ASYNC_POOL)):
+        if pool is None:
+            stats[label] = {"open": False}
+            continue
+        stats[label] = {
+            "open": not pool.closed,
+            "min_size": pool.min_size,
+            "max_size": pool.max_size,
+            **pool.get_stats(),
+        }
+    return stats
+
+
+def close_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.close()
+        _POOL = None
+
+
+async def close_async_pool() -> None:
+    global _ASYNC_POOL
+    pool, _ASYNC_POOL = _ASYNC_POOL, None
+    if pool is not None:
+        await pool.close()
+
+
+def _fetch_one(query: str, params: Any) -> Optional[Dict[str, Any]]:
+    with db_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(query, params)
             row = cur.fetchone()
             return dict(row) if row else None
 
 
-def _fetch_sections(query: str, params: tuple) -> List[Dict[str, Any]]:
-    with _connect() as conn:
+def _fetch_all(query: str, params: Any) -> List[Dict[str, Any]]:
+    with db_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(query, params)
             rows = cur.fetchall()
             return [dict(row) for row in rows]
 
 
+async def _fetch_one_async(query: str, params: Any) -> Optional[Dict[str, Any]]:
+    async with async_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(query, params)
+            row = await cur.fetchone()
+            return dict(row) if row else None
+
+
+async def _fetch_all_async(query: str, params: Any) -> List[Dict[str, Any]]:
+    async with async_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(query, params)
+            rows = await cur.fetchall()
+            return [dict(row) for row in rows]
+
+
+_TABLE_EXISTS_SQL = "SELECT to_regclass(%s) AS name"
+
+# `precedent_sections` only exists once the backend has created it. Once a
+# table is seen it is assumed to stay; a missing one is checked again on the
+# next query so a later migration is picked up without a restart.
+_EXISTING_TABLES: Set[str] = set()
+
+
 def _table_exists(table_name: str) -> bool:
-    sql = "SELECT to_regclass(%s) AS name"
-    row = _fetch_one(sql, (f"public.{table_name}",))
-    return bool(row and row.get("name"))
+    if table_name in _EXISTING_TABLES:
+        return True
+    row = _fetch_one(_TABLE_EXISTS_SQL, (f"public.{table_name}",))
+    exists = bool(row and row.get("name"))
+    if exists:
+        _EXISTING_TABLES.add(table_name)
+    return exists
+
+
+async def _table_exists_async(table_name: str) -> bool:
+    if table_name in _EXISTING_TABLES:
+        return True
+    row = await _fetch_one_async(_TABLE_EXISTS_SQL, (f"public.{table_name}",))
+    exists = bool(row and row.get("name"))
+    if exists:
+        _EXISTING_TABLES.add(table_name)
+    return exists
 
 
 def _normalize_sections(raw_sections: Any) -> List[Dict[str, Any]]:
@@ -63,81 +235,147 @@ def _normalize_sections(raw_sections: Any) -> List[Dict[str, Any]]:
     return normalized
 
 
-def _query_doc_by_contract_type_id(contract_type_id: str) -> Optional[Dict[str, Any]]:
-    sql = """
-        SELECT
-            title,
-            front_matter,
-            placeholders,
-            sections
-        FROM precedent_documents
-        WHERE "contractTypeId" = %s
-        ORDER BY created_at DESC
-        LIMIT 1
-    """
-    return _fetch_one(sql, (contract_type_id,))
-
+# Lookup keys: the contract type id (priority 0) and every contract type
+# with the given name (priority 1).
+_KEYS_CTE = """
+    WITH keys AS (
+        SELECT 0 AS priority, ARRAY[%(contract_type_id)s::uuid] AS type_ids
+        WHERE %(contract_type_id)s::uuid IS NOT NULL
+        UNION ALL
+        SELECT 1 AS priority, array_agg(ct.id) AS type_ids
+        FROM contract_types ct
+        WHERE ct.name = %(contract_type_name)s
+        HAVING count(*) > 0
+    )
+"""
 
-def _query_doc_by_contract_type_name(contract_type_name: str) -> Optional[Dict[str, Any]]:
-    sql = """
+# One round trip for the whole lookup. For each key the latest precedent
+# document and the ordered `precedent_sections` rows are fetched via LATERAL
+# joins; the fallback order itself is applied in Python by
+# `_outline_from_rows`.
+_OUTLINE_SQL = _KEYS_CTE + """
+    SELECT
+        k.priority,
+        d.title,
+        d.front_matter,
+        d.placeholders,
+        d.sections,
+        d.created_at,
+        {table_sections} AS table_sections,
+        {documents_version} AS documents_version,
+        {sections_version} AS sections_version
+    FROM keys k
+    LEFT JOIN LATERAL (
         SELECT
             p.title,
             p.front_matter,
             p.placeholders,
-            p.sections
+            p.sections,
+            p.created_at
         FROM precedent_documents p
-        JOIN contract_types ct ON p."contractTypeId" = ct.id
-        WHERE ct.name = %s
+        WHERE p."contractTypeId" = ANY(k.type_ids)
         ORDER BY p.created_at DESC
         LIMIT 1
-    """
-    return _fetch_one(sql, (contract_type_name,))
+    ) d ON true
+    {sections_join}
+    ORDER BY k.priority
+"""
 
+# Cheap probe returning the same per-key version fields as `_OUTLINE_SQL`,
+# used to revalidate cached outlines without refetching them.
+_VERSION_SQL = _KEYS_CTE + """
+    SELECT
+        k.priority,
+        {documents_version} AS documents_version,
+        {sections_version} AS sections_version
+    FROM keys k
+    ORDER BY k.priority
+"""
 
-def _query_sections_by_contract_type_id(contract_type_id: str) -> List[Dict[str, Any]]:
-    if not _table_exists("precedent_sections"):
-        return []
-    sql = """
-        SELECT
-            section_key,
-            heading,
-            text,
-            start_paragraph_idx,
-            end_paragraph_idx
-        FROM precedent_sections
-        WHERE "contractTypeId" = %s
-        ORDER BY
-            start_paragraph_idx NULLS LAST,
-            end_paragraph_idx NULLS LAST,
-            section_key
-    """
-    return _fetch_sections(sql, (contract_type_id,))
-
-
-def _query_sections_by_contract_type_name(contract_type_name: str) -> List[Dict[str, Any]]:
-    if not _table_exists("precedent_sections"):
-        return []
-    sql = """
-        SELECT
-            s.section_key,
-            s.heading,
-            s.text,
-            s.start_paragraph_idx,
-            s.end_paragraph_idx
+# Per-key content versions. Every insert, update or delete of a row changes
+# its xmin (and an update its ctid), so hashing these changes whenever a
+# precedent is re-ingested, in place or not, without reading the JSON.
+_DOCUMENTS_VERSION_SQL = """(
+    SELECT md5(coalesce(
+        string_agg(p.id::text || ':' || p.xmin::text, ',' ORDER BY p.id), ''
+    ))
+    FROM precedent_documents p
+    WHERE p."contractTypeId" = ANY(k.type_ids)
+)"""
+
+_SECTIONS_VERSION_SQL = """(
+    SELECT md5(coalesce(
+        string_agg(s.ctid::text || ':' || s.xmin::text, ',' ORDER BY s.ctid), ''
+    ))
+    FROM precedent_sections s
+    WHERE s."contractTypeId" = ANY(k.type_ids)
+)"""
+
+_SECTIONS_JOIN_SQL = """
+    LEFT JOIN LATERAL (
+        SELECT json_agg(
+            json_build_object('heading', s.heading, 'text', s.text)
+            ORDER BY
+                s.start_paragraph_idx NULLS LAST,
+                s.end_paragraph_idx NULLS LAST,
+                s.section_key
+        ) AS sections
         FROM precedent_sections s
-        JOIN contract_types ct ON s."contractTypeId" = ct.id
-        WHERE ct.name = %s
-        ORDER BY
-            s.start_paragraph_idx NULLS LAST,
-            s.end_paragraph_idx NULLS LAST,
-            s.section_key
+        WHERE s."contractTypeId" = ANY(k.type_ids)
+    ) ts ON true
+"""
+
+
+def _outline_sql(with_sections_table: bool) -> str:
+    if with_sections_table:
+        return _OUTLINE_SQL.format(
+            table_sections="ts.sections",
+            documents_version=_DOCUMENTS_VERSION_SQL,
+            sections_version=_SECTIONS_VERSION_SQL,
+            sections_join=_SECTIONS_JOIN_SQL,
+        )
+    return _OUTLINE_SQL.format(
+        table_sections="NULL::json",
+        documents_version=_DOCUMENTS_VERSION_SQL,
+        sections_version="''",
+        sections_join="",
+    )
+
+
+def _version_sql(with_sections_table: bool) -> str:
+    return _VERSION_SQL.format(
+        documents_version=_DOCUMENTS_VERSION_SQL,
+        sections_version=_SECTIONS_VERSION_SQL if with_sections_table else "''",
+    )
+
+
+def _rows_version(rows: List[Dict[str, Any]]) -> str:
     """
-    return _fetch_sections(sql, (contract_type_name,))
+    Version tag for a lookup: the content versions of the key's documents
+    and `precedent_sections` rows. Changes whenever a precedent is inserted,
+    updated in place, or deleted.
+    """
+    return ";".join(
+        f"{row.get('priority')}:{row.get('documents_version') or ''}"
+        f":{row.get('sections_version') or ''}"
+        for row in rows
+    )
+
+
+def _outline_params(
+    contract_type_id: Optional[str],
+    contract_type_name: Optional[str],
+) -> Dict[str, Any]:
+    return {
+        "contract_type_id": contract_type_id or None,
+        "contract_type_name": contract_type_name or None,
+    }
 
 
 def _build_outline(
     doc: Optional[Dict[str, Any]],
     sections: List[Dict[str, Any]],
+    version: Optional[str] = None,
 ) -> Optional[Dict[str, Any]]:
     if not sections:
         return None
@@ -146,46 +384,194 @@ def _build_outline(
         "front_matter": list((doc or {}).get("front_matter") or []),
         "placeholders": list((doc or {}).get("placeholders") or []),
         "sections": sections,
+        "version": version,
     }
 
 
+def _outline_from_rows(rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Apply the lookup priority to the rows of `_OUTLINE_SQL`.
+
+    Per key (id first, then name): the document's own `sections` JSON wins,
+    then the `precedent_sections` table rows.
+    """
+    version = _rows_version(rows)
+    for row in rows:
+        doc = row if row.get("created_at") is not None else None
+        outline = _build_outline(
+            doc,
+            _normalize_sections(row.get("sections")),
+            version,
+        )
+        if outline:
+            return outline
+
+        outline = _build_outline(
+            doc,
+            _normalize_sections(row.get("table_sections")),
+            version,
+        )
+        if outline:
+            return outline
+
+    return None
+
+
 def get_precedent_outline_from_db(
     contract_type_id: Optional[str],
     contract_type_name: Optional[str],
 ) -> Optional[Dict[str, Any]]:
     """
-    Fetch a precedent outline from the database.
+    Fetch a precedent outline from the database in a single query.
 
     Priority:
     1) contract_type_id
     2) contract_type_name
     """
-    if contract_type_id:
-        doc = _query_doc_by_contract_type_id(contract_type_id)
-        doc_sections = _normalize_sections((doc or {}).get("sections"))
-        outline = _build_outline(doc, doc_sections)
-        if outline:
-            return outline
+    if not contract_type_id and not contract_type_name:
+        return None
+    query = _outline_sql(_table_exists("precedent_sections"))
+    rows = _fetch_all(query, _outline_params(contract_type_id, contract_type_name))
+    return _outline_from_rows(rows)
 
-        table_sections = _normalize_sections(
-            _query_sections_by_contract_type_id(contract_type_id)
-        )
-        outline = _build_outline(doc, table_sections)
-        if outline:
-            return outline
 
-    if contract_type_name:
-        doc = _query_doc_by_contract_type_name(contract_type_name)
-        doc_sections = _normalize_sections((doc or {}).get("sections"))
-        outline = _build_outline(doc, doc_sections)
-        if outline:
-            return outline
+async def get_precedent_outline_from_db_async(
+    contract_type_id: Optional[str],
+    contract_type_name: Optional[str],
+) -> Optional[Dict[str, Any]]:
+    """
+    Async twin of `get_precedent_outline_from_db`, using the async pool.
+    """
+    if not contract_type_id and not contract_type_name:
+        return None
+    query = _outline_sql(await _table_exists_async("precedent_sections"))
+    rows = await _fetch_all_async(
+        query,
+        _outline_params(contract_type_id, contract_type_name),
+    )
+    return _outline_from_rows(rows)
 
-        table_sections = _normalize_sections(
-            _query_sections_by_contract_type_name(contract_type_name)
-        )
-        outline = _build_outline(doc, table_sections)
-        if outline:
-            return outline
 
-    return None
+def get_precedent_version_from_db(
+    contract_type_id: Optional[str],
+    contract_type_name: Optional[str],
+) -> Optional[str]:
+    """
+    Return the version tag of the outline `get_precedent_outline_from_db`
+    would load, without fetching the outline itself.
+    """
+    if not contract_type_id and not contract_type_name:
+        return None
+    query = _version_sql(_table_exists("precedent_sections"))
+    rows = _fetch_all(query, _outline_params(contract_type_id, contract_type_name))
+    return _rows_version(rows)
+
+
+async def get_precedent_version_from_db_async(
+    contract_type_id: Optional[str],
+    contract_type_name: Optional[str],
+) -> Optional[str]:
+    if not contract_type_id and not contract_type_name:
+        return None
+    query = _version_sql(await _table_exists_async("precedent_sections"))
+    rows = await _fetch_all_async(
+        query,
+        _outline_params(contract_type_id, contract_type_name),
+    )
+    return _rows_version(rows)
+
+
+# Every precedent's sections, for building the retrieval index: one row per
+# document, plus one per contract type with `precedent_sections` rows.
+_CORPUS_SQL = """
+    SELECT p.id::text AS precedent_id, p.title, p.sections
+    FROM precedent_documents p
+    WHERE p.sections IS NOT NULL
+"""
+
+_SECTIONS_CORPUS_SQL = """
+    SELECT
+        'type:' || s."contractTypeId"::text AS precedent_id,
+        max(ct.name) AS title,
+        json_agg(
+            json_build_object('heading', s.heading, 'text', s.text)
+            ORDER BY
+                s.start_paragraph_idx NULLS LAST,
+                s.end_paragraph_idx NULLS LAST,
+                s.section_key
+        ) AS sections
+    FROM precedent_sections s
+    LEFT JOIN contract_types ct ON ct.id = s."contractTypeId"
+    GROUP BY s."contractTypeId"
+"""
+
+
+def get_precedent_corpus_from_db() -> List[Dict[str, Any]]:
+    """
+    `{"precedent_id", "title", "sections"}` for every stored precedent, with
+    sections normalized to `{"heading", "body"}`.
+    """
+    rows = _fetch_all(_CORPUS_SQL, None)
+    if _table_exists("precedent_sections"):
+        rows += _fetch_all(_SECTIONS_CORPUS_SQL, None)
+    corpus = []
+    for row in rows:
+        sections = _normalize_sections(row.get("sections"))
+        if sections:
+            corpus.append(
+                {
+                    "precedent_id": row["precedent_id"],
+                    "title": row.get("title"),
+                    "sections": sections,
+                }
+            )
+    return corpus
+
+
+def _listen_loop(
+    channel: str,
+    on_notify: Callable[[str], None],
+    stop: Event,
+) -> None:
+    backoff = 1.0
+    while not stop.is_set():
+        try:
+            with psycopg.connect(_require_db_url(), autocommit=True) as conn:
+                conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+                logger.info("precedent_db: listening on channel %s", channel)
+                backoff = 1.0
+                while not stop.is_set():
+                    for notify in conn.notifies(timeout=1.0):
+                        on_notify(notify.payload)
+        except Exception:
+            logger.exception(
+                "precedent_db: listener on %s failed; retrying in %.0fs",
+                channel,
+                backoff,
+            )
+            stop.wait(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+
+def start_precedent_listener(
+    channel: str,
+    on_notify: Callable[[str], None],
+) -> Callable[[], None]:
+    """
+    LISTEN on `channel` in a daemon thread and call `on_notify(payload)` for
+    every NOTIFY (e.g. sent by precedent ingestion). Returns a stop function.
+    """
+    stop = Event()
+    thread = Thread(
+        target=_listen_loop,
+        args=(channel, on_notify, stop),
+        name=f"precedent-listener-{channel}",
+        daemon=True,
+    )
+    thread.start()
+
+    def _stop() -> None:
+        stop.set()
+        thread.join(timeout=5)
+
+    return _stop
@@ -0,0 +1,485 @@
+# precedent_index.py
+"""
+Section-level retrieval over every precedent: a BM25 inverted index that
+finds clauses from other precedents similar to the section being drafted.
+
+The index is one file. Its vocabulary and section metadata are unmarshalled
+on load, while postings, length norms and clause texts stay in a read-only
+memory map. Build it after ingesting precedents:
+
+    python precedent_index.py --from-db            # precedent_documents/_sections
+    python precedent_index.py [DIR]                # .docx files under DIR
+"""
+import argparse
+import hashlib
+import heapq
+import marshal
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from operator import itemgetter
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from constants import PRECEDENT_INDEX_PATH, PRECEDENT_SNIPPETS_PER_SECTION
+from logger import get_logger
+from precedent_repo import significant_word_list
+
+logger = get_logger(__name__)
+
+# Bump the digit when the file layout changes.
+_MAGIC = b"MLPI1"
+_META_LENGTH = struct.Struct("<Q")
+_K1 = 1.2
+_B = 0.75
+# A query is the heading's words plus this many of the body's rarest words;
+# heading words count double.
+_QUERY_BODY_TERMS = 12
+_HEADING_WEIGHT = 2.0
+# How often a running process checks whether the index file was rebuilt.
+_RECHECK_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class SimilarSection:
+    precedent_id: str
+    precedent_title: str
+    heading: str
+    body: str
+    score: float
+
+
+def _default_index_path() -> str:
+    return os.path.join("cache", "precedent-index.bin")
+
+
+def _index_path() -> str:
+    return PRECEDENT_INDEX_PATH or _default_index_path()
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(" ".join(text.split()).lower().encode("utf-8")).hexdigest()
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def build_index(corpus: Iterable[Dict[str, Any]], path: str) -> Dict[str, Any]:
+    """
+    Write the index for `corpus` (`{"precedent_id", "title", "sections"}`
+    items, sections as `{"heading", "body"}`) to `path`, replacing any
+    previous file atomically. Returns counts.
+    """
+    docs: List[Tuple[str, str, str, str]] = []
+    bodies: List[bytes] = []
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    lengths: List[int] = []
+    for precedent in corpus:
+        precedent_id = str(precedent.get("precedent_id") or "")
+        title = str(precedent.get("title") or "")
+        for section in precedent.get("sections") or ():
+            heading = str(section.get("heading") or "").strip()
+            body = str(section.get("body") or "").strip()
+            if not body:
+                continue
+            words = significant_word_list(f"{heading}\n{body}")
+            if not words:
+                continue
+            doc = len(docs)
+            docs.append((precedent_id, title, heading, _text_hash(body)))
+            bodies.append(body.encode("utf-8"))
+            lengths.append(len(words))
+            for term, tf in Counter(words).items():
+                postings.setdefault(term, []).append((doc, tf))
+
+    avgdl = sum(lengths) / len(lengths) if lengths else 0.0
+    norms = array(
+        "f",
+        (_K1 * (1 - _B + _B * length / avgdl) for length in lengths),
+    )
+    doc_ids = array("I")
+    tfs = array("f")
+    terms: Dict[str, Tuple[int, int]] = {}
+    for term in sorted(postings):
+        terms[term] = (len(doc_ids), len(postings[term]))
+        for doc, tf in postings[term]:
+            doc_ids.append(doc)
+            tfs.append(tf)
+    text_offsets = array("Q", [0])
+    for body in bodies:
+        text_offsets.append(text_offsets[-1] + len(body))
+
+    blocks = {
+        "doc_ids": doc_ids.tobytes(),
+        "tfs": tfs.tobytes(),
+        "norms": norms.tobytes(),
+        "text_offsets": text_offsets.tobytes(),
+        "texts": b"".join(bodies),
+    }
+    layout: Dict[str, Tuple[int, int]] = {}
+    offset = 0
+    for name, data in blocks.items():
+        layout[name] = (offset, len(data))
+        offset = _aligned(offset + len(data))
+    meta = marshal.dumps(
+        {
+            "byteorder": sys.byteorder,
+            "count": len(docs),
+            "avgdl": avgdl,
+            "terms": terms,
+            "docs": docs,
+            "layout": layout,
+            "built_at": time.time(),
+        }
+    )
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory or ".", prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            header = _MAGIC + _META_LENGTH.pack(len(meta)) + meta
+            f.write(header)
+            base = _aligned(len(header))
+            f.write(b"\0" * (base - len(header)))
+            for name, data in blocks.items():
+                f.write(data)
+                f.write(b"\0" * (_aligned(len(data)) - len(data)))
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return {"sections": len(docs), "terms": len(terms), "path": path}
+
+
+class PrecedentIndex:
+    """
+    A loaded index file. Safe to share between threads (read-only).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[: len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{path} is not a precedent index (or an old one)")
+        (meta_length,) = _META_LENGTH.unpack_from(self._mm, len(_MAGIC))
+        meta_start = len(_MAGIC) + _META_LENGTH.size
+        meta = marshal.loads(self._mm[meta_start : meta_start + meta_length])
+        if meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was built on a {meta['byteorder']}-endian host")
+        self.count: int = meta["count"]
+        self.built_at: float = meta["built_at"]
+        self._terms: Dict[str, Tuple[int, int]] = meta["terms"]
+        self._docs: List[Tuple[str, str, str, str]] = meta["docs"]
+        base = _aligned(meta_start + meta_length)
+        view = memoryview(self._mm)
+
+        def _block(name: str, fmt: str) -> memoryview:
+            offset, size = meta["layout"][name]
+            block = view[base + offset : base + offset + size]
+            return block.cast(fmt) if fmt != "B" else block
+
+        self._doc_ids = _block("doc_ids", "I")
+        self._tfs = _block("tfs", "f")
+        self._norms = _block("norms", "f")
+        self._text_offsets = _block("text_offsets", "Q")
+        self._texts = _block("texts", "B")
+
+    @property
+    def term_count(self) -> int:
+        return len(self._terms)
+
+    def _idf(self, df: int) -> float:
+        return math.log(1 + (self.count - df + 0.5) / (df + 0.5))
+
+    def _query(self, heading: str, body: str) -> Dict[str, float]:
+        weights = {term: _HEADING_WEIGHT for term in significant_word_list(heading)}
+        rare = sorted(
+            (
+                (self._terms[term][1], term)
+                for term in set(significant_word_list(body))
+                if term in self._terms and term not in weights
+            )
+        )
+        for _, term in rare[:_QUERY_BODY_TERMS]:
+            weights[term] = 1.0
+        return weights
+
+    def _text(self, doc: int) -> str:
+        start, end = self._text_offsets[doc], self._text_offsets[doc + 1]
+        return bytes(self._texts[start:end]).decode("utf-8")
+
+    def similar(
+        self,
+        heading: str,
+        body: str,
+        *,
+        k: int,
+        exclude_title: Optional[str] = None,
+    ) -> List[SimilarSection]:
+        """
+        Top `k` sections by BM25 against `heading` and `body`. Sections with
+        the same text as `body` (or each other), or from the precedent
+        titled `exclude_title`, are skipped.
+        """
+        if k <= 0 or not self.count:
+            return []
+        scores: Dict[int, float] = {}
+        for term, weight in self._query(heading, body).items():
+            entry = self._terms.get(term)
+            if entry is None:
+                continue
+            start, df = entry
+            idf = weight * self._idf(df) * (_K1 + 1)
+            for doc, tf in zip(
+                self._doc_ids[start : start + df], self._tfs[start : start + df]
+            ):
+                scores[doc] = scores.get(doc, 0.0) + idf * tf / (tf + self._norms[doc])
+
+        seen = {_text_hash(body)}
+        results: List[SimilarSection] = []
+        head = heapq.nlargest(4 * k + 4, scores.items(), key=itemgetter(1))
+        self._collect(head, k, exclude_title, seen, results)
+        if len(results) < k and len(head) < len(scores):
+            # Duplicates or excluded sections filled the head: rank the rest.
+            ranked = sorted(scores.items(), key=itemgetter(1), reverse=True)
+            self._collect(ranked[len(head) :], k, exclude_title, seen, results)
+        return results
+
+    def _collect(
+        self,
+        candidates: List[Tuple[int, float]],
+        k: int,
+        exclude_title: Optional[str],
+        seen: Set[str],
+        results: List[SimilarSection],
+    ) -> None:
+        for doc, score in candidates:
+            if len(results) >= k:
+                return
+            precedent_id, title, heading, body_hash = self._docs[doc]
+            if body_hash in seen or (exclude_title and title == exclude_title):
+                continue
+            seen.add(body_hash)
+            results.append(
+                SimilarSection(
+                    precedent_id=precedent_id,
+                    precedent_title=title,
+                    heading=heading,
+                    body=self._text(doc),
+                    score=round(score, 4),
+                )
+            )
+
+    def close(self) -> None:
+        for view in (
+            self._doc_ids,
+            self._tfs,
+            self._norms,
+            self._text_offsets,
+            self._texts,
+        ):
+            view.release()
+        self._mm.close()
+
+
+_LOCK = Lock()
+_STATS = {"queries": 0, "query_seconds": 0.0, "errors": 0, "loads": 0}
+_INDEX: Optional[PrecedentIndex] = None
+_ENABLED = False
+# (size, mtime_ns, inode) of the loaded file, and when it was last checked.
+_LOADED_KEY: Optional[Tuple[int, int, int]] = None
+_CHECKED_AT = 0.0
+
+
+def _file_key(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def _current_index() -> Optional[PrecedentIndex]:
+    """
+    The loaded index, reloaded at most every _RECHECK_SECONDS if the file
+    was rebuilt since. A replaced index is left to the garbage collector, as
+    other threads may still be reading it.
+    """
+    global _INDEX, _LOADED_KEY, _CHECKED_AT
+    if not _ENABLED:
+        return None
+    now = time.monotonic()
+    if now - _CHECKED_AT < _RECHECK_SECONDS:
+        return _INDEX
+    with _LOCK:
+        if now - _CHECKED_AT < _RECHECK_SECONDS:
+            return _INDEX
+        _CHECKED_AT = now
+        path = _index_path()
+        key = _file_key(path)
+        if key == _LOADED_KEY:
+            return _INDEX
+        _LOADED_KEY = key
+        _INDEX = None
+        if key is None:
+            return None
+        try:
+            _INDEX = PrecedentIndex(path)
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            _STATS["errors"] += 1
+            logger.exception("precedent_index: could not load %s", path)
+            return None
+        _STATS["loads"] += 1
+        logger.info(
+            "precedent_index: loaded %s sections, %s terms from %s",
+            _INDEX.count,
+            _INDEX.term_count,
+            path,
+        )
+        return _INDEX
+
+
+def configure_precedent_index_from_env() -> None:
+    """
+    Enable retrieval when snippets are wanted; the index file itself is
+    (re)loaded lazily, so it may be built after startup.
+    """
+    global _ENABLED, _CHECKED_AT
+    close_precedent_index()
+    _ENABLED = PRECEDENT_SNIPPETS_PER_SECTION > 0
+    _CHECKED_AT = 0.0
+    _current_index()
+
+
+def close_precedent_index() -> None:
+    global _INDEX, _ENABLED, _LOADED_KEY
+    with _LOCK:
+        index, _INDEX = _INDEX, None
+        _ENABLED = False
+        _LOADED_KEY = None
+    if index is not None:
+        try:
+            index.close()
+        except BufferError:
+            # Still being read; the garbage collector will unmap it.
+            pass
+
+
+def similar_sections(
+    heading: str,
+    body: str,
+    *,
+    k: int = PRECEDENT_SNIPPETS_PER_SECTION,
+    exclude_title: Optional[str] = None,
+) -> List[SimilarSection]:
+    """
+    Sections from other precedents similar to this one; empty when there is
+    no index. Never raises: retrieval must not fail a generation.
+    """
+    index = _current_index()
+    if index is None or k <= 0:
+        return []
+    started = time.perf_counter()
+    try:
+        results = index.similar(heading, body, k=k, exclude_title=exclude_title)
+    except Exception:
+        with _LOCK:
+            _STATS["errors"] += 1
+        logger.exception("precedent_index: query failed for %r", heading)
+        return []
+    elapsed = time.perf_counter() - started
+    with _LOCK:
+        _STATS["queries"] += 1
+        _STATS["query_seconds"] += elapsed
+    return results
+
+
+def get_precedent_index_stats() -> Dict[str, Any]:
+    with _LOCK:
+        counters = dict(_STATS)
+        index = _INDEX
+    queries = counters.pop("queries")
+    query_seconds = counters.pop("query_seconds")
+    return {
+        "enabled": _ENABLED,
+        "path": _index_path(),
+        "loaded": index is not None,
+        "sections": index.count if index is not None else 0,
+        "terms": index.term_count if index is not None else 0,
+        "built_at": index.built_at if index is not None else None,
+        "queries": queries,
+        "avg_query_us": round(query_seconds / queries * 1e6, 1) if queries else None,
+        **counters,
+    }
+
+
+def _corpus_from_directory(directory: Path) -> List[Dict[str, Any]]:
+    from ingest_precedents import find_precedent_files
+    from precedent_loader import load_precedent_outline
+
+    corpus = []
+    for path in find_precedent_files(directory):
+        try:
+            outline = load_precedent_outline(str(path))
+        except Exception:
+            logger.exception("precedent_index: could not parse %s", path)
+            continue
+        corpus.append(
+            {
+                "precedent_id": str(path),
+                "title": outline.get("title") or path.stem,
+                "sections": outline.get("sections") or [],
+            }
+        )
+    return corpus
+
+
+def main() -> int:
+    from ingest_precedents import DEFAULT_CORPUS_DIR
+
+    parser = argparse.ArgumentParser(description="Build the precedent index.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("directory", nargs="?", type=Path)
+    source.add_argument(
+        "--from-db", action="store_true", help="index the stored precedents"
+    )
+    parser.add_argument("--out", default=_index_path())
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.from_db:
+        from precedent_db import get_precedent_corpus_from_db
+
+        corpus = get_precedent_corpus_from_db()
+    else:
+        directory = args.directory or DEFAULT_CORPUS_DIR
+        if not directory.is_dir():
+            print(f"Precedent directory not found: {directory}", file=sys.stderr)
+            return 1
+        corpus = _corpus_from_directory(directory)
+    summary = build_index(corpus, args.out)
+    print(
+        f"{summary['sections']} sections, {summary['terms']} terms from "
+        f"{len(corpus)} precedents -> {summary['path']} "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
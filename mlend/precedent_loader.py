@@ -1,77 +1,140 @@
 import re
+import string
 import zipfile
 import xml.etree.ElementTree as ET
-from functools import lru_cache
+from itertools import chain
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Tuple
+
+from outline_cache import load_outline
+
+# Bump whenever a parsing change can alter the outline built from the same
+# .docx, so outlines cached by older parsers are not reused.
+PARSER_VERSION = "1"
 
 WORD_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
 NS = {"w": WORD_NS}
+_W_BODY = f"{{{WORD_NS}}}body"
+_W_P = f"{{{WORD_NS}}}p"
+_W_T = f"{{{WORD_NS}}}t"
 
 PLACEHOLDER_RE = re.compile(r"{{\s*([^}]+?)\s*}}")
 TOP_LEVEL_NUMBERED_RE = re.compile(r"^(\d+)\.\s+(.+)$")
 
+# Dashes and curly quotes to their ASCII forms. None of them is ASCII, so
+# ASCII text (most paragraphs) is returned untouched. For the rest, chained
+# str.replace measured faster than str.translate, whose non-ASCII path
+# looks up every character.
+_NORMALIZE_REPLACEMENTS = (
+    ("\u2013", "-"),
+    ("\u2014", "-"),
+    ("\u2018", "'"),
+    ("\u2019", "'"),
+    ("\u201c", '"'),
+    ("\u201d", '"'),
+)
+_ASCII_UPPER = string.ascii_uppercase.encode("ascii")
+_ASCII_LETTERS = string.ascii_letters.encode("ascii")
+
 
 def _normalize_text(text: str) -> str:
-    replacements = {
-        "\u2013": "-",
-        "\u2014": "-",
-        "\u2018": "'",
-        "\u2019": "'",
-        "\u201c": '"',
-        "\u201d": '"',
-    }
-    for src, dest in replacements.items():
+    # isascii() is a flag check, not a scan.
+    if text.isascii():
+        return text
+    for src, dest in _NORMALIZE_REPLACEMENTS:
         text = text.replace(src, dest)
     return text
 
 
-def _letters(text: str) -> List[str]:
-    return [ch for ch in text if ch.isalpha()]
-
-
-def _caps_ratio(text: str) -> float:
-    letters = _letters(text)
-    if not letters:
-        return 0.0
-    upper = sum(1 for ch in letters if ch.isupper())
-    return upper / len(letters)
+def _letter_counts(text: str) -> Tuple[int, int]:
+    """
+    `(letters, upper-case letters)` in `text`.
+    """
+    if text.isascii():
+        raw = text.encode("ascii")
+        return (
+            len(raw) - len(raw.translate(None, _ASCII_LETTERS)),
+            len(raw) - len(raw.translate(None, _ASCII_UPPER)),
+        )
+    letters = upper = 0
+    for ch in text:
+        if ch.isalpha():
+            letters += 1
+            if ch.isupper():
+                upper += 1
+    return letters, upper
 
 
 def _is_all_caps_heading(text: str) -> bool:
-    letters = _letters(text)
-    if not letters:
-        return False
     if len(text) > 120:
         return False
-    return all(ch.isupper() for ch in letters)
-
-
-def _is_top_level_numbered_heading(text: str) -> bool:
-    match = TOP_LEVEL_NUMBERED_RE.match(text)
-    if not match:
-        return False
-    tail = match.group(2)
-    return _caps_ratio(tail) >= 0.6
+    if text.isascii():
+        # For ASCII, cased characters are exactly the letters.
+        return text.isupper()
+    letters, upper = _letter_counts(text)
+    return letters > 0 and upper == letters
 
 
 def _is_section_heading(text: str) -> bool:
-    return _is_top_level_numbered_heading(text) or _is_all_caps_heading(text)
+    """
+    A top-level numbered heading ("7. TERMINATION", mostly capitals after
+    the number) or a short all-caps line.
+    """
+    match = TOP_LEVEL_NUMBERED_RE.match(text)
+    if match:
+        letters, upper = _letter_counts(match.group(2))
+        if letters and upper / letters >= 0.6:
+            return True
+    return _is_all_caps_heading(text)
+
+
+def iter_docx_paragraphs(path: Path) -> Iterator[str]:
+    """
+    Yield the non-empty paragraphs of a .docx in document order.
+
+    `word/document.xml` is parsed straight from the zip with `iterparse`,
+    and each paragraph is dropped from the tree once read, so memory follows
+    the current paragraph rather than the whole document. Paragraphs nested
+    in another (text boxes) follow their parent, whose text includes
+    theirs, as with a `.//w:p` then `.//w:t` walk.
+    """
+    body = None
+    # Text pieces of the paragraphs still open, outermost first, and of
+    # every paragraph started since the last top-level one began.
+    open_pieces: List[List[str]] = []
+    started: List[List[str]] = []
+    with zipfile.ZipFile(path) as zf, zf.open("word/document.xml") as xml:
+        for event, elem in ET.iterparse(xml, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                if tag == _W_P:
+                    pieces: List[str] = []
+                    open_pieces.append(pieces)
+                    started.append(pieces)
+                elif tag == _W_BODY:
+                    body = elem
+            elif tag == _W_T:
+                if elem.text:
+                    for pieces in open_pieces:
+                        pieces.append(elem.text)
+            elif tag == _W_P:
+                open_pieces.pop()
+                if open_pieces:
+                    continue
+                for pieces in started:
+                    text = _normalize_text("".join(pieces)).strip()
+                    if text:
+                        yield text
+                started.clear()
+                elem.clear()
+                if body is not None:
+                    # The parser keeps its own handle on any open table, so
+                    # detaching finished blocks from <w:body> is safe.
+                    body.clear()
 
 
 def extract_docx_paragraphs(path: Path) -> List[str]:
-    with zipfile.ZipFile(path) as zf:
-        xml = zf.read("word/document.xml")
-    root = ET.fromstring(xml)
-    paragraphs: List[str] = []
-    for p in root.findall(".//w:p", NS):
-        pieces = [t.text for t in p.findall(".//w:t", NS) if t.text]
-        if not pieces:
-            continue
-        text = _normalize_text("".join(pieces)).strip()
-        if text:
-            paragraphs.append(text)
-    return paragraphs
+    return list(iter_docx_paragraphs(path))
 
 
 def _extract_placeholders(lines: List[str]) -> List[str]:
@@ -85,20 +148,21 @@ def _extract_placeholders(lines: List[str]) -> List[str]:
 
 
 def build_precedent_outline(path: Path) -> Dict[str, Any]:
-    paragraphs = extract_docx_paragraphs(path)
+    paragraphs = iter_docx_paragraphs(path)
     title = None
     front_matter: List[str] = []
     sections: List[Dict[str, str]] = []
 
-    index = 0
-    if paragraphs and _is_all_caps_heading(paragraphs[0]):
-        title = paragraphs[0]
-        index = 1
+    first = next(paragraphs, None)
+    if first is not None and _is_all_caps_heading(first):
+        title = first
+    elif first is not None:
+        paragraphs = chain([first], paragraphs)
 
     current = None
     front_matter_done = False
 
-    for text in paragraphs[index:]:
+    for text in paragraphs:
         if _is_section_heading(text):
             front_matter_done = True
             if current:
@@ -139,9 +203,12 @@ def build_precedent_outline(path: Path) -> Dict[str, Any]:
     }
 
 
-@lru_cache(maxsize=32)
 def load_precedent_outline(path_str: str) -> Dict[str, Any]:
+    """
+    Outline of the .docx at `path_str`, reused from the on-disk outline
+    cache (see `outline_cache`) while its content and PARSER_VERSION match.
+    """
     path = Path(path_str)
     if not path.exists():
         raise FileNotFoundError(f"Precedent not found: {path}")
-    return build_precedent_outline(path)
+    return load_outline(path, PARSER_VERSION, build_precedent_outline)
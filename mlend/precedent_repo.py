@@ -1,17 +1,372 @@
 # precedent_repo.py
-from typing import Callable, Dict, Any, Optional
+import asyncio
+import json
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Any,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+from constants import (
+    PRECEDENT_CACHE_MAX_ENTRIES,
+    PRECEDENT_CACHE_REVALIDATE_SECONDS,
+    PRECEDENT_CACHE_TTL_SECONDS,
+)
+from logger import get_logger
+
+logger = get_logger(__name__)
 
 PrecedentLookup = Callable[[Optional[str], Optional[str]], Optional[Dict[str, Any]]]
+AsyncPrecedentLookup = Callable[
+    [Optional[str], Optional[str]],
+    Awaitable[Optional[Dict[str, Any]]],
+]
+PrecedentVersionLookup = Callable[[Optional[str], Optional[str]], Optional[str]]
+AsyncPrecedentVersionLookup = Callable[
+    [Optional[str], Optional[str]],
+    Awaitable[Optional[str]],
+]
+
+
+# `{{ key }}` template slots and `[Insert Employee's Address]`-style blanks.
+_SECTION_PLACEHOLDER_RE = re.compile(r"{{\s*([^}]+?)\s*}}|\[([^\[\]\n]{2,120})\]")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and any are as at be by for from has have in is it its of on or "
+    "the this to with insert name details".split()
+)
+
+
+def significant_word_list(text: str) -> List[str]:
+    """
+    The words `significant_words` keeps, in order and with repeats.
+    """
+    return [
+        word
+        for word in _WORD_RE.findall(text.lower().replace("_", " "))
+        if len(word) > 2 and word not in _STOPWORDS
+    ]
+
+
+def significant_words(text: str) -> FrozenSet[str]:
+    return frozenset(significant_word_list(text))
+
+
+def _section_placeholders(*texts: str) -> Tuple[str, ...]:
+    found = []
+    for text in texts:
+        for curly, square in _SECTION_PLACEHOLDER_RE.findall(text or ""):
+            placeholder = (curly or square).strip()
+            if placeholder and placeholder not in found:
+                found.append(placeholder)
+    return tuple(found)
+
+
+@dataclass(frozen=True)
+class PrecedentSection:
+    heading: str
+    body: str
+    # Dependency index, filled in from heading/body when not supplied.
+    placeholders: Optional[Tuple[str, ...]] = None
+    terms: FrozenSet[str] = field(default=frozenset(), repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.placeholders is None:
+            object.__setattr__(
+                self, "placeholders", _section_placeholders(self.heading, self.body)
+            )
+        if not self.terms:
+            object.__setattr__(
+                self, "terms", significant_words(f"{self.heading}\n{self.body}")
+            )
+
+
+@dataclass(frozen=True)
+class PrecedentOutline:
+    title: Optional[str]
+    front_matter: List[str]
+    sections: List[PrecedentSection]
+    placeholders: List[str]
+    version: Optional[str] = None
+
+
+def parse_precedent_outline(raw_outline: Dict[str, Any]) -> PrecedentOutline:
+    title = raw_outline.get("title")
+    front_matter = list(raw_outline.get("front_matter") or [])
+    placeholders = list(raw_outline.get("placeholders") or [])
+    sections_raw = raw_outline.get("sections") or []
+
+    sections: List[PrecedentSection] = []
+    for section in sections_raw:
+        heading = str(section.get("heading") or "").strip()
+        body = str(section.get("body") or "").strip()
+        if heading or body:
+            section_placeholders = section.get("placeholders")
+            sections.append(
+                PrecedentSection(
+                    heading=heading,
+                    body=body,
+                    placeholders=(
+                        tuple(section_placeholders) if section_placeholders else None
+                    ),
+                )
+            )
+
+    return PrecedentOutline(
+        title=title,
+        front_matter=front_matter,
+        sections=sections,
+        placeholders=placeholders,
+        version=raw_outline.get("version"),
+    )
+
+
+@dataclass(frozen=True)
+class SectionDependencies:
+    # Answer keys each section mentions, via its placeholders or its text.
+    by_section: Dict[PrecedentSection, Tuple[str, ...]]
+    # Keys no section mentions; they apply to the whole contract.
+    unplaced: Tuple[str, ...]
+
+    def keys_for(self, section: PrecedentSection) -> Tuple[str, ...]:
+        return self.by_section.get(section, ())
+
+    def sections_for(self, keys: Iterable[str]) -> Optional[List[PrecedentSection]]:
+        """
+        Sections depending on any of `keys`, or None if a key is unplaced or
+        unknown (and so may affect every section).
+        """
+        wanted = set(keys)
+        indexed = set(self.unplaced).union(*self.by_section.values())
+        if wanted & set(self.unplaced) or not wanted <= indexed:
+            return None
+        return [
+            section
+            for section, section_keys in self.by_section.items()
+            if wanted.intersection(section_keys)
+        ]
+
+
+def _mentions(section: PrecedentSection, phrase_words: FrozenSet[str]) -> bool:
+    if not phrase_words:
+        return False
+    if phrase_words <= section.terms:
+        return True
+    return any(
+        phrase_words <= significant_words(placeholder)
+        for placeholder in section.placeholders or ()
+    )
+
+
+def index_section_dependencies(
+    sections: List[PrecedentSection],
+    answer_labels: Dict[str, Optional[str]],
+) -> SectionDependencies:
+    """
+    Map each section to the answer keys it depends on.
+
+    `answer_labels` maps answer keys to their question labels (None for
+    free-form chat answers). A section depends on a key when every
+    significant word of the key, or of its label, appears in the section's
+    heading, body or placeholders. Matching is deliberately loose: an extra
+    answer costs a few tokens, a missing one costs a wrong clause.
+    """
+    phrases = {
+        key: [
+            words
+            for words in (significant_words(key), significant_words(label or ""))
+            if words
+        ]
+        for key, label in answer_labels.items()
+    }
+    by_section: Dict[PrecedentSection, Tuple[str, ...]] = {}
+    placed = set()
+    for section in sections:
+        keys = tuple(
+            key
+            for key, key_phrases in phrases.items()
+            if any(_mentions(section, words) for words in key_phrases)
+        )
+        by_section[section] = keys
+        placed.update(keys)
+    unplaced = tuple(key for key in answer_labels if key not in placed)
+    return SectionDependencies(by_section=by_section, unplaced=unplaced)
+
+
+@dataclass
+class _CacheEntry:
+    outline: Optional[PrecedentOutline]
+    fetched_at: float
+    checked_at: float
+
+
+_CacheKey = Tuple[Optional[str], Optional[str]]
 
 _LOOKUP: Optional[PrecedentLookup] = None
+_ASYNC_LOOKUP: Optional[AsyncPrecedentLookup] = None
+_VERSION_LOOKUP: Optional[PrecedentVersionLookup] = None
+_ASYNC_VERSION_LOOKUP: Optional[AsyncPrecedentVersionLookup] = None
+
+# Parsed outlines from the configured lookup, least recently used first.
+# Entries are revalidated against the lookup's version tag every
+# PRECEDENT_CACHE_REVALIDATE_SECONDS and refetched unconditionally after
+# PRECEDENT_CACHE_TTL_SECONDS.
+_CACHE_LOCK = Lock()
+_CACHE: "OrderedDict[_CacheKey, _CacheEntry]" = OrderedDict()
+_CACHE_STATS = {
+    "hits": 0,
+    "misses": 0,
+    "revalidations": 0,
+    "stale": 0,
+    "invalidations": 0,
+    "evictions": 0,
+}
 
 
-def configure_precedent_lookup(fn: PrecedentLookup) -> None:
+def configure_precedent_lookup(
+    fn: PrecedentLookup,
+    async_fn: Optional[AsyncPrecedentLookup] = None,
+    *,
+    version_fn: Optional[PrecedentVersionLookup] = None,
+    async_version_fn: Optional[AsyncPrecedentVersionLookup] = None,
+) -> None:
     """
-    Configure a DB-backed precedent lookup.
+    Configure a DB-backed precedent lookup, with optional async twins.
+
+    `version_fn` returns a cheap version tag for an outline; when set,
+    cached outlines are revalidated against it instead of being refetched.
     """
-    global _LOOKUP
+    global _LOOKUP, _ASYNC_LOOKUP, _VERSION_LOOKUP, _ASYNC_VERSION_LOOKUP
     _LOOKUP = fn
+    _ASYNC_LOOKUP = async_fn
+    _VERSION_LOOKUP = version_fn
+    _ASYNC_VERSION_LOOKUP = async_version_fn
+    invalidate_precedent_cache()
+
+
+def invalidate_precedent_cache(
+    contract_type_id: Optional[str] = None,
+    contract_type_name: Optional[str] = None,
+) -> int:
+    """
+    Drop cached outlines matching the id and/or name (all if neither given).
+    Returns the number of entries dropped.
+    """
+    with _CACHE_LOCK:
+        if not contract_type_id and not contract_type_name:
+            dropped = len(_CACHE)
+            _CACHE.clear()
+        else:
+            keys = [
+                key
+                for key in _CACHE
+                if (contract_type_id and key[0] == contract_type_id)
+                or (contract_type_name and key[1] == contract_type_name)
+            ]
+            for key in keys:
+                del _CACHE[key]
+            dropped = len(keys)
+        _CACHE_STATS["invalidations"] += dropped
+    return dropped
+
+
+def handle_precedent_notification(payload: str) -> None:
+    """
+    LISTEN/NOTIFY callback. The payload may be JSON with `contract_type_id`
+    and/or `contract_type_name`; anything else invalidates everything.
+    """
+    target: Dict[str, Any] = {}
+    if payload:
+        try:
+            parsed = json.loads(payload)
+            if isinstance(parsed, dict):
+                target = parsed
+        except ValueError:
+            pass
+    dropped = invalidate_precedent_cache(
+        target.get("contract_type_id"),
+        target.get("contract_type_name"),
+    )
+    logger.info(
+        "precedent_repo: invalidated %d cached outline(s) on notify %r",
+        dropped,
+        payload,
+    )
+
+
+def get_precedent_cache_stats() -> Dict[str, Any]:
+    with _CACHE_LOCK:
+        return {
+            "entries": len(_CACHE),
+            "max_entries": PRECEDENT_CACHE_MAX_ENTRIES,
+            "ttl_seconds": PRECEDENT_CACHE_TTL_SECONDS,
+            "revalidate_seconds": PRECEDENT_CACHE_REVALIDATE_SECONDS,
+            **_CACHE_STATS,
+        }
+
+
+def _cache_get(key: _CacheKey) -> Tuple[Optional[_CacheEntry], bool]:
+    """
+    Return `(entry, needs_revalidation)`; `entry` is None on a miss or once
+    the hard TTL has passed.
+    """
+    now = time.monotonic()
+    with _CACHE_LOCK:
+        entry = _CACHE.get(key)
+        if entry is None:
+            _CACHE_STATS["misses"] += 1
+            return None, False
+        if now - entry.fetched_at > PRECEDENT_CACHE_TTL_SECONDS:
+            del _CACHE[key]
+            _CACHE_STATS["misses"] += 1
+            return None, False
+        _CACHE.move_to_end(key)
+        return entry, now - entry.checked_at > PRECEDENT_CACHE_REVALIDATE_SECONDS
+
+
+def _cache_put(key: _CacheKey, outline: Optional[PrecedentOutline]) -> None:
+    now = time.monotonic()
+    with _CACHE_LOCK:
+        _CACHE[key] = _CacheEntry(outline=outline, fetched_at=now, checked_at=now)
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > PRECEDENT_CACHE_MAX_ENTRIES:
+            _CACHE.popitem(last=False)
+            _CACHE_STATS["evictions"] += 1
+
+
+def _cache_confirm(
+    key: _CacheKey,
+    entry: _CacheEntry,
+    current_version: Optional[str],
+) -> bool:
+    """
+    Keep `entry` if its version still matches; returns whether it was kept.
+    """
+    cached_version = entry.outline.version if entry.outline else None
+    with _CACHE_LOCK:
+        _CACHE_STATS["revalidations"] += 1
+        if current_version is not None and current_version == cached_version:
+            entry.checked_at = time.monotonic()
+            _CACHE_STATS["hits"] += 1
+            return True
+        _CACHE_STATS["stale"] += 1
+        _CACHE.pop(key, None)
+        return False
+
+
+def _parse_optional(raw: Optional[Dict[str, Any]]) -> Optional[PrecedentOutline]:
+    return parse_precedent_outline(raw) if raw else None
 
 
 def get_precedent_outline(
@@ -19,13 +374,73 @@ def get_precedent_outline(
     contract_type_name: Optional[str],
     *,
     db_outline: Optional[Dict[str, Any]] = None,
-) -> Optional[Dict[str, Any]]:
+) -> Optional[PrecedentOutline]:
     """
-    Return a precedent outline from a DB-backed lookup.
+    Return a parsed precedent outline from a DB-backed lookup (cached).
 
     If no lookup is configured, this falls back to the provided `db_outline`,
     which should already be sourced from the database by an upstream service.
     """
-    if _LOOKUP is not None:
-        return _LOOKUP(contract_type_id, contract_type_name)
-    return db_outline
+    if _LOOKUP is None:
+        return _parse_optional(db_outline)
+
+    key = (contract_type_id or None, contract_type_name or None)
+    entry, revalidate = _cache_get(key)
+    if entry is not None:
+        if not revalidate:
+            with _CACHE_LOCK:
+                _CACHE_STATS["hits"] += 1
+            return entry.outline
+        if _VERSION_LOOKUP is not None and _cache_confirm(
+            key, entry, _VERSION_LOOKUP(contract_type_id, contract_type_name)
+        ):
+            return entry.outline
+
+    outline = _parse_optional(_LOOKUP(contract_type_id, contract_type_name))
+    _cache_put(key, outline)
+    return outline
+
+
+async def get_precedent_outline_async(
+    contract_type_id: Optional[str],
+    contract_type_name: Optional[str],
+    *,
+    db_outline: Optional[Dict[str, Any]] = None,
+) -> Optional[PrecedentOutline]:
+    """
+    Async twin of `get_precedent_outline`, sharing its cache.
+
+    Uses the async lookups when configured; sync-only lookups are run in a
+    worker thread so they never block the event loop.
+    """
+    if _LOOKUP is None and _ASYNC_LOOKUP is None:
+        return _parse_optional(db_outline)
+
+    key = (contract_type_id or None, contract_type_name or None)
+    entry, revalidate = _cache_get(key)
+    if entry is not None:
+        if not revalidate:
+            with _CACHE_LOCK:
+                _CACHE_STATS["hits"] += 1
+            return entry.outline
+        current_version: Optional[str] = None
+        if _ASYNC_VERSION_LOOKUP is not None:
+            current_version = await _ASYNC_VERSION_LOOKUP(
+                contract_type_id, contract_type_name
+            )
+        elif _VERSION_LOOKUP is not None:
+            current_version = await asyncio.to_thread(
+                _VERSION_LOOKUP, contract_type_id, contract_type_name
+            )
+        if (
+            _ASYNC_VERSION_LOOKUP is not None or _VERSION_LOOKUP is not None
+        ) and _cache_confirm(key, entry, current_version):
+            return entry.outline
+
+    if _ASYNC_LOOKUP is not None:
+        raw = await _ASYNC_LOOKUP(contract_type_id, contract_type_name)
+    else:
+        raw = await asyncio.to_thread(_LOOKUP, contract_type_id, contract_type_name)
+    outline = _parse_optional(raw)
+    _cache_put(key, outline)
+    return outline
@@ -0,0 +1,406 @@
+# progress_backends.py
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Event, Lock, Thread
+from typing import Any, Dict, Iterable, List, Optional
+
+from logger import get_logger
+from sqlite_store import SqliteStore
+
+logger = get_logger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+def _is_expired(progress: Dict[str, Any], now: float, ttl_seconds: float) -> bool:
+    if progress.get("status") not in TERMINAL_STATUSES:
+        return False
+    updated_at = progress.get("updated_at") or 0
+    return now - updated_at > ttl_seconds
+
+
+class ProgressBackend(ABC):
+    """
+    Storage for generation progress snapshots, keyed by `draft_id`.
+
+    Snapshots are the plain dicts built by `progress_store`. Implementations
+    must be safe to call from several threads.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def read(self, draft_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def write_many(self, snapshots: Iterable[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def write(self, snapshot: Dict[str, Any]) -> None:
+        self.write_many([snapshot])
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """
+        Drop completed/failed snapshots past their TTL; returns how many went.
+        """
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryProgressBackend(ProgressBackend):
+    """
+    Process-local store: an LRU-ordered dict with TTL for finished drafts
+    and a hard cap on entries.
+    """
+
+    name = "memory"
+
+    def __init__(self, *, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._lock = Lock()
+        # Least recently used first.
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._evictions_ttl = 0
+        self._evictions_lru = 0
+
+    def read(self, draft_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            progress = self._entries.get(draft_id)
+            if progress is None:
+                return None
+            if _is_expired(progress, time.time(), self.ttl_seconds):
+                del self._entries[draft_id]
+                self._evictions_ttl += 1
+                return None
+            self._entries.move_to_end(draft_id)
+            return progress
+
+    def write_many(self, snapshots: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for snapshot in snapshots:
+                draft_id = snapshot["draft_id"]
+                self._entries[draft_id] = snapshot
+                self._entries.move_to_end(draft_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions_lru += 1
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [
+                draft_id
+                for draft_id, progress in self._entries.items()
+                if _is_expired(progress, now, self.ttl_seconds)
+            ]
+            for draft_id in expired:
+                del self._entries[draft_id]
+            self._evictions_ttl += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running = sum(
+                1
+                for progress in self._entries.values()
+                if progress.get("status") == "running"
+            )
+            return {
+                "backend": self.name,
+                "live_entries": len(self._entries),
+                "running_entries": running,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "evictions_ttl": self._evictions_ttl,
+                "evictions_lru": self._evictions_lru,
+            }
+
+
+def _default_sqlite_path() -> str:
+    # /dev/shm is tmpfs on Linux: a shared-memory file every worker on the
+    # host can open, without touching disk.
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else os.path.join("logs")
+    return os.path.join(base, "lexy-mlend-progress.sqlite3")
+
+
+class SqliteProgressBackend(ProgressBackend):
+    """
+    Single-host shared store: one SQLite file (WAL mode) opened by every
+    uvicorn worker on the machine.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, *, ttl_seconds: float, path: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self._store = SqliteStore(
+            path or _default_sqlite_path(),
+            """
+            CREATE TABLE IF NOT EXISTS mlend_progress (
+                draft_id TEXT PRIMARY KEY,
+                status TEXT,
+                updated_at REAL,
+                payload TEXT NOT NULL
+            )
+            """,
+        )
+        self.path = self._store.path
+
+    def read(self, draft_id: str) -> Optional[Dict[str, Any]]:
+        with self._store.connection() as conn:
+            row = conn.execute(
+                "SELECT payload FROM mlend_progress WHERE draft_id = ?",
+                (draft_id,),
+            ).fetchone()
+        if not row:
+            return None
+        progress = json.loads(row[0])
+        if _is_expired(progress, time.time(), self.ttl_seconds):
+            return None
+        return progress
+
+    def write_many(self, snapshots: Iterable[Dict[str, Any]]) -> None:
+        rows = [
+            (
+                snapshot["draft_id"],
+                snapshot.get("status"),
+                snapshot.get("updated_at"),
+                json.dumps(snapshot),
+            )
+            for snapshot in snapshots
+        ]
+        if not rows:
+            return
+        with self._store.connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    """
+                    INSERT INTO mlend_progress (draft_id, status, updated_at, payload)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(draft_id) DO UPDATE SET
+                        status = excluded.status,
+                        updated_at = excluded.updated_at,
+                        payload = excluded.payload
+                    """,
+                    rows,
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def purge_expired(self) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        with self._store.connection() as conn:
+            cur = conn.execute(
+                "DELETE FROM mlend_progress WHERE status IN (?, ?) AND updated_at < ?",
+                (*TERMINAL_STATUSES, cutoff),
+            )
+            return cur.rowcount or 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "shared_entries": self._store.count("mlend_progress"),
+        }
+
+    def close(self) -> None:
+        self._store.close()
+
+
+class PostgresProgressBackend(ProgressBackend):
+    """
+    Multi-host shared store in Postgres, using the same connection settings
+    as `precedent_db`.
+    """
+
+    name = "postgres"
+
+    def __init__(self, *, ttl_seconds: float):
+        from precedent_db import db_connection
+
+        self.ttl_seconds = ttl_seconds
+        self._connection = db_connection
+        with self._connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS mlend_generation_progress (
+                    draft_id text PRIMARY KEY,
+                    status text,
+                    updated_at double precision,
+                    payload jsonb NOT NULL
+                )
+                """
+            )
+
+    def read(self, draft_id: str) -> Optional[Dict[str, Any]]:
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT payload FROM mlend_generation_progress WHERE draft_id = %s",
+                (draft_id,),
+            ).fetchone()
+        if not row:
+            return None
+        progress = dict(row["payload"])
+        if _is_expired(progress, time.time(), self.ttl_seconds):
+            return None
+        return progress
+
+    def write_many(self, snapshots: Iterable[Dict[str, Any]]) -> None:
+        from psycopg.types.json import Jsonb
+
+        rows = [
+            (
+                snapshot["draft_id"],
+                snapshot.get("status"),
+                snapshot.get("updated_at"),
+                Jsonb(snapshot),
+            )
+            for snapshot in snapshots
+        ]
+        if not rows:
+            return
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    """
+                    INSERT INTO mlend_generation_progress
+                        (draft_id, status, updated_at, payload)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (draft_id) DO UPDATE SET
+                        status = EXCLUDED.status,
+                        updated_at = EXCLUDED.updated_at,
+                        payload = EXCLUDED.payload
+                    """,
+                    rows,
+                )
+
+    def purge_expired(self) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        with self._connection() as conn:
+            cur = conn.execute(
+                """
+                DELETE FROM mlend_generation_progress
+                WHERE status = ANY(%s) AND updated_at < %s
+                """,
+                (list(TERMINAL_STATUSES), cutoff),
+            )
+            return cur.rowcount or 0
+
+
+class CoalescingProgressWriter:
+    """
+    Write-behind buffer in front of a shared backend.
+
+    Only the latest snapshot per draft is kept between flushes, so a burst
+    of per-section updates costs one batched write. Terminal snapshots
+    (completed/failed) trigger an immediate flush.
+    """
+
+    def __init__(self, backend: ProgressBackend, *, flush_interval: float):
+        self.backend = backend
+        self.flush_interval = max(0.01, flush_interval)
+        self._lock = Lock()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._wake = Event()
+        self._stop = Event()
+        self._submitted = 0
+        self._written = 0
+        self._flushes = 0
+        self._errors = 0
+        self._thread = Thread(
+            target=self._run,
+            name=f"progress-writer-{backend.name}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def submit(self, snapshot: Dict[str, Any]) -> None:
+        with self._lock:
+            self._pending[snapshot["draft_id"]] = dict(snapshot)
+            self._submitted += 1
+        if snapshot.get("status") in TERMINAL_STATUSES:
+            self._wake.set()
+
+    def flush(self) -> None:
+        with self._lock:
+            batch: List[Dict[str, Any]] = list(self._pending.values())
+            self._pending.clear()
+        if not batch:
+            return
+        try:
+            self.backend.write_many(batch)
+        except Exception:
+            self._errors += 1
+            logger.exception(
+                "progress_backends: %s flush of %d snapshots failed",
+                self.backend.name,
+                len(batch),
+            )
+            with self._lock:
+                # Keep anything newer that arrived meanwhile; retry the rest.
+                for snapshot in batch:
+                    self._pending.setdefault(snapshot["draft_id"], snapshot)
+            return
+        self._written += len(batch)
+        self._flushes += 1
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "submitted": self._submitted,
+            "written": self._written,
+            "flushes": self._flushes,
+            "flush_errors": self._errors,
+            "pending": pending,
+        }
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+
+def create_progress_backend(
+    kind: str,
+    *,
+    ttl_seconds: float,
+    sqlite_path: Optional[str] = None,
+) -> Optional[ProgressBackend]:
+    """
+    Build the shared progress backend named by `kind`.
+
+    `memory` (the default) means no shared backend: progress lives only in
+    the worker that runs the generation.
+    """
+    kind = (kind or "memory").strip().lower()
+    if kind == "memory":
+        return None
+    if kind == "sqlite":
+        return SqliteProgressBackend(ttl_seconds=ttl_seconds, path=sqlite_path)
+    if kind == "postgres":
+        return PostgresProgressBackend(ttl_seconds=ttl_seconds)
+    raise ValueError(
+        f"Unknown progress backend '{kind}'. Use memory, sqlite or postgres."
+    )
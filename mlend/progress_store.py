@@ -1,10 +1,56 @@
 # progress_store.py
-from threading import Lock
-from typing import Dict, Any, Optional
+import asyncio
+from threading import Event, Lock, Thread
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 import time
 
+from constants import (
+    PROGRESS_BACKEND,
+    PROGRESS_FLUSH_INTERVAL_SECONDS,
+    PROGRESS_MAX_ENTRIES,
+    PROGRESS_SQLITE_PATH,
+    PROGRESS_SWEEP_INTERVAL_SECONDS,
+    PROGRESS_TTL_SECONDS,
+)
+from logger import get_logger
+from progress_backends import (
+    TERMINAL_STATUSES,
+    CoalescingProgressWriter,
+    MemoryProgressBackend,
+    ProgressBackend,
+    create_progress_backend,
+)
+
+logger = get_logger(__name__)
+
+# `_LOCK` serialises read-modify-write of a snapshot with its fan-out, so
+# listeners and backends see transitions in order.
 _LOCK = Lock()
-_PROGRESS: Dict[str, Dict[str, Any]] = {}
+# Drafts generated by this worker. Completed/failed entries expire after
+# PROGRESS_TTL_SECONDS; the store is capped at PROGRESS_MAX_ENTRIES (LRU).
+_LOCAL = MemoryProgressBackend(
+    ttl_seconds=PROGRESS_TTL_SECONDS,
+    max_entries=PROGRESS_MAX_ENTRIES,
+)
+# Optional cross-worker backend (sqlite/postgres), written behind a
+# coalescing buffer and read only for drafts this worker has not seen.
+_SHARED: Optional[ProgressBackend] = None
+_SHARED_WRITER: Optional[CoalescingProgressWriter] = None
+_SHARED_POLL_SECONDS = 1.0
+_SWEEPER: Optional[Thread] = None
+_SWEEPER_STOP = Event()
+
+# Per-draft listeners: each entry is the subscriber's event loop and queue.
+# Progress writers may run in worker threads, so delivery always goes through
+# `loop.call_soon_threadsafe`.
+_SUBSCRIBERS: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+_SUBSCRIBER_QUEUE_SIZE = 32
+_TERMINAL_STATUSES = TERMINAL_STATUSES
+# Snapshot field holding the sections a failed generation did finish
+# (section cache key -> text), so a retry on any worker can reuse them. It
+# is stored and shared like the rest of the snapshot but never shown to
+# clients.
+_DRAFTED_SECTIONS = "drafted_sections"
 
 
 def _now_ts() -> float:
@@ -18,13 +64,135 @@ def _percent(completed: int, total: int) -> int:
     return max(0, min(100, round(ratio * 100)))
 
 
+def _lookup(draft_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Return this worker's live entry for `draft_id`. Caller holds `_LOCK`.
+    """
+    return _LOCAL.read(draft_id)
+
+
+def _public(progress: Dict[str, Any]) -> Dict[str, Any]:
+    snapshot = dict(progress)
+    snapshot.pop(_DRAFTED_SECTIONS, None)
+    return snapshot
+
+
+def _store(draft_id: str, progress: Dict[str, Any]) -> None:
+    """
+    Save an entry locally and queue it for the shared backend. Caller holds `_LOCK`.
+    """
+    _LOCAL.write(progress)
+    if _SHARED_WRITER is not None:
+        _SHARED_WRITER.submit(progress)
+
+
+def configure_progress_backend(backend: Optional[ProgressBackend]) -> None:
+    """
+    Install (or, with `None`, remove) the shared cross-worker backend.
+    """
+    global _SHARED, _SHARED_WRITER
+    close_progress_backend()
+    if backend is None:
+        return
+    _SHARED = backend
+    _SHARED_WRITER = CoalescingProgressWriter(
+        backend,
+        flush_interval=PROGRESS_FLUSH_INTERVAL_SECONDS,
+    )
+    logger.info("progress_store: using shared %s backend", backend.name)
+
+
+def configure_progress_backend_from_env() -> None:
+    configure_progress_backend(
+        create_progress_backend(
+            PROGRESS_BACKEND,
+            ttl_seconds=PROGRESS_TTL_SECONDS,
+            sqlite_path=PROGRESS_SQLITE_PATH,
+        )
+    )
+
+
+def close_progress_backend() -> None:
+    """
+    Flush pending writes and close the shared backend, if any.
+    """
+    global _SHARED, _SHARED_WRITER
+    if _SHARED_WRITER is not None:
+        _SHARED_WRITER.close()
+    if _SHARED is not None:
+        _SHARED.close()
+    _SHARED = None
+    _SHARED_WRITER = None
+
+
+def _offer(queue: asyncio.Queue, snapshot: Dict[str, Any]) -> None:
+    # Slow listeners only need the latest state; drop the oldest snapshot
+    # rather than growing the queue without bound.
+    if queue.full():
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait(snapshot)
+
+
+def _publish(draft_id: str, progress: Dict[str, Any]) -> None:
+    """
+    Fan a progress transition out to every listener of `draft_id`.
+
+    Must be called with `_LOCK` held so listeners see transitions in order.
+    """
+    listeners = _SUBSCRIBERS.get(draft_id)
+    if not listeners:
+        return
+    snapshot = _public(progress)
+    alive = []
+    for loop, queue in listeners:
+        try:
+            loop.call_soon_threadsafe(_offer, queue, snapshot)
+        except RuntimeError:
+            # Listener's loop has been closed; forget it.
+            continue
+        alive.append((loop, queue))
+    if alive:
+        _SUBSCRIBERS[draft_id] = alive
+    else:
+        _SUBSCRIBERS.pop(draft_id, None)
+
+
+def idle_progress(draft_id: str) -> Dict[str, Any]:
+    return {
+        "draft_id": draft_id,
+        "status": "idle",
+        "percent": 0,
+        "current_step": None,
+        "completed_sections": 0,
+        "total_sections": 0,
+        "updated_at": None,
+        "error": None,
+    }
+
+
 def init_progress(
     draft_id: str,
     total_sections: int,
     current_step: Optional[str] = None,
 ) -> None:
+    """
+    Start a run. Sections kept by a failed previous run of the draft (here
+    or, through the shared backend, on another worker) carry over.
+    """
+    with _LOCK:
+        previous = _lookup(draft_id)
+    if previous is None:
+        previous = _read_shared(draft_id)
+    drafted = (
+        (previous or {}).get(_DRAFTED_SECTIONS)
+        if (previous or {}).get("status") == "failed"
+        else None
+    )
     with _LOCK:
-        _PROGRESS[draft_id] = {
+        progress = {
             "draft_id": draft_id,
             "status": "running",
             "percent": _percent(0, total_sections),
@@ -34,6 +202,10 @@ def init_progress(
             "updated_at": _now_ts(),
             "error": None,
         }
+        if drafted:
+            progress[_DRAFTED_SECTIONS] = dict(drafted)
+        _store(draft_id, progress)
+        _publish(draft_id, progress)
 
 
 def update_progress(
@@ -43,7 +215,7 @@ def update_progress(
     current_step: Optional[str] = None,
 ) -> None:
     with _LOCK:
-        progress = _PROGRESS.get(draft_id) or {
+        progress = _lookup(draft_id) or {
             "draft_id": draft_id,
             "status": "running",
             "percent": 0,
@@ -68,7 +240,8 @@ def update_progress(
         progress["status"] = "running"
         progress["updated_at"] = _now_ts()
 
-        _PROGRESS[draft_id] = progress
+        _store(draft_id, progress)
+        _publish(draft_id, progress)
 
 
 def complete_progress(
@@ -76,7 +249,7 @@ def complete_progress(
     current_step: Optional[str] = None,
 ) -> None:
     with _LOCK:
-        progress = _PROGRESS.get(draft_id)
+        progress = _lookup(draft_id)
         if not progress:
             progress = {
                 "draft_id": draft_id,
@@ -94,21 +267,197 @@ def complete_progress(
             progress["current_step"] = current_step
         progress["updated_at"] = _now_ts()
         progress["error"] = None
-        _PROGRESS[draft_id] = progress
+        progress.pop(_DRAFTED_SECTIONS, None)
+        _store(draft_id, progress)
+        _publish(draft_id, progress)
 
 
-def fail_progress(draft_id: str, error: str) -> None:
+def fail_progress(
+    draft_id: str,
+    error: str,
+    drafted_sections: Optional[Dict[str, str]] = None,
+) -> None:
+    """
+    Mark a run failed, keeping `drafted_sections` (section cache key ->
+    text) next to those carried over from earlier failed runs until the
+    snapshot expires.
+    """
     with _LOCK:
-        progress = _PROGRESS.get(draft_id) or {"draft_id": draft_id}
+        progress = _lookup(draft_id) or {"draft_id": draft_id}
         progress["status"] = "failed"
         progress["error"] = error
         progress["updated_at"] = _now_ts()
-        _PROGRESS[draft_id] = progress
+        if drafted_sections:
+            progress[_DRAFTED_SECTIONS] = {
+                **(progress.get(_DRAFTED_SECTIONS) or {}),
+                **drafted_sections,
+            }
+        _store(draft_id, progress)
+        _publish(draft_id, progress)
+
+
+def get_drafted_section(draft_id: str, key: str) -> Optional[str]:
+    """
+    A section (by section cache key) finished by an earlier failed run of
+    this draft and carried into the current one.
+    """
+    with _LOCK:
+        progress = _lookup(draft_id)
+        drafted = (progress or {}).get(_DRAFTED_SECTIONS)
+        return drafted.get(key) if drafted else None
+
+
+def _read_shared(draft_id: str) -> Optional[Dict[str, Any]]:
+    shared = _SHARED
+    if shared is None:
+        return None
+    try:
+        return shared.read(draft_id)
+    except Exception:
+        logger.exception("progress_store: shared read failed draft_id=%s", draft_id)
+        return None
 
 
 def get_progress(draft_id: str) -> Optional[Dict[str, Any]]:
     with _LOCK:
-        progress = _PROGRESS.get(draft_id)
-        if not progress:
-            return None
-        return dict(progress)
+        progress = _lookup(draft_id)
+        if progress:
+            return _public(progress)
+    # Not generated here: another worker may own it.
+    shared = _read_shared(draft_id)
+    return _public(shared) if shared else None
+
+
+def sweep_expired() -> int:
+    """
+    Drop completed/failed entries older than the TTL. Returns how many went.
+    """
+    removed = _LOCAL.purge_expired()
+    shared = _SHARED
+    if shared is not None:
+        removed += shared.purge_expired()
+    return removed
+
+
+def _sweep_loop(interval: float) -> None:
+    while not _SWEEPER_STOP.wait(interval):
+        try:
+            removed = sweep_expired()
+            if removed:
+                logger.debug("progress_store: swept %d expired entries", removed)
+        except Exception:
+            logger.exception("progress_store: sweep failed")
+
+
+def start_sweeper(interval: float = PROGRESS_SWEEP_INTERVAL_SECONDS) -> None:
+    """
+    Start the background TTL sweeper thread (idempotent).
+    """
+    global _SWEEPER
+    if _SWEEPER is not None and _SWEEPER.is_alive():
+        return
+    _SWEEPER_STOP.clear()
+    _SWEEPER = Thread(
+        target=_sweep_loop,
+        args=(interval,),
+        name="progress-sweeper",
+        daemon=True,
+    )
+    _SWEEPER.start()
+
+
+def stop_sweeper() -> None:
+    global _SWEEPER
+    _SWEEPER_STOP.set()
+    if _SWEEPER is not None:
+        _SWEEPER.join(timeout=5)
+    _SWEEPER = None
+
+
+def get_progress_stats() -> Dict[str, Any]:
+    stats = _LOCAL.stats()
+    stats["subscribed_drafts"] = len(_SUBSCRIBERS)
+    shared, writer = _SHARED, _SHARED_WRITER
+    if shared is not None and writer is not None:
+        try:
+            stats["shared"] = {**shared.stats(), **writer.stats()}
+        except Exception as exc:
+            stats["shared"] = {"backend": shared.name, "error": str(exc)}
+    return stats
+
+
+def _subscribe(draft_id: str) -> Tuple[asyncio.Queue, Optional[Dict[str, Any]]]:
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=_SUBSCRIBER_QUEUE_SIZE)
+    with _LOCK:
+        # Register and snapshot under one lock so no transition is missed
+        # or delivered twice.
+        _SUBSCRIBERS.setdefault(draft_id, []).append((loop, queue))
+        progress = _lookup(draft_id)
+        return queue, _public(progress) if progress else None
+
+
+def _unsubscribe(draft_id: str, queue: asyncio.Queue) -> None:
+    with _LOCK:
+        listeners = [
+            entry for entry in _SUBSCRIBERS.get(draft_id, []) if entry[1] is not queue
+        ]
+        if listeners:
+            _SUBSCRIBERS[draft_id] = listeners
+        else:
+            _SUBSCRIBERS.pop(draft_id, None)
+
+
+async def watch_progress(
+    draft_id: str,
+    keepalive: Optional[float] = None,
+) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    Yield progress snapshots for `draft_id` as transitions happen.
+
+    Starts with the current state (or an idle snapshot) and ends after a
+    `completed`/`failed` snapshot. If `keepalive` is set, `None` is yielded
+    whenever that many seconds pass without a transition.
+
+    Transitions made in this worker are pushed. For drafts running in
+    another worker, the shared backend (if configured) is re-read once per
+    `_SHARED_POLL_SECONDS` instead.
+    """
+    queue, current = _subscribe(draft_id)
+    try:
+        if current is None:
+            current = await asyncio.to_thread(_read_shared, draft_id)
+            current = _public(current) if current else None
+        snapshot = current or idle_progress(draft_id)
+        yield snapshot
+        if snapshot.get("status") in _TERMINAL_STATUSES:
+            return
+        last_seen = snapshot.get("updated_at")
+        last_yield = time.monotonic()
+        while True:
+            timeout = keepalive
+            if _SHARED is not None:
+                timeout = min(timeout or _SHARED_POLL_SECONDS, _SHARED_POLL_SECONDS)
+            try:
+                snapshot = await asyncio.wait_for(queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                snapshot = None
+                if _SHARED is not None:
+                    with _LOCK:
+                        owned = _lookup(draft_id) is not None
+                    if not owned:
+                        shared = await asyncio.to_thread(_read_shared, draft_id)
+                        if shared and shared.get("updated_at") != last_seen:
+                            snapshot = _public(shared)
+                if snapshot is None:
+                    if keepalive and time.monotonic() - last_yield >= keepalive:
+                        last_yield = time.monotonic()
+                        yield None
+                    continue
+            last_seen = snapshot.get("updated_at")
+            last_yield = time.monotonic()
+            yield snapshot
+            if snapshot.get("status") in _TERMINAL_STATUSES:
+                return
+    finally:
+        _unsubscribe(draft_id, queue)
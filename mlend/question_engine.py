@@ -0,0 +1,158 @@
+# question_engine.py
+import hashlib
+import re
+from threading import Lock
+from typing import Any, Dict, List, Optional, Set
+
+from base_models import ChatMessage, ContractQuestion
+from constants import CHAT_FAST_PATH_MAX_ANSWER_CHARS, CHAT_FAST_PATH_RATIO
+
+# chat_answers flag holding the key of the question the fast path asked last;
+# the next user message is read as the answer to it.
+PENDING_QUESTION_FLAG = "__pending_question"
+
+_QUESTION_START_RE = re.compile(
+    r"^(what|why|how|can|could|should|would|do|does|did|is|are|which|who|"
+    r"whom|when|where|will|shall|may)\b",
+    re.IGNORECASE,
+)
+_UNSURE_RE = re.compile(
+    r"\b(not sure|unsure|don'?t know|do not know|no idea|skip|later|depends|"
+    r"maybe|either|tbd|tbc|n/?a|not applicable|help|explain|instead|change)\b",
+    re.IGNORECASE,
+)
+# Filler, hesitation and politeness: the user is still thinking or replying
+# to the assistant, not answering.
+_FILLER_RE = re.compile(
+    r"\b(let me|wait|hold on|hang on|one (sec|second|moment)|just a (sec|second|"
+    r"moment)|h+m+|u+m+|u+h+|e+r+m*|thanks|thank you|cheers|please|good question|"
+    r"i think|i guess|i'?ll|i will|i need|not yet|check|ask|confirm|get back)\b",
+    re.IGNORECASE,
+)
+_YES_RE = re.compile(r"^(yes|yep|yeah|yup|correct)[\s.!]*$", re.IGNORECASE)
+_NO_RE = re.compile(r"^(no|nope|none)[\s.!]*$", re.IGNORECASE)
+_ACK_RE = re.compile(
+    r"^(ok(ay)?|sure|yes|yep|yeah|hi|hello|hey|ready|start|go ahead|continue|"
+    r"next|let'?s (start|go|begin)|sounds good)[\s.!]*$",
+    re.IGNORECASE,
+)
+_YES_NO_LABEL_RE = re.compile(
+    r"^(include|is|are|do|does|will|should|has|have|can|must|any)\b",
+    re.IGNORECASE,
+)
+_SENTENCE_END_RE = re.compile(r"[.!]\s+\S")
+
+_LOCK = Lock()
+_STATS = {"local_turns": 0, "llm_turns": 0, "captured_answers": 0, "ambiguous": 0}
+
+
+def count_turn(local: bool) -> None:
+    with _LOCK:
+        _STATS["local_turns" if local else "llm_turns"] += 1
+
+
+def get_question_engine_stats() -> Dict[str, Any]:
+    with _LOCK:
+        total = _STATS["local_turns"] + _STATS["llm_turns"]
+        return {
+            "fast_path_ratio": CHAT_FAST_PATH_RATIO,
+            **_STATS,
+            "local_share": round(_STATS["local_turns"] / total, 4) if total else None,
+        }
+
+
+def fast_path_selected(draft_id: str, turn_index: int) -> bool:
+    """
+    Whether this turn may use the fast path under CHAT_FAST_PATH_RATIO.
+    """
+    if CHAT_FAST_PATH_RATIO >= 1.0:
+        return True
+    if CHAT_FAST_PATH_RATIO <= 0.0:
+        return False
+    digest = hashlib.sha1(f"{draft_id}:{turn_index}".encode("utf-8")).digest()
+    bucket = int.from_bytes(digest[:4], "big") / 0xFFFFFFFF
+    return bucket < CHAT_FAST_PATH_RATIO
+
+
+def latest_user_text(chat_messages: List[ChatMessage]) -> Optional[str]:
+    if not chat_messages or chat_messages[-1].role != "user":
+        return None
+    return chat_messages[-1].content.strip()
+
+
+def is_acknowledgement(text: str) -> bool:
+    return bool(_ACK_RE.match(text.strip()))
+
+
+def is_yes_no_question(question: ContractQuestion) -> bool:
+    return bool(_YES_NO_LABEL_RE.match(question.label.strip()))
+
+
+def capture_answer(
+    text: Optional[str],
+    question: Optional[ContractQuestion],
+) -> Optional[str]:
+    """
+    Read a user message as a direct answer to the pending `question`.
+
+    "Yes"/"No" are only answers to a yes/no question; anything else must
+    look like a value. Returns the cleaned answer, or None when the message
+    looks like anything else (a question, uncertainty, filler, a long
+    free-text reply), which is left to the LLM.
+    """
+    if not text or question is None:
+        return None
+    answer = text.strip()
+    ambiguous = (
+        len(answer) > CHAT_FAST_PATH_MAX_ANSWER_CHARS
+        or "?" in answer
+        or "\n" in answer
+        or not any(ch.isalnum() for ch in answer)
+        or bool(_QUESTION_START_RE.match(answer))
+        or bool(_UNSURE_RE.search(answer))
+        or bool(_FILLER_RE.search(answer))
+        or bool(_SENTENCE_END_RE.search(answer))
+    )
+    if _YES_RE.match(answer) or _NO_RE.match(answer):
+        if is_yes_no_question(question):
+            answer = "Yes" if _YES_RE.match(answer) else "No"
+        else:
+            # "No" to "What is the salary?" is not a salary.
+            ambiguous = True
+    elif _ACK_RE.match(answer):
+        # "ok", "sure", "next": an acknowledgement, not an answer.
+        ambiguous = True
+    if ambiguous:
+        with _LOCK:
+            _STATS["ambiguous"] += 1
+        return None
+    with _LOCK:
+        _STATS["captured_answers"] += 1
+    return answer.rstrip(".! ").strip() or None
+
+
+def next_question(
+    questions: List[ContractQuestion],
+    answered_keys: Set[str],
+) -> Optional[ContractQuestion]:
+    """
+    The first unanswered required question, in template order.
+    """
+    for question in questions:
+        if question.required and question.key not in answered_keys:
+            return question
+    return None
+
+
+def phrase_question(question: ContractQuestion) -> str:
+    label = question.label.strip().rstrip(":").strip()
+    if label.endswith("?"):
+        text = label
+    elif is_yes_no_question(question):
+        text = f"{label}?"
+    else:
+        text = f"What is the {label[:1].lower()}{label[1:]}?"
+    description = (question.description or "").strip()
+    if description:
+        text = f"{text} {description}"
+    return text
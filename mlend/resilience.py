@@ -0,0 +1,252 @@
+# resilience.py
+import asyncio
+import random
+import time
+from collections import deque
+from threading import Lock
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+import anthropic
+
+from constants import (
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_MIN_SECONDS,
+    LLM_HEDGE_PERCENTILE,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_SECONDS,
+    LLM_RETRY_MAX_SECONDS,
+)
+from logger import get_logger
+
+logger = get_logger(__name__)
+T = TypeVar("T")
+
+_RETRYABLE_STATUS = (408, 409, 429)
+_LATENCY_WINDOW = 200
+
+_LOCK = Lock()
+_STATS = {
+    "retries": 0,
+    "gave_up": 0,
+    "hedges_sent": 0,
+    "hedges_won": 0,
+}
+# hedge key -> recent successful latencies (seconds)
+_LATENCIES: Dict[str, Deque[float]] = {}
+
+
+def _count(name: str) -> None:
+    with _LOCK:
+        _STATS[name] += 1
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Transient Anthropic failures: connection errors and timeouts, 408/409/
+    429 and 5xx (incl. 529 overloaded). Wrapped errors (e.g. Instructor's)
+    are unwrapped through their cause chain.
+    """
+    seen = 0
+    current: Optional[BaseException] = exc
+    while current is not None and seen < 5:
+        if isinstance(current, anthropic.APIConnectionError):
+            return True
+        if isinstance(current, anthropic.APIStatusError):
+            status = current.status_code
+            return status in _RETRYABLE_STATUS or status >= 500
+        current = current.__cause__ or current.__context__
+        seen += 1
+    return False
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, exc: Optional[BaseException] = None) -> float:
+    """
+    Full-jitter exponential backoff for retry `attempt` (0-based); a
+    server `retry-after` is honoured up to LLM_RETRY_MAX_SECONDS.
+    """
+    ceiling = min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * (2 ** attempt))
+    delay = random.uniform(0, ceiling)
+    retry_after = _retry_after(exc) if exc is not None else None
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, LLM_RETRY_MAX_SECONDS))
+    return delay
+
+
+def _should_retry(label: str, attempt: int, exc: BaseException) -> Optional[float]:
+    if not is_retryable(exc):
+        return None
+    if attempt >= LLM_MAX_RETRIES:
+        _count("gave_up")
+        logger.warning(
+            "retry: %s failed after %d attempts: %s", label, attempt + 1, exc
+        )
+        return None
+    delay = backoff_delay(attempt, exc)
+    _count("retries")
+    logger.warning(
+        "retry: %s attempt %d failed (%s); retrying in %.2fs",
+        label,
+        attempt + 1,
+        exc,
+        delay,
+    )
+    return delay
+
+
+def retry_call(label: str, fn: Callable[..., T], **kwargs: Any) -> T:
+    """
+    Call `fn(**kwargs)`, retrying transient failures with backoff.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn(**kwargs)
+        except Exception as exc:
+            delay = _should_retry(label, attempt, exc)
+            if delay is None:
+                raise
+        time.sleep(delay)
+        attempt += 1
+
+
+async def retry_call_async(
+    label: str,
+    fn: Callable[..., Awaitable[T]],
+    **kwargs: Any,
+) -> T:
+    """
+    Async twin of `retry_call`.
+    """
+    attempt = 0
+    while True:
+        try:
+            return await fn(**kwargs)
+        except Exception as exc:
+            delay = _should_retry(label, attempt, exc)
+            if delay is None:
+                raise
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+def retry_delay(label: str, attempt: int, exc: BaseException) -> Optional[float]:
+    """
+    Backoff before retry `attempt`, or None when `exc` should be raised.
+    For call shapes `retry_call` can't wrap (e.g. streams).
+    """
+    return _should_retry(label, attempt, exc)
+
+
+def record_latency(key: str, seconds: float) -> None:
+    with _LOCK:
+        samples = _LATENCIES.get(key)
+        if samples is None:
+            samples = _LATENCIES[key] = deque(maxlen=_LATENCY_WINDOW)
+        samples.append(seconds)
+
+
+def timed_attempts(
+    key: Optional[str],
+    fn: Callable[..., Awaitable[T]],
+) -> Callable[..., Awaitable[T]]:
+    """
+    `fn`, recording the latency of each successful call under `key`. Wrap
+    the single attempt (inside `retry_call_async`) so backoff sleeps don't
+    inflate the hedge threshold.
+    """
+    if not key:
+        return fn
+
+    async def _call(**kwargs: Any) -> T:
+        started = time.perf_counter()
+        result = await fn(**kwargs)
+        record_latency(key, time.perf_counter() - started)
+        return result
+
+    return _call
+
+
+def hedge_delay(key: Optional[str]) -> Optional[float]:
+    """
+    Seconds to wait before hedging a call under `key`, or None when hedging
+    is off or there are too few samples.
+    """
+    if not LLM_HEDGE_ENABLED or not key:
+        return None
+    with _LOCK:
+        samples = sorted(_LATENCIES.get(key) or ())
+    if len(samples) < LLM_HEDGE_MIN_SAMPLES:
+        return None
+    index = min(len(samples) - 1, int(LLM_HEDGE_PERCENTILE * len(samples)))
+    return max(LLM_HEDGE_MIN_SECONDS, samples[index])
+
+
+async def hedged(
+    key: Optional[str],
+    factory: Callable[[], Awaitable[T]],
+) -> T:
+    """
+    Await `factory()`; if it outlives `hedge_delay(key)`, start a second
+    identical call and return whichever succeeds first. The other call is
+    cancelled, as are both if the caller is. Latencies are recorded by the
+    calls themselves (see `timed_attempts`).
+    """
+    delay = hedge_delay(key)
+    if delay is None:
+        return await factory()
+
+    primary = asyncio.ensure_future(factory())
+    tasks = [primary]
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        _count("hedges_sent")
+        logger.info("hedged: %s exceeded %.2fs; sending a duplicate", key, delay)
+        backup = asyncio.ensure_future(factory())
+        tasks.append(backup)
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is backup:
+                        _count("hedges_won")
+                    return task.result()
+                error = error or task.exception()
+        assert error is not None
+        raise error
+    finally:
+        # Never leave a paid request running unobserved.
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def get_resilience_stats() -> Dict[str, Any]:
+    with _LOCK:
+        latencies = {key: len(samples) for key, samples in _LATENCIES.items()}
+        counters = dict(_STATS)
+    return {
+        **counters,
+        "max_retries": LLM_MAX_RETRIES,
+        "hedging": LLM_HEDGE_ENABLED,
+        "hedge_thresholds": {key: hedge_delay(key) for key in latencies},
+        "latency_samples": latencies,
+    }
@@ -0,0 +1,109 @@
+"""
+Parity check and benchmark for `precedent_loader.iter_docx_paragraphs`.
+
+Compares the streaming extractor against the previous whole-tree
+implementation on every .docx under a directory (the employment precedents
+by default), then reports wall time and peak traced memory for both.
+Exits non-zero if any document extracts differently.
+
+    python scripts/bench_docx_extraction.py [DIR] [--repeat N]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+MLEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(MLEND_DIR))
+
+from precedent_loader import NS, _normalize_text, extract_docx_paragraphs  # noqa: E402
+
+DEFAULT_DIR = MLEND_DIR.parent / "Data" / "Employement" / "Contracts"
+
+
+def extract_docx_paragraphs_tree(path: Path) -> List[str]:
+    """
+    The extractor `iter_docx_paragraphs` replaced, kept as the reference.
+    """
+    with zipfile.ZipFile(path) as zf:
+        xml = zf.read("word/document.xml")
+    root = ET.fromstring(xml)
+    paragraphs: List[str] = []
+    for p in root.findall(".//w:p", NS):
+        pieces = [t.text for t in p.findall(".//w:t", NS) if t.text]
+        if not pieces:
+            continue
+        text = _normalize_text("".join(pieces)).strip()
+        if text:
+            paragraphs.append(text)
+    return paragraphs
+
+
+def _time(fn: Callable[[Path], List[str]], paths: List[Path], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for path in paths:
+            fn(path)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _peak_bytes(fn: Callable[[Path], List[str]], path: Path) -> int:
+    tracemalloc.start()
+    try:
+        fn(path)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _check_parity(paths: List[Path]) -> List[Tuple[Path, int, int]]:
+    mismatches = []
+    for path in paths:
+        expected = extract_docx_paragraphs_tree(path)
+        actual = extract_docx_paragraphs(path)
+        if actual != expected:
+            mismatches.append((path, len(expected), len(actual)))
+    return mismatches
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("directory", nargs="?", type=Path, default=DEFAULT_DIR)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = sorted(args.directory.rglob("*.docx"))
+    if not paths:
+        print(f"No .docx files under {args.directory}")
+        return 1
+
+    mismatches = _check_parity(paths)
+    for path, expected, actual in mismatches:
+        print(f"MISMATCH {path.name}: {expected} paragraphs (tree) vs {actual}")
+    print(f"parity: {len(paths) - len(mismatches)}/{len(paths)} documents identical")
+
+    tree_seconds = _time(extract_docx_paragraphs_tree, paths, args.repeat)
+    stream_seconds = _time(extract_docx_paragraphs, paths, args.repeat)
+    print(
+        f"time (best of {args.repeat}, all documents): "
+        f"tree {tree_seconds * 1000:.1f} ms, stream {stream_seconds * 1000:.1f} ms"
+    )
+
+    largest = max(paths, key=lambda p: p.stat().st_size)
+    tree_peak = _peak_bytes(extract_docx_paragraphs_tree, largest)
+    stream_peak = _peak_bytes(extract_docx_paragraphs, largest)
+    print(
+        f"peak memory ({largest.name}): "
+        f"tree {tree_peak / 1024:.0f} KiB, stream {stream_peak / 1024:.0f} KiB"
+    )
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
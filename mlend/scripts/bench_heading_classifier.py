@@ -0,0 +1,162 @@
+"""
+Parity check and micro-benchmark for the heading classifier and text
+normalization in `precedent_loader`.
+
+Runs the previous per-paragraph helpers and the current ones over every
+paragraph of the .docx files under a directory (the employment precedents
+by default, plus a few non-ASCII edge cases): the classifier on normalized
+paragraphs, normalization on the raw paragraph text. Checks that they
+agree and times both. Exits non-zero on any disagreement.
+
+    python scripts/bench_heading_classifier.py [DIR] [--repeat N]
+"""
+import argparse
+import sys
+import timeit
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+from typing import Callable, List
+
+MLEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(MLEND_DIR))
+
+from precedent_loader import (  # noqa: E402
+    NS,
+    TOP_LEVEL_NUMBERED_RE,
+    _is_section_heading,
+    _normalize_text,
+    iter_docx_paragraphs,
+)
+
+DEFAULT_DIR = MLEND_DIR.parent / "Data" / "Employement" / "Contracts"
+
+EDGE_CASES = [
+    "ÉTAT CIVIL",
+    "État civil",
+    "1. DÉFINITIONS ET INTERPRÉTATION",
+    "2. Ⓐ circled, not a letter",
+    "SCHEDULE 1 – “POSITION”",
+    "3. straße",
+    "合同",
+    "1. 合同 TERMS",
+    "١. ARABIC-INDIC DIGIT",
+    "12.\tTAB AFTER NUMBER",
+    "—",
+    "",
+]
+
+
+# The helpers the single-pass classifier replaced, kept as the reference.
+def _legacy_normalize_text(text: str) -> str:
+    replacements = {
+        "\u2013": "-",
+        "\u2014": "-",
+        "\u2018": "'",
+        "\u2019": "'",
+        "\u201c": '"',
+        "\u201d": '"',
+    }
+    for src, dest in replacements.items():
+        text = text.replace(src, dest)
+    return text
+
+
+def _legacy_letters(text: str) -> List[str]:
+    return [ch for ch in text if ch.isalpha()]
+
+
+def _legacy_caps_ratio(text: str) -> float:
+    letters = _legacy_letters(text)
+    if not letters:
+        return 0.0
+    upper = sum(1 for ch in letters if ch.isupper())
+    return upper / len(letters)
+
+
+def _legacy_is_all_caps_heading(text: str) -> bool:
+    letters = _legacy_letters(text)
+    if not letters:
+        return False
+    if len(text) > 120:
+        return False
+    return all(ch.isupper() for ch in letters)
+
+
+def _legacy_is_section_heading(text: str) -> bool:
+    match = TOP_LEVEL_NUMBERED_RE.match(text)
+    if match and _legacy_caps_ratio(match.group(2)) >= 0.6:
+        return True
+    return _legacy_is_all_caps_heading(text)
+
+
+def _raw_paragraphs(path: Path) -> List[str]:
+    # Paragraph text as extracted, before normalization.
+    with zipfile.ZipFile(path) as zf:
+        root = ET.fromstring(zf.read("word/document.xml"))
+    texts = (
+        "".join(t.text for t in p.findall(".//w:t", NS) if t.text)
+        for p in root.findall(".//w:p", NS)
+    )
+    return [text for text in texts if text]
+
+
+def _best_ms(fn: Callable[[], object], repeat: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("directory", nargs="?", type=Path, default=DEFAULT_DIR)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    paths = sorted(args.directory.rglob("*.docx"))
+    paragraphs = [text for path in paths for text in iter_docx_paragraphs(path)]
+    raw = [text for path in paths for text in _raw_paragraphs(path)]
+    if not paragraphs:
+        print(f"No paragraphs found under {args.directory}")
+        return 1
+    samples = paragraphs + raw + EDGE_CASES
+
+    mismatches = [
+        text
+        for text in samples
+        if _is_section_heading(text) != _legacy_is_section_heading(text)
+        or _normalize_text(text) != _legacy_normalize_text(text)
+    ]
+    for text in mismatches[:20]:
+        print(f"MISMATCH {text[:80]!r}")
+    print(
+        f"parity: {len(samples) - len(mismatches)}/{len(samples)} samples agree "
+        f"({sum(map(_is_section_heading, paragraphs))} headings)"
+    )
+
+    rows = [
+        (
+            "heading",
+            lambda: [_legacy_is_section_heading(text) for text in paragraphs],
+            lambda: [_is_section_heading(text) for text in paragraphs],
+        ),
+        (
+            "normalize",
+            lambda: [_legacy_normalize_text(text) for text in raw],
+            lambda: [_normalize_text(text) for text in raw],
+        ),
+    ]
+    print(
+        f"{len(paragraphs)} paragraphs ({sum(not text.isascii() for text in raw)} "
+        f"non-ASCII before normalization), best of {args.repeat}:"
+    )
+    for label, legacy, current in rows:
+        before = _best_ms(legacy, args.repeat)
+        after = _best_ms(current, args.repeat)
+        print(
+            f"  {label:<10} {before:7.2f} ms -> {after:6.2f} ms "
+            f"({before / after:.1f}x)"
+        )
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+# section_cache.py
+import hashlib
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from constants import (
+    SECTION_CACHE_BACKEND,
+    SECTION_CACHE_MAX_ENTRIES,
+    SECTION_CACHE_SQLITE_PATH,
+    SECTION_CACHE_TTL_SECONDS,
+)
+from logger import get_logger
+from sqlite_store import SqliteStore
+
+logger = get_logger(__name__)
+
+# Bump when the section prompt layout changes in a way that should retire
+# previously cached drafts.
+SECTION_CACHE_KEY_VERSION = "1"
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def section_cache_key(
+    *,
+    model: str,
+    system_prompt: str,
+    heading: str,
+    body: str,
+    context: str,
+    max_tokens: int,
+    temperature: float,
+) -> str:
+    """
+    Content address for one drafted section.
+
+    `context` is whatever part of the section context can change the draft;
+    two calls with the same key are expected to produce interchangeable text.
+    """
+    parts = [
+        SECTION_CACHE_KEY_VERSION,
+        model,
+        _sha256(system_prompt),
+        _sha256(heading),
+        _sha256(body),
+        _sha256(context),
+        str(max_tokens),
+        repr(temperature),
+    ]
+    return _sha256("\x1f".join(parts))
+
+
+class SectionCacheBackend(ABC):
+    """
+    Storage for drafted section text keyed by `section_cache_key`.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def put(self, key: str, text: str) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+    def close(self) -> None:
+        pass
+
+
+class MemorySectionCache(SectionCacheBackend):
+    """
+    Process-local LRU with a TTL per entry.
+    """
+
+    name = "memory"
+
+    def __init__(self, *, max_entries: int, ttl_seconds: float):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._lock = Lock()
+        # key -> (stored_at, text), least recently used first.
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, text = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return text
+
+    def put(self, key: str, text: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": self.name,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "evictions": self._evictions,
+            }
+
+
+def _default_sqlite_path() -> str:
+    return os.path.join("cache", "lexy-mlend-sections.sqlite3")
+
+
+class SqliteSectionCache(SectionCacheBackend):
+    """
+    On-disk cache shared by every worker on the host and kept across
+    restarts. Least recently used rows are pruned past `max_entries`.
+    """
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        *,
+        max_entries: int,
+        ttl_seconds: float,
+        path: Optional[str] = None,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._evictions = 0
+        self._store = SqliteStore(
+            path or _default_sqlite_path(),
+            """
+            CREATE TABLE IF NOT EXISTS mlend_section_cache (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS mlend_section_cache_used_at
+            ON mlend_section_cache (used_at)
+            """,
+        )
+        self.path = self._store.path
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._store.connection() as conn:
+            row = conn.execute(
+                "SELECT text, stored_at FROM mlend_section_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if not row:
+                return None
+            text, stored_at = row
+            if now - stored_at > self.ttl_seconds:
+                conn.execute("DELETE FROM mlend_section_cache WHERE key = ?", (key,))
+                return None
+            conn.execute(
+                "UPDATE mlend_section_cache SET used_at = ? WHERE key = ?",
+                (now, key),
+            )
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        now = time.time()
+        with self._store.connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO mlend_section_cache (key, text, stored_at, used_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    text = excluded.text,
+                    stored_at = excluded.stored_at,
+                    used_at = excluded.used_at
+                """,
+                (key, text, now, now),
+            )
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM mlend_section_cache"
+            ).fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    """
+                    DELETE FROM mlend_section_cache WHERE key IN (
+                        SELECT key FROM mlend_section_cache
+                        ORDER BY used_at LIMIT ?
+                    )
+                    """,
+                    (excess,),
+                )
+                self._evictions += excess
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "entries": self._store.count("mlend_section_cache"),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": self._evictions,
+        }
+
+    def close(self) -> None:
+        self._store.close()
+
+
+def create_section_cache(
+    kind: str,
+    *,
+    max_entries: int,
+    ttl_seconds: float,
+    sqlite_path: Optional[str] = None,
+) -> Optional[SectionCacheBackend]:
+    """
+    Build the section cache named by `kind`; `off` disables caching.
+    """
+    kind = (kind or "memory").strip().lower()
+    if kind == "off":
+        return None
+    if kind == "memory":
+        return MemorySectionCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if kind == "sqlite":
+        return SqliteSectionCache(
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            path=sqlite_path,
+        )
+    raise ValueError(f"Unknown section cache '{kind}'. Use memory, sqlite or off.")
+
+
+_STATS_LOCK = Lock()
+_STATS = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+_BACKEND: Optional[SectionCacheBackend] = MemorySectionCache(
+    max_entries=SECTION_CACHE_MAX_ENTRIES,
+    ttl_seconds=SECTION_CACHE_TTL_SECONDS,
+)
+
+
+def _count(name: str) -> None:
+    with _STATS_LOCK:
+        _STATS[name] += 1
+
+
+def configure_section_cache(backend: Optional[SectionCacheBackend]) -> None:
+    """
+    Install (or, with `None`, disable) the section cache.
+    """
+    global _BACKEND
+    close_section_cache()
+    _BACKEND = backend
+    if backend is not None:
+        logger.info("section_cache: using %s backend", backend.name)
+
+
+def configure_section_cache_from_env() -> None:
+    configure_section_cache(
+        create_section_cache(
+            SECTION_CACHE_BACKEND,
+            max_entries=SECTION_CACHE_MAX_ENTRIES,
+            ttl_seconds=SECTION_CACHE_TTL_SECONDS,
+            sqlite_path=SECTION_CACHE_SQLITE_PATH,
+        )
+    )
+
+
+def close_section_cache() -> None:
+    global _BACKEND
+    if _BACKEND is not None:
+        _BACKEND.close()
+    _BACKEND = None
+
+
+def get_cached_section(key: str) -> Optional[str]:
+    backend = _BACKEND
+    if backend is None:
+        return None
+    try:
+        text = backend.get(key)
+    except Exception:
+        # A broken cache must never fail a generation; treat it as a miss.
+        _count("errors")
+        logger.exception("section_cache: %s read failed", backend.name)
+        text = None
+    _count("hits" if text is not None else "misses")
+    return text
+
+
+def put_cached_section(key: str, text: str) -> None:
+    backend = _BACKEND
+    if backend is None or not text:
+        return
+    try:
+        backend.put(key, text)
+    except Exception:
+        _count("errors")
+        logger.exception("section_cache: %s write failed", backend.name)
+        return
+    _count("writes")
+
+
+def get_section_cache_stats() -> Dict[str, Any]:
+    with _STATS_LOCK:
+        counters = dict(_STATS)
+    lookups = counters["hits"] + counters["misses"]
+    backend = _BACKEND
+    return {
+        **(backend.stats() if backend is not None else {"backend": "off"}),
+        **counters,
+        "hit_ratio": round(counters["hits"] / lookups, 4) if lookups else None,
+    }
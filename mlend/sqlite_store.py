@@ -0,0 +1,45 @@
+# sqlite_store.py
+import os
+import sqlite3
+from contextlib import contextmanager
+from threading import Lock
+from typing import Iterator
+
+
+class SqliteStore:
+    """
+    One SQLite file (WAL mode) that every worker on the host may open. The
+    connection is shared by this process's threads, one at a time, so the
+    backends built on it are thread-safe.
+    """
+
+    def __init__(self, path: str, *schema: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = Lock()
+        self._conn = sqlite3.connect(
+            path,
+            timeout=5.0,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in schema:
+            self._conn.execute(statement)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            yield self._conn
+
+    def count(self, table: str) -> int:
+        with self.connection() as conn:
+            (count,) = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
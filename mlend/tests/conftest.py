@@ -0,0 +1,11 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# mlend modules import each other as top-level modules.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault(
+    "LOG_FILE", os.path.join(tempfile.gettempdir(), "lexy-mlend-tests", "test.log")
+)
@@ -0,0 +1,187 @@
+# tests/test_ingest_precedents.py
+import contextlib
+import json
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+import ingest_precedents
+import precedent_db
+from ingest_precedents import ParsedPrecedent, _changed_files, _write_batch
+from precedent_loader import PARSER_VERSION
+
+PRECEDENT = (
+    Path(__file__).resolve().parents[2]
+    / "Data/Employement/Contracts/11. Casual_Employment_Agreement_Enhanced.docx"
+)
+
+OLD_TYPE = "11111111-1111-1111-1111-111111111111"
+NEW_TYPE = "22222222-2222-2222-2222-222222222222"
+CONTRACT_TYPES = [
+    {
+        "id": NEW_TYPE,
+        "name": "Casual Employment Agreement",
+        "slug": "casual-employment-agreement",
+        "category": "employment",
+        "jurisdiction_default": "AU",
+    }
+]
+
+
+class RecordingCursor:
+    """
+    Answers the SELECTs `ingest_precedents` sends from in-memory rows and
+    records every statement.
+    """
+
+    def __init__(self, db: "RecordingDatabase"):
+        self.db = db
+        self.rows: List[Dict[str, Any]] = []
+
+    def execute(self, query: str, params: Optional[Tuple[Any, ...]] = None):
+        self.db.statements.append((query, params))
+        if "FROM mlend_precedent_ingest" in query:
+            self.rows = [
+                {
+                    "source_path": path,
+                    "content_sha256": digest,
+                    "parser_version": version,
+                }
+                for path, (digest, version) in self.db.ingested.items()
+                if path in params[0]
+            ]
+        elif "FROM precedent_documents" in query:
+            self.rows = [
+                dict(row)
+                for row in self.db.documents
+                if row["source_path"] in params[0]
+            ]
+        else:
+            self.rows = []
+        return self
+
+    def executemany(self, query: str, rows):
+        self.db.batches.append((" ".join(query.split()), list(rows)))
+
+    def fetchall(self) -> List[Dict[str, Any]]:
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class RecordingDatabase:
+    def __init__(self):
+        self.documents: List[Dict[str, Any]] = []
+        self.ingested: Dict[str, Tuple[str, str]] = {}
+        self.statements: List[Tuple[str, Any]] = []
+        self.batches: List[Tuple[str, List[Tuple[Any, ...]]]] = []
+
+    def cursor(self) -> RecordingCursor:
+        return RecordingCursor(self)
+
+    def execute(self, query: str, params: Optional[Tuple[Any, ...]] = None):
+        return RecordingCursor(self).execute(query, params)
+
+    def rows_for(self, prefix: str) -> List[Tuple[Any, ...]]:
+        return [
+            row
+            for query, rows in self.batches
+            if query.startswith(prefix)
+            for row in rows
+        ]
+
+
+@pytest.fixture
+def db(monkeypatch) -> RecordingDatabase:
+    database = RecordingDatabase()
+
+    @contextlib.contextmanager
+    def db_connection():
+        yield database
+
+    monkeypatch.setattr(precedent_db, "db_connection", db_connection)
+    monkeypatch.setattr(ingest_precedents, "PRECEDENT_NOTIFY_CHANNEL", "precedents")
+    return database
+
+
+def _parsed(source_path: str, title: str) -> ParsedPrecedent:
+    return ParsedPrecedent(
+        source_path=source_path,
+        digest=f"sha-{source_path}",
+        outline={
+            "title": title,
+            "front_matter": [],
+            "sections": [{"heading": "1. TERM", "body": "Casual."}],
+            "placeholders": [],
+        },
+    )
+
+
+def _notified(db: RecordingDatabase) -> List[str]:
+    return sorted(
+        json.loads(payload)["contract_type_id"]
+        for _, payload in db.rows_for("SELECT pg_notify")
+    )
+
+
+def test_new_documents_are_inserted_and_notify_their_type(db):
+    _write_batch(
+        [_parsed("/p/casual.docx", "Casual Employment Agreement")], CONTRACT_TYPES
+    )
+
+    (insert,) = db.rows_for("INSERT INTO precedent_documents")
+    assert insert[1] == "/p/casual.docx"
+    assert insert[-1] == NEW_TYPE
+    assert not db.rows_for("UPDATE precedent_documents")
+    (state,) = db.rows_for("INSERT INTO mlend_precedent_ingest")
+    assert state[:3] == ("/p/casual.docx", "sha-/p/casual.docx", PARSER_VERSION)
+    assert _notified(db) == [NEW_TYPE]
+
+
+def test_moving_a_document_to_another_type_notifies_both(db):
+    db.documents.append(
+        {"id": "doc-1", "source_path": "/p/casual.docx", "contractTypeId": OLD_TYPE}
+    )
+
+    _write_batch(
+        [_parsed("/p/casual.docx", "Casual Employment Agreement")], CONTRACT_TYPES
+    )
+
+    (update,) = db.rows_for("UPDATE precedent_documents")
+    assert update[-2:] == (NEW_TYPE, "doc-1")
+    assert not db.rows_for("INSERT INTO precedent_documents")
+    assert _notified(db) == [OLD_TYPE, NEW_TYPE]
+
+
+def test_unchanged_files_are_skipped(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest_precedents, "file_digest", lambda path: f"sha-{path}")
+    same, changed = tmp_path / "same.docx", tmp_path / "changed.docx"
+    db.ingested[str(same)] = (f"sha-{same}", PARSER_VERSION)
+    db.ingested[str(changed)] = ("sha-old", PARSER_VERSION)
+
+    pending, skipped = _changed_files([same, changed], force=False, dry_run=False)
+
+    assert pending == [(str(changed), f"sha-{changed}")]
+    assert skipped == 1
+    pending, skipped = _changed_files([same, changed], force=True, dry_run=False)
+    assert len(pending) == 2 and skipped == 0
+
+
+def test_forced_ingest_creates_the_state_table(db, tmp_path):
+    shutil.copy(PRECEDENT, tmp_path / "casual.docx")
+
+    result = ingest_precedents.ingest_precedents(
+        tmp_path, workers=1, batch_size=10, force=True
+    )
+
+    assert result["ingested"] == 1
+    assert any(
+        query == ingest_precedents._STATE_TABLE_SQL for query, _ in db.statements
+    )
+    assert db.rows_for("INSERT INTO mlend_precedent_ingest")
@@ -0,0 +1,20 @@
+# tests/test_precedent_repo.py
+from precedent_repo import parse_precedent_outline
+
+
+def test_outline_placeholders_survive_sections_without_their_own():
+    outline = parse_precedent_outline(
+        {
+            "title": "T",
+            "front_matter": [],
+            "placeholders": ["{{a}}"],
+            "sections": [
+                {"heading": "1. X", "body": "hi"},
+                {"heading": "2. Y", "body": "there", "placeholders": ["{{b}}"]},
+            ],
+        }
+    )
+
+    assert outline.placeholders == ["{{a}}"]
+    assert outline.sections[0].placeholders == ()
+    assert outline.sections[1].placeholders == ("{{b}}",)
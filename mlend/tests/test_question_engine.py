@@ -0,0 +1,37 @@
+# tests/test_question_engine.py
+import pytest
+
+from base_models import ContractQuestion
+from question_engine import capture_answer
+
+SALARY = ContractQuestion(key="annual_salary", label="Annual salary")
+PROBATION = ContractQuestion(key="probation", label="Include a probation period")
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["Let me think", "wait", "hmm", "Thanks!", "yes please", "ok", "No", "yes", "..."],
+)
+def test_non_answers_to_value_questions_go_to_the_llm(text):
+    assert capture_answer(text, SALARY) is None
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("$120,000", "$120,000"),
+        ("120k AUD.", "120k AUD"),
+        ("Acme Pty Ltd", "Acme Pty Ltd"),
+    ],
+)
+def test_value_answers_are_captured(text, expected):
+    assert capture_answer(text, SALARY) == expected
+
+
+@pytest.mark.parametrize("text, expected", [("yep", "Yes"), ("No.", "No")])
+def test_yes_no_answers_are_captured_for_yes_no_questions(text, expected):
+    assert capture_answer(text, PROBATION) == expected
+
+
+def test_unknown_question_is_not_captured():
+    assert capture_answer("$120,000", None) is None
@@ -0,0 +1,45 @@
+# token_budget.py
+import math
+from typing import Iterable, List, Tuple
+
+# Claude tokenizes English prose at roughly 3.5-4 characters per token. The
+# estimate only drives prompt budgeting and logging, so a fixed ratio is
+# close enough and costs nothing compared to a count_tokens round trip.
+_CHARS_PER_TOKEN = 3.8
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return max(1, math.ceil(len(text) / _CHARS_PER_TOKEN))
+
+
+def take_within_budget(
+    candidates: Iterable[Tuple[int, str]],
+    budget: int,
+) -> List[Tuple[int, str]]:
+    """
+    Keep `(position, text)` candidates, in the given priority order, while
+    their estimated tokens fit in `budget`. Items that don't fit are skipped
+    so smaller ones further down can still use the remaining room. The kept
+    items come back sorted by position.
+    """
+    kept: List[Tuple[int, str]] = []
+    remaining = budget
+    for position, text in candidates:
+        cost = estimate_tokens(text)
+        if cost <= remaining:
+            kept.append((position, text))
+            remaining -= cost
+    return sorted(kept)
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """
+    Keep the end of `text` within `budget` estimated tokens (the most recent
+    part of a message is usually the part that matters).
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    max_chars = max(0, int(budget * _CHARS_PER_TOKEN) - 1)
+    return "…" + text[len(text) - max_chars :] if max_chars else ""